@@ -0,0 +1,252 @@
+"""initial schema
+
+Revision ID: 3f1c9a2b7d41
+Revises: 
+Create Date: 2026-10-19 09:00:00.000000
+
+Baseline schema sesuai models.py sebelum Alembic digunakan.
+Database lama yang tabelnya dibuat oleh Base.metadata.create_all
+tidak diubah, migration ini hanya menandai titik awal history.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c9a2b7d41'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table("olts"):
+        # Schema sudah dibuat oleh create_all (deployment sebelum Alembic)
+        return
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("password", sa.String(length=255), nullable=False),
+        sa.Column("role", sa.Enum("ADMIN", "OPERATOR", name="userrole"), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("last_login", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "olts",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("hostname", sa.String(length=255), nullable=True),
+        sa.Column("ip_address", sa.String(length=45), nullable=False),
+        sa.Column("vendor", sa.String(length=100), nullable=True),
+        sa.Column("model", sa.String(length=255), nullable=True),
+        sa.Column("firmware_version", sa.String(length=100), nullable=True),
+        sa.Column("snmp_community", sa.String(length=255), nullable=True),
+        sa.Column("snmp_version", sa.Integer(), nullable=True),
+        sa.Column("snmp_port", sa.Integer(), nullable=True),
+        sa.Column("snmp_username", sa.String(length=255), nullable=True),
+        sa.Column("snmp_password", sa.String(length=255), nullable=True),
+        sa.Column("ssh_username", sa.String(length=255), nullable=True),
+        sa.Column("ssh_password", sa.String(length=500), nullable=True),
+        sa.Column("ssh_port", sa.Integer(), nullable=True),
+        sa.Column("api_endpoint", sa.String(length=500), nullable=True),
+        sa.Column("api_username", sa.String(length=255), nullable=True),
+        sa.Column("api_password", sa.String(length=500), nullable=True),
+        sa.Column("location", sa.String(length=255), nullable=True),
+        sa.Column("latitude", sa.DECIMAL(precision=10, scale=8), nullable=True),
+        sa.Column("longitude", sa.DECIMAL(precision=11, scale=8), nullable=True),
+        sa.Column("status", sa.Enum("ONLINE", "OFFLINE", "UNKNOWN", name="oltstatus"), nullable=True),
+        sa.Column("cpu_usage", sa.Float(), nullable=True),
+        sa.Column("memory_usage", sa.Float(), nullable=True),
+        sa.Column("uptime", sa.BigInteger(), nullable=True),
+        sa.Column("temperature", sa.Float(), nullable=True),
+        sa.Column("last_polled_at", sa.DateTime(), nullable=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_olts_id", "olts", ["id"])
+    op.create_index("ix_olts_ip_address", "olts", ["ip_address"], unique=True)
+
+    op.create_table(
+        "locations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("address", sa.Text(), nullable=True),
+        sa.Column("latitude", sa.DECIMAL(precision=10, scale=8), nullable=True),
+        sa.Column("longitude", sa.DECIMAL(precision=11, scale=8), nullable=True),
+        sa.Column("city", sa.String(length=255), nullable=True),
+        sa.Column("province", sa.String(length=255), nullable=True),
+        sa.Column("postal_code", sa.String(length=20), nullable=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_locations_id", "locations", ["id"])
+
+    op.create_table(
+        "pons",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("olt_id", sa.Integer(), nullable=False),
+        sa.Column("pon_port", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("max_onus", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["olt_id"], ["olts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        mysql_engine="InnoDB",
+    )
+    op.create_index("ix_pons_id", "pons", ["id"])
+
+    op.create_table(
+        "onus",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("olt_id", sa.Integer(), nullable=False),
+        sa.Column("pon_id", sa.Integer(), nullable=True),
+        sa.Column("serial_number", sa.String(length=255), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=True),
+        sa.Column("pon_port", sa.Integer(), nullable=False),
+        sa.Column("onu_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.Enum("ONLINE", "OFFLINE", "UNKNOWN", name="onustatus"), nullable=True),
+        sa.Column("admin_status", sa.Enum("ENABLED", "DISABLED", name="adminstatus"), nullable=True),
+        sa.Column("model", sa.String(length=255), nullable=True),
+        sa.Column("mac_address", sa.String(length=17), nullable=True),
+        sa.Column("ip_address", sa.String(length=45), nullable=True),
+        sa.Column("rx_power", sa.Float(), nullable=True),
+        sa.Column("tx_power", sa.Float(), nullable=True),
+        sa.Column("rx_bytes", sa.BigInteger(), nullable=True),
+        sa.Column("tx_bytes", sa.BigInteger(), nullable=True),
+        sa.Column("service_profile", sa.String(length=255), nullable=True),
+        sa.Column("location_id", sa.Integer(), nullable=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("provisioned_at", sa.DateTime(), nullable=True),
+        sa.Column("last_seen_at", sa.DateTime(), nullable=True),
+        sa.Column("last_status_change", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["location_id"], ["locations.id"], ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(["olt_id"], ["olts.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["pon_id"], ["pons.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+        mysql_engine="InnoDB",
+    )
+    op.create_index("ix_onus_id", "onus", ["id"])
+    op.create_index("ix_onus_serial_number", "onus", ["serial_number"], unique=True)
+
+    op.create_table(
+        "alarms",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("olt_id", sa.Integer(), nullable=True),
+        sa.Column("onu_id", sa.Integer(), nullable=True),
+        sa.Column("severity", sa.Enum("CRITICAL", "MAJOR", "MINOR", "WARNING", "INFO", name="alarmseverity"), nullable=True),
+        sa.Column("type", sa.String(length=255), nullable=False),
+        sa.Column("message", sa.String(length=500), nullable=False),
+        sa.Column("details", sa.Text(), nullable=True),
+        sa.Column("status", sa.Enum("ACTIVE", "CLEARED", "ACKNOWLEDGED", name="alarmstatus"), nullable=True),
+        sa.Column("occurred_at", sa.DateTime(), nullable=False),
+        sa.Column("cleared_at", sa.DateTime(), nullable=True),
+        sa.Column("acknowledged_by", sa.Integer(), nullable=True),
+        sa.Column("acknowledged_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["acknowledged_by"], ["users.id"], ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(["olt_id"], ["olts.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["onu_id"], ["onus.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_alarms_id", "alarms", ["id"])
+
+    op.create_table(
+        "pppoe_accounts",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("onu_id", sa.Integer(), nullable=False),
+        sa.Column("username", sa.String(length=255), nullable=False),
+        sa.Column("password", sa.String(length=255), nullable=False),
+        sa.Column("service_name", sa.String(length=255), nullable=True),
+        sa.Column("vlan_id", sa.String(length=50), nullable=True),
+        sa.Column("status", sa.Enum("ACTIVE", "INACTIVE", "SUSPENDED", name="pppoestatus"), nullable=True),
+        sa.Column("download_speed", sa.BigInteger(), nullable=True),
+        sa.Column("upload_speed", sa.BigInteger(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["onu_id"], ["onus.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_pppoe_accounts_id", "pppoe_accounts", ["id"])
+    op.create_index("ix_pppoe_accounts_username", "pppoe_accounts", ["username"], unique=True)
+
+    op.create_table(
+        "activity_logs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column(
+            "activity_type",
+            sa.Enum("CREATE", "UPDATE", "DELETE", "PROVISION", "REBOOT", "RESET", "LOGIN", "LOGOUT", "OTHER",
+                    name="activitytype"),
+            nullable=False,
+        ),
+        sa.Column("entity_type", sa.String(length=100), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=True),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("ip_address", sa.String(length=45), nullable=True),
+        sa.Column("user_agent", sa.String(length=500), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_activity_logs_id", "activity_logs", ["id"])
+
+    op.create_table(
+        "onu_status_history",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("onu_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.Enum("ONLINE", "OFFLINE", "UNKNOWN", name="onustatus"), nullable=False),
+        sa.Column("rx_power", sa.Float(), nullable=True),
+        sa.Column("tx_power", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["onu_id"], ["onus.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_onu_status_history_id", "onu_status_history", ["id"])
+
+    op.create_table(
+        "olt_performance_logs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("olt_id", sa.Integer(), nullable=False),
+        sa.Column("cpu_usage", sa.Float(), nullable=True),
+        sa.Column("memory_usage", sa.Float(), nullable=True),
+        sa.Column("uptime", sa.BigInteger(), nullable=True),
+        sa.Column("temperature", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["olt_id"], ["olts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_olt_performance_logs_id", "olt_performance_logs", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("olt_performance_logs")
+    op.drop_table("onu_status_history")
+    op.drop_table("activity_logs")
+    op.drop_table("pppoe_accounts")
+    op.drop_table("alarms")
+    op.drop_table("onus")
+    op.drop_table("pons")
+    op.drop_table("locations")
+    op.drop_table("olts")
+    op.drop_table("users")
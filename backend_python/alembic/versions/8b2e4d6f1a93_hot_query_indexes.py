@@ -0,0 +1,109 @@
+"""hot query indexes
+
+Revision ID: 8b2e4d6f1a93
+Revises: 3f1c9a2b7d41
+Create Date: 2026-10-19 09:30:00.000000
+
+Index untuk query yang paling sering dijalankan:
+- onus (olt_id, pon_port, onu_id): lookup ONU oleh poller dan sync_onus (unique)
+- onus (olt_id, status) dan (status): daftar ONU per OLT dan hitungan status dashboard
+- alarms (status, severity): hitungan alarm aktif per severity
+- alarms (status, occurred_at): daftar alarm aktif terbaru
+- alarms (olt_id, status): alarm aktif per OLT (maps)
+- activity_logs (user_id, created_at): log aktivitas per user
+
+Sebelum index unique dibuat, ONU ganda pada slot (olt_id, pon_port, onu_id)
+yang sama (bisa dibuat sync_onus versi lama, mis. ONU diganti di slot yang sama)
+digabung: baris yang paling baru terlihat (last_seen_at) dipertahankan, alarm
+dan histori status baris lain dipindah ke baris tsb, lalu baris lain dihapus.
+Akun PPPoE satu per ONU (Onu.pppoe_account): hanya akun terbaru (updated_at) di
+slot tsb yang dipindah, akun lain dihapus dan dicatat (id, username) di output.
+Cek plan query: python -m benchmarks.check_query_plans
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4d6f1a93'
+down_revision = '3f1c9a2b7d41'
+branch_labels = None
+depends_on = None
+
+
+ONU_CHILD_TABLES = ("alarms", "onu_status_history")
+
+
+def merge_pppoe_accounts(bind, keep: int, onu_ids) -> list:
+    """Keep the newest PPPoE account of the merged ONUs on keep, delete the others (one account per ONU)"""
+    accounts = bind.execute(
+        sa.text(
+            "SELECT id, username FROM pppoe_accounts WHERE onu_id IN :onu_ids "
+            "ORDER BY COALESCE(updated_at, created_at) DESC, id DESC"
+        ).bindparams(sa.bindparam("onu_ids", expanding=True)),
+        {"onu_ids": list(onu_ids)},
+    ).all()
+    if not accounts:
+        return []
+    newest, dropped = accounts[0], accounts[1:]
+    if dropped:
+        bind.execute(
+            sa.text("DELETE FROM pppoe_accounts WHERE id IN :ids").bindparams(sa.bindparam("ids", expanding=True)),
+            {"ids": [account.id for account in dropped]},
+        )
+    bind.execute(sa.text("UPDATE pppoe_accounts SET onu_id = :keep WHERE id = :id"), {"keep": keep, "id": newest.id})
+    return dropped
+
+
+def dedupe_onus() -> None:
+    """Merge ONUs sharing (olt_id, pon_port, onu_id) into the most recently seen one"""
+    bind = op.get_bind()
+    groups = bind.execute(sa.text(
+        "SELECT olt_id, pon_port, onu_id FROM onus "
+        "GROUP BY olt_id, pon_port, onu_id HAVING COUNT(*) > 1"
+    )).all()
+    removed = 0
+    dropped_accounts = []
+    for olt_id, pon_port, onu_id in groups:
+        ids = bind.execute(sa.text(
+            "SELECT id FROM onus WHERE olt_id = :olt_id AND pon_port = :pon_port AND onu_id = :onu_id "
+            "ORDER BY COALESCE(last_seen_at, created_at) DESC, id DESC"
+        ), {"olt_id": olt_id, "pon_port": pon_port, "onu_id": onu_id}).scalars().all()
+        keep, duplicates = ids[0], ids[1:]
+        dropped_accounts.extend(merge_pppoe_accounts(bind, keep, ids))
+        for table in ONU_CHILD_TABLES:
+            bind.execute(
+                sa.text(f"UPDATE {table} SET onu_id = :keep WHERE onu_id IN :duplicates")
+                .bindparams(sa.bindparam("duplicates", expanding=True)),
+                {"keep": keep, "duplicates": duplicates},
+            )
+        bind.execute(
+            sa.text("DELETE FROM onus WHERE id IN :duplicates").bindparams(sa.bindparam("duplicates", expanding=True)),
+            {"duplicates": duplicates},
+        )
+        removed += len(duplicates)
+    if removed:
+        print(f"Merged {removed} duplicate ONU rows into {len(groups)} (olt_id, pon_port, onu_id) slots")
+    for account in dropped_accounts:
+        print(f"Deleted PPPoE account {account.id} ({account.username}) of a merged duplicate ONU")
+
+
+def upgrade() -> None:
+    dedupe_onus()
+    op.create_index("uq_onus_olt_pon_onu", "onus", ["olt_id", "pon_port", "onu_id"], unique=True)
+    op.create_index("ix_onus_olt_status", "onus", ["olt_id", "status"])
+    op.create_index("ix_onus_status", "onus", ["status"])
+    op.create_index("ix_alarms_status_severity", "alarms", ["status", "severity"])
+    op.create_index("ix_alarms_status_occurred_at", "alarms", ["status", "occurred_at"])
+    op.create_index("ix_alarms_olt_status", "alarms", ["olt_id", "status"])
+    op.create_index("ix_activity_logs_user_created", "activity_logs", ["user_id", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_activity_logs_user_created", table_name="activity_logs")
+    op.drop_index("ix_alarms_olt_status", table_name="alarms")
+    op.drop_index("ix_alarms_status_occurred_at", table_name="alarms")
+    op.drop_index("ix_alarms_status_severity", table_name="alarms")
+    op.drop_index("ix_onus_status", table_name="onus")
+    op.drop_index("ix_onus_olt_status", table_name="onus")
+    op.drop_index("uq_onus_olt_pon_onu", table_name="onus")
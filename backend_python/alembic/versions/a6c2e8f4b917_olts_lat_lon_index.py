@@ -0,0 +1,25 @@
+"""olts lat lon index
+
+Revision ID: a6c2e8f4b917
+Revises: f9a3d6b1e274
+Create Date: 2026-10-19 12:30:00.000000
+
+Index olts (latitude, longitude) untuk filter bounding box GET /api/maps/olts.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c2e8f4b917'
+down_revision = 'f9a3d6b1e274'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_olts_lat_lon", "olts", ["latitude", "longitude"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_olts_lat_lon", table_name="olts")
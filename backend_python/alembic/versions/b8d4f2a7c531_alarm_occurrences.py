@@ -0,0 +1,34 @@
+"""alarm occurrences
+
+Revision ID: b8d4f2a7c531
+Revises: a6c2e8f4b917
+Create Date: 2026-10-19 13:00:00.000000
+
+Kolom occurrence_count dan last_occurred_at untuk deduplikasi alarm, serta
+index (type, olt_id, onu_id) untuk mencari alarm aktif per key.
+Alarm aktif yang sudah terduplikasi (beberapa baris untuk key yang sama)
+tidak digabung, AlarmManager akan meng-clear semuanya saat recovery.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8d4f2a7c531'
+down_revision = 'a6c2e8f4b917'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("alarms") as batch:
+        batch.add_column(sa.Column("occurrence_count", sa.Integer(), nullable=False, server_default="1"))
+        batch.add_column(sa.Column("last_occurred_at", sa.DateTime(), nullable=True))
+    op.create_index("ix_alarms_type_olt_onu", "alarms", ["type", "olt_id", "onu_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_alarms_type_olt_onu", table_name="alarms")
+    with op.batch_alter_table("alarms") as batch:
+        batch.drop_column("last_occurred_at")
+        batch.drop_column("occurrence_count")
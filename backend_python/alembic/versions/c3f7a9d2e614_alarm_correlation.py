@@ -0,0 +1,44 @@
+"""alarm correlation
+
+Revision ID: c3f7a9d2e614
+Revises: b8d4f2a7c531
+Create Date: 2026-10-19 14:00:00.000000
+
+Kolom pon_port (alarm level PON) dan parent_id (alarm yang ditekan oleh alarm
+korelasi pon_los / olt_unreachable), serta status alarm baru SUPPRESSED.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f7a9d2e614'
+down_revision = 'b8d4f2a7c531'
+branch_labels = None
+depends_on = None
+
+OLD_STATUS = sa.Enum("ACTIVE", "CLEARED", "ACKNOWLEDGED", name="alarmstatus")
+NEW_STATUS = sa.Enum("ACTIVE", "CLEARED", "ACKNOWLEDGED", "SUPPRESSED", name="alarmstatus")
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("ALTER TYPE alarmstatus ADD VALUE IF NOT EXISTS 'SUPPRESSED'")
+    with op.batch_alter_table("alarms") as batch:
+        batch.add_column(sa.Column("pon_port", sa.Integer(), nullable=True))
+        batch.add_column(sa.Column("parent_id", sa.Integer(), nullable=True))
+        batch.create_foreign_key("fk_alarms_parent_id", "alarms", ["parent_id"], ["id"], ondelete="SET NULL")
+        if op.get_bind().dialect.name != "postgresql":
+            batch.alter_column("status", existing_type=OLD_STATUS, type_=NEW_STATUS, existing_nullable=True)
+    op.create_index("ix_alarms_parent_id", "alarms", ["parent_id"])
+
+
+def downgrade() -> None:
+    op.execute("UPDATE alarms SET status = 'CLEARED' WHERE status = 'SUPPRESSED'")
+    op.drop_index("ix_alarms_parent_id", table_name="alarms")
+    with op.batch_alter_table("alarms") as batch:
+        batch.drop_constraint("fk_alarms_parent_id", type_="foreignkey")
+        batch.drop_column("parent_id")
+        batch.drop_column("pon_port")
+        if op.get_bind().dialect.name != "postgresql":
+            batch.alter_column("status", existing_type=NEW_STATUS, type_=OLD_STATUS, existing_nullable=True)
@@ -0,0 +1,76 @@
+"""status counters
+
+Revision ID: c47a1e9d2b85
+Revises: 8b2e4d6f1a93
+Create Date: 2026-10-19 10:30:00.000000
+
+Tabel status_counters: hitungan status ONU dan alarm aktif per (olt_id, pon_port),
+dipelihara inkremental oleh app/services/counter_service.py.
+Diisi awal dari tabel onus dan alarms yang sudah ada.
+"""
+from collections import defaultdict
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47a1e9d2b85'
+down_revision = '8b2e4d6f1a93'
+branch_labels = None
+depends_on = None
+
+OLT_LEVEL_PON = -1
+ONU_COLUMNS = {"ONLINE": "onus_online", "OFFLINE": "onus_offline", "UNKNOWN": "onus_unknown"}
+ALARM_COLUMNS = {
+    "CRITICAL": "alarms_critical",
+    "MAJOR": "alarms_major",
+    "MINOR": "alarms_minor",
+    "WARNING": "alarms_warning",
+    "INFO": "alarms_info",
+}
+COUNTER_COLUMNS = list(ONU_COLUMNS.values()) + list(ALARM_COLUMNS.values())
+
+
+def upgrade() -> None:
+    status_counters = op.create_table(
+        "status_counters",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("olt_id", sa.Integer(), nullable=False),
+        sa.Column("pon_port", sa.Integer(), nullable=False),
+        *(sa.Column(column, sa.Integer(), nullable=False) for column in COUNTER_COLUMNS),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["olt_id"], ["olts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("olt_id", "pon_port", name="uq_status_counters_olt_pon"),
+    )
+    op.create_index("ix_status_counters_id", "status_counters", ["id"])
+
+    bind = op.get_bind()
+    counts = defaultdict(lambda: dict.fromkeys(COUNTER_COLUMNS, 0))
+    onu_rows = bind.execute(sa.text(
+        "SELECT olt_id, pon_port, status, COUNT(*) FROM onus GROUP BY olt_id, pon_port, status"
+    ))
+    for olt_id, pon_port, status, total in onu_rows:
+        counts[(olt_id, pon_port)][ONU_COLUMNS.get(status, "onus_unknown")] += total
+
+    alarm_rows = bind.execute(sa.text(
+        "SELECT a.olt_id, o.pon_port, a.severity, COUNT(*) FROM alarms a "
+        "LEFT JOIN onus o ON o.id = a.onu_id "
+        "WHERE a.status = 'ACTIVE' AND a.olt_id IS NOT NULL "
+        "GROUP BY a.olt_id, o.pon_port, a.severity"
+    ))
+    for olt_id, pon_port, severity, total in alarm_rows:
+        key = (olt_id, OLT_LEVEL_PON if pon_port is None else pon_port)
+        counts[key][ALARM_COLUMNS.get(severity, "alarms_warning")] += total
+
+    if counts:
+        op.bulk_insert(status_counters, [
+            dict(values, olt_id=olt_id, pon_port=pon_port)
+            for (olt_id, pon_port), values in counts.items()
+        ])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_status_counters_id", table_name="status_counters")
+    op.drop_table("status_counters")
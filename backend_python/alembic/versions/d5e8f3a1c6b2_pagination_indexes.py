@@ -0,0 +1,30 @@
+"""pagination indexes
+
+Revision ID: d5e8f3a1c6b2
+Revises: c47a1e9d2b85
+Create Date: 2026-10-19 11:00:00.000000
+
+Index untuk keyset pagination (urutan (sort_key, id), id ikut secara implisit
+sebagai primary key di InnoDB):
+- alarms (occurred_at): GET /api/alarms tanpa filter status, terbaru dulu
+- onus (olt_id, pon_port): GET /api/monitoring/olt/{id}/onus diurutkan per PON
+  memakai prefix unique index uq_onus_olt_pon_onu (migration 8b2e4d6f1a93),
+  jadi tidak perlu index sendiri
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e8f3a1c6b2'
+down_revision = 'c47a1e9d2b85'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_alarms_occurred_at", "alarms", ["occurred_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_alarms_occurred_at", table_name="alarms")
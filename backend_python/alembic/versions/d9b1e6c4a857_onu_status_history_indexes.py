@@ -0,0 +1,28 @@
+"""onu status history indexes
+
+Revision ID: d9b1e6c4a857
+Revises: c3f7a9d2e614
+Create Date: 2026-10-19 15:00:00.000000
+
+Index created_at dan (onu_id, created_at) pada onu_status_history, dipakai
+flap detector saat memuat ulang transisi dalam window waktu terakhir.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9b1e6c4a857'
+down_revision = 'c3f7a9d2e614'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_onu_status_history_created_at", "onu_status_history", ["created_at"])
+    op.create_index("ix_onu_status_history_onu_created_at", "onu_status_history", ["onu_id", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_onu_status_history_onu_created_at", table_name="onu_status_history")
+    op.drop_index("ix_onu_status_history_created_at", table_name="onu_status_history")
@@ -0,0 +1,26 @@
+"""activity logs created_at index
+
+Revision ID: e2b7c9d4f813
+Revises: d5e8f3a1c6b2
+Create Date: 2026-10-19 11:30:00.000000
+
+Index activity_logs (created_at) untuk cursor paging (created_at, id) terbaru
+dulu dan filter rentang tanggal, tanpa full scan.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b7c9d4f813'
+down_revision = 'd5e8f3a1c6b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_activity_logs_created_at", "activity_logs", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_activity_logs_created_at", table_name="activity_logs")
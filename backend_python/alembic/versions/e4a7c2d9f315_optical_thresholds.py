@@ -0,0 +1,47 @@
+"""optical thresholds
+
+Revision ID: e4a7c2d9f315
+Revises: d9b1e6c4a857
+Create Date: 2026-10-19 16:00:00.000000
+
+Tabel optical_thresholds: ambang RX/TX power (minor / major, low / high) dan
+hysteresis, global, per OLT atau per model ONU, dipakai optical engine.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a7c2d9f315'
+down_revision = 'd9b1e6c4a857'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "optical_thresholds",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("olt_id", sa.Integer(), nullable=True),
+        sa.Column("onu_model", sa.String(length=255), nullable=True),
+        sa.Column("metric", sa.Enum("RX_POWER", "TX_POWER", name="opticalmetric"), nullable=False),
+        sa.Column("major_low", sa.Float(), nullable=True),
+        sa.Column("minor_low", sa.Float(), nullable=True),
+        sa.Column("minor_high", sa.Float(), nullable=True),
+        sa.Column("major_high", sa.Float(), nullable=True),
+        sa.Column("hysteresis", sa.Float(), server_default="1", nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["olt_id"], ["olts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_optical_thresholds_id", "optical_thresholds", ["id"])
+    op.create_index("ix_optical_thresholds_scope", "optical_thresholds", ["metric", "olt_id", "onu_model"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_optical_thresholds_scope", table_name="optical_thresholds")
+    op.drop_index("ix_optical_thresholds_id", table_name="optical_thresholds")
+    op.drop_table("optical_thresholds")
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP TYPE IF EXISTS opticalmetric")
@@ -0,0 +1,44 @@
+"""activity log daily rollup
+
+Revision ID: f9a3d6b1e274
+Revises: e2b7c9d4f813
+Create Date: 2026-10-19 12:00:00.000000
+
+Tabel activity_log_daily: jumlah activity log per (hari, activity_type, user_id),
+diisi oleh app/services/activity_rollup_service.py untuk statistik 90/365 hari.
+Tabel dibuat kosong, rollup pertama dijalankan oleh background poller.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f9a3d6b1e274'
+down_revision = 'e2b7c9d4f813'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "activity_log_daily",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column(
+            "activity_type",
+            sa.Enum("CREATE", "UPDATE", "DELETE", "PROVISION", "REBOOT", "RESET", "LOGIN", "LOGOUT", "OTHER", name="activitytype"),
+            nullable=False,
+        ),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_activity_log_daily_id", "activity_log_daily", ["id"])
+    op.create_index("ix_activity_log_daily_day", "activity_log_daily", ["day"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_activity_log_daily_day", table_name="activity_log_daily")
+    op.drop_index("ix_activity_log_daily_id", table_name="activity_log_daily")
+    op.drop_table("activity_log_daily")
@@ -25,36 +25,103 @@ Konfigurasi:
 - ALGORITHM: Algoritma signing (HS256)
 - ACCESS_TOKEN_EXPIRE_MINUTES: Masa berlaku token (default 24 jam)
 
+Hashing password:
+- bcrypt dijalankan di thread pool terpisah dengan jumlah worker terbatas,
+  tidak pernah di event loop dan tidak menghabiskan threadpool route sync
+- BCRYPT_ROUNDS: Cost factor bcrypt untuk hash baru (default 12)
+- PASSWORD_HASH_WORKERS: Jumlah thread hashing (default min(4, jumlah CPU))
+- Hash lama dengan cost berbeda tetap valid dan di-hash ulang saat login berhasil
+
+Principal cache:
+- Hasil validasi token (user) di-cache per hash SHA-256 token, sehingga request
+  berikutnya dengan token yang sama tidak menjalankan jwt.decode maupun query user
+- Entry dihapus saat logout, saat user dinonaktifkan / diubah role, email atau
+  password / dihapus (event listener SQLAlchemy, setelah commit), dan tidak
+  pernah melewati exp token
+- AUTH_CACHE_TTL: Masa berlaku entry dalam detik (default 60, 0 = nonaktif)
+- AUTH_CACHE_MAXSIZE: Jumlah token maksimum di cache (default 10000)
+- Cache bersifat per-process, invalidasi berlaku untuk semua worker: perubahan
+  user menulis marker per email di shared state (Redis jika REDIS_URL diisi),
+  dan setiap cache hit dicocokkan dengan marker yang dibaca saat entry dibuat
+- Jika shared state tidak bisa dibaca, token divalidasi ulang (tanpa cache)
+- Logout hanya menghapus entry cache worker tsb; token JWT sendiri tetap valid
+  sampai exp (tidak ada daftar token yang dicabut)
+
 Dependencies:
 - get_current_user: Dependency untuk mendapatkan user dari token
 - get_current_active_user: Dependency untuk memastikan user aktif
 - require_role: Dependency untuk memeriksa role user
 """
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Iterable, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.cache import TTLCache
+from app.database import get_async_db
 from app.models import User, UserRole
+from app.shared_state import shared_state
+
+logger = logging.getLogger(__name__)
 
 # Configuration
 SECRET_KEY = "your-secret-key-change-in-production-use-env-variable"  # Change this in production!
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+AUTH_CACHE_MAXSIZE = int(os.getenv("AUTH_CACHE_MAXSIZE", "10000"))
+
+# Atribut user yang mempengaruhi hasil autentikasi / autorisasi
+PRINCIPAL_ATTRS = ("is_active", "role", "email", "password")
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# Thread pool khusus bcrypt, membatasi jumlah hashing yang berjalan bersamaan
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+# token hash -> (user snapshot, exp token dalam epoch detik, marker invalidasi saat dibaca)
+principal_cache = TTLCache(ttl=AUTH_CACHE_TTL, maxsize=AUTH_CACHE_MAXSIZE)
+# Naik setiap invalidate_user; user yang dibaca sebelum invalidasi tidak di-cache
+principal_generation = 0
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    """Verify a password against its hash (blocks the calling thread until done)"""
+    return password_executor.submit(pwd_context.verify, plain_password, hashed_password).result()
 
 def get_password_hash(password: str) -> str:
-    """Hash a password"""
-    return pwd_context.hash(password)
+    """Hash a password (blocks the calling thread until done), for sync routes"""
+    return password_executor.submit(pwd_context.hash, password).result()
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password without blocking the event loop
+
+    Returns (valid, new_hash). new_hash diisi jika hash perlu dibuat ulang
+    (mis. BCRYPT_ROUNDS berubah), None jika tidak.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, pwd_context.hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
@@ -67,22 +134,96 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
     """Authenticate a user by email and password"""
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email))
     if not user:
         return None
     if not user.is_active:
         return None
-    if not verify_password(password, user.password):
+    valid, new_hash = await verify_password_async(password, user.password)
+    if not valid:
         return None
+    if new_hash:
+        # Disimpan bersama update last_login oleh route login
+        user.password = new_hash
     return user
 
+def token_key(token: str) -> str:
+    """Cache key for a token, the raw token is never kept in memory"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def snapshot_user(user: User) -> User:
+    """Detached copy of user's columns, safe to share between requests and sessions"""
+    return User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+
+def invalidate_token(token: str):
+    principal_cache.invalidate(token_key(token))
+
+def _marker_key(email: str) -> str:
+    return f"auth:principal:{email}"
+
+def read_principal_marker(email: str) -> Tuple[bool, Optional[str]]:
+    """(readable, marker) of the last invalidation of email shared by all workers"""
+    try:
+        return True, shared_state.get(_marker_key(email))
+    except Exception as e:
+        logger.warning(f"Principal marker unavailable: {e}")
+        return False, None
+
+def invalidate_user(user_id: int, emails: Iterable[str] = ()) -> int:
+    """Drop every cached token of a user, in this worker and (via the email markers) in the others"""
+    global principal_generation
+    principal_generation += 1
+    if AUTH_CACHE_TTL > 0:
+        for email in emails:
+            try:
+                # Marker baru cukup hidup selama entry cache yang dibuat sebelumnya
+                shared_state.set(_marker_key(email), uuid.uuid4().hex, AUTH_CACHE_TTL)
+            except Exception as e:
+                logger.warning(f"Principal marker not written for user {user_id}: {e}")
+    return principal_cache.invalidate_where(lambda entry: entry[0].id == user_id)
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, flush_context):
+    # user id -> email lama dan baru (token berisi email sebagai subject)
+    changed = session.info.setdefault("principal_users", {})
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            changed.setdefault(obj.id, set()).add(obj.email)
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            state = inspect(obj)
+            if any(state.attrs[attr].history.has_changes() for attr in PRINCIPAL_ATTRS):
+                emails = changed.setdefault(obj.id, set())
+                emails.add(obj.email)
+                emails.update(state.attrs.email.history.deleted or ())
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session):
+    # Setelah commit: request lain tidak bisa lagi membaca (dan meng-cache) nilai lama
+    for user_id, emails in session.info.pop("principal_users", {}).items():
+        invalidate_user(user_id, emails)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session: Session):
+    session.info.pop("principal_users", None)
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Get the current authenticated user from JWT token"""
+    key = token_key(token)
+    cached = principal_cache.get(key)
+    if cached is not None:
+        user, expires_at, marker = cached
+        # User diubah lewat worker lain sejak entry dibuat: marker berbeda
+        if expires_at > time.time() and read_principal_marker(user.email) == (True, marker):
+            return user
+        principal_cache.invalidate(key)
+    generation = principal_generation
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -93,10 +234,13 @@ async def get_current_user(
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
+        expires_at = float(payload.get("exp") or 0)
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == email).first()
+    # Dibaca sebelum query: invalidasi setelah titik ini mengganti marker
+    readable, marker = read_principal_marker(email) if AUTH_CACHE_TTL > 0 else (False, None)
+    user = await db.scalar(select(User).where(User.email == email))
     if user is None:
         raise credentials_exception
     if not user.is_active:
@@ -104,6 +248,12 @@ async def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is disabled"
         )
+
+    user = snapshot_user(user)
+    # Jika user diubah selama query (commit + invalidasi di request lain), hasil
+    # query ini mungkin nilai lama dan tidak boleh di-cache
+    if readable and expires_at and generation == principal_generation:
+        principal_cache.set(key, (user, expires_at, marker))
     return user
 
 async def get_current_active_user(
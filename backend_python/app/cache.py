@@ -0,0 +1,74 @@
+"""
+File: cache.py
+
+Cache in-process sederhana dengan TTL untuk data yang sering dibaca
+namun mahal dihitung (misalnya statistik dashboard)
+
+Fungsi utama:
+- TTLCache: cache key-value dengan masa berlaku dan batas jumlah entry (LRU)
+- dashboard_cache: cache statistik dashboard, di-invalidate oleh poller
+  dan route yang mengubah status ONU/OLT atau alarm. Disimpan di shared state
+  (app/shared_state.py), sehingga dipakai bersama semua worker jika REDIS_URL diisi
+
+Environment variables:
+- DASHBOARD_CACHE_TTL: Masa berlaku cache statistik dashboard dalam detik (default 10)
+
+Catatan:
+- TTLCache bersifat per-process, setiap worker memiliki cache sendiri
+- Thread-safe, karena route sync dijalankan di threadpool
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from app.shared_state import SharedCache
+
+class TTLCache:
+    """Thread-safe bounded cache whose entries expire after ttl seconds"""
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one key, or every key when key is None"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Any], bool]) -> int:
+        """Drop every entry whose value matches predicate, returns the number dropped"""
+        with self._lock:
+            keys = [key for key, (_, value) in self._data.items() if predicate(value)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+# Cache statistik dashboard (GET /api/dashboard/stats)
+dashboard_cache = SharedCache("dashboard", ttl=float(os.getenv("DASHBOARD_CACHE_TTL", "10")))
@@ -0,0 +1,60 @@
+"""
+File: geo.py
+
+Helper geografis untuk endpoint maps
+
+Fungsi utama:
+- BoundingBox: area tampilan peta (viewport) dalam latitude/longitude
+- bbox_params: dependency FastAPI untuk parameter min_lat/max_lat/min_lon/max_lon
+
+Catatan:
+- Keempat parameter harus diisi bersamaan, atau tidak sama sekali (tanpa filter)
+- min_lon > max_lon berarti viewport melewati garis antimeridian (180°)
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException, Query
+from sqlalchemy import and_, or_
+
+@dataclass(frozen=True)
+class BoundingBox:
+    min_lat: float
+    max_lat: float
+    min_lon: float
+    max_lon: float
+
+    @property
+    def crosses_antimeridian(self) -> bool:
+        return self.min_lon > self.max_lon
+
+    def contains(self, lat: float, lon: float) -> bool:
+        if not self.min_lat <= lat <= self.max_lat:
+            return False
+        if self.crosses_antimeridian:
+            return lon >= self.min_lon or lon <= self.max_lon
+        return self.min_lon <= lon <= self.max_lon
+
+    def sql_filter(self, lat_column, lon_column):
+        """WHERE condition selecting rows inside the box"""
+        if self.crosses_antimeridian:
+            lon_condition = or_(lon_column >= self.min_lon, lon_column <= self.max_lon)
+        else:
+            lon_condition = lon_column.between(self.min_lon, self.max_lon)
+        return and_(lat_column.between(self.min_lat, self.max_lat), lon_condition)
+
+def bbox_params(
+    min_lat: Optional[float] = Query(None, ge=-90, le=90),
+    max_lat: Optional[float] = Query(None, ge=-90, le=90),
+    min_lon: Optional[float] = Query(None, ge=-180, le=180),
+    max_lon: Optional[float] = Query(None, ge=-180, le=180),
+) -> Optional[BoundingBox]:
+    """FastAPI dependency for an optional map viewport"""
+    values = (min_lat, max_lat, min_lon, max_lon)
+    if all(value is None for value in values):
+        return None
+    if any(value is None for value in values):
+        raise HTTPException(status_code=400, detail="min_lat, max_lat, min_lon and max_lon must be given together")
+    if min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="min_lat must not be greater than max_lat")
+    return BoundingBox(min_lat, max_lat, min_lon, max_lon)
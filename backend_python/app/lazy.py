@@ -0,0 +1,44 @@
+"""
+File: lazy.py
+
+Import modul berat secara lazy (saat atribut pertama kali dipakai)
+
+Fungsi utama:
+- lazy_import: mengembalikan proxy modul; modul asli baru di-import saat
+  atribut pertama diakses, lalu di-cache
+
+Catatan:
+- Dipakai untuk library protokol yang berat (pysnmp beserta MIB, paramiko,
+  requests, cryptography) sehingga startup API dan /api/health tidak
+  menunggu library yang baru dibutuhkan saat OLT benar-benar diakses
+- Error import (mis. library tidak terinstall) muncul saat pemakaian pertama,
+  bukan saat startup
+"""
+import importlib
+import threading
+from types import ModuleType
+
+class LazyModule:
+    """Proxy for a module that is imported on first attribute access"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
@@ -12,9 +12,12 @@ Struktur database:
 - pppoe_accounts: Data akun PPPoE hasil provisioning
 - alarms: Data alarm dan event jaringan
 - activity_logs: Log aktivitas operator untuk audit
+- activity_log_daily: Rollup harian jumlah activity log per tipe dan user
 - locations: Data lokasi geografis untuk maps
 - olt_performance_logs: Log performa OLT (CPU, memory, temperature)
 - onu_status_history: Histori perubahan status ONU
+- status_counters: Hitungan status ONU dan alarm aktif per OLT/PON (dipelihara inkremental)
+- optical_thresholds: Ambang RX/TX power (global, per OLT, per model ONU)
 
 Relasi antar tabel:
 - OLT -> ONU (one-to-many)
@@ -32,7 +35,7 @@ Catatan:
 - Soft delete tidak digunakan, data dihapus langsung dari database
 """
 
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Text, BigInteger, DateTime, DECIMAL, Float, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Text, BigInteger, Date, DateTime, DECIMAL, Float, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -63,6 +66,7 @@ class AlarmStatus(str, enum.Enum):
     ACTIVE = "active"
     CLEARED = "cleared"
     ACKNOWLEDGED = "acknowledged"
+    SUPPRESSED = "suppressed"
 
 class PppoeStatus(str, enum.Enum):
     ACTIVE = "active"
@@ -73,6 +77,10 @@ class UserRole(str, enum.Enum):
     ADMIN = "admin"
     OPERATOR = "operator"
 
+class OpticalMetric(str, enum.Enum):
+    RX_POWER = "rx_power"
+    TX_POWER = "tx_power"
+
 class ActivityType(str, enum.Enum):
     CREATE = "create"
     UPDATE = "update"
@@ -124,6 +132,10 @@ class Olt(Base):
     pons = relationship("Pon", back_populates="olt", cascade="all, delete-orphan")
     performance_logs = relationship("OltPerformanceLog", back_populates="olt", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_olts_lat_lon", "latitude", "longitude"),
+    )
+
 class Pon(Base):
     __tablename__ = "pons"
 
@@ -181,6 +193,9 @@ class Onu(Base):
     status_history = relationship("OnuStatusHistory", back_populates="onu", cascade="all, delete-orphan")
 
     __table_args__ = (
+        Index("uq_onus_olt_pon_onu", "olt_id", "pon_port", "onu_id", unique=True),
+        Index("ix_onus_olt_status", "olt_id", "status"),
+        Index("ix_onus_status", "status"),
         {"mysql_engine": "InnoDB"},
     )
 
@@ -190,12 +205,19 @@ class Alarm(Base):
     id = Column(Integer, primary_key=True, index=True)
     olt_id = Column(Integer, ForeignKey("olts.id", ondelete="CASCADE"), nullable=True)
     onu_id = Column(Integer, ForeignKey("onus.id", ondelete="CASCADE"), nullable=True)
+    # Hanya untuk alarm level PON (mis. pon_los), alarm ONU memakai PON milik ONU-nya
+    pon_port = Column(Integer, nullable=True)
+    # Alarm korelasi (pon_los / olt_unreachable) yang menekan alarm ini
+    parent_id = Column(Integer, ForeignKey("alarms.id", ondelete="SET NULL"), nullable=True)
     severity = Column(Enum(AlarmSeverity), default=AlarmSeverity.WARNING)
     type = Column(String(255), nullable=False)
     message = Column(String(500), nullable=False)
     details = Column(Text, nullable=True)
     status = Column(Enum(AlarmStatus), default=AlarmStatus.ACTIVE)
     occurred_at = Column(DateTime, nullable=False)
+    # Deduplikasi: kejadian ulang alarm yang masih aktif menaikkan counter, bukan baris baru
+    occurrence_count = Column(Integer, nullable=False, default=1, server_default="1")
+    last_occurred_at = Column(DateTime, nullable=True)
     cleared_at = Column(DateTime, nullable=True)
     acknowledged_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     acknowledged_at = Column(DateTime, nullable=True)
@@ -206,6 +228,16 @@ class Alarm(Base):
     olt = relationship("Olt", back_populates="alarms")
     onu = relationship("Onu", back_populates="alarms")
     acknowledged_by_user = relationship("User", back_populates="acknowledged_alarms", foreign_keys=[acknowledged_by])
+    parent = relationship("Alarm", remote_side=[id], foreign_keys=[parent_id])
+
+    __table_args__ = (
+        Index("ix_alarms_status_severity", "status", "severity"),
+        Index("ix_alarms_status_occurred_at", "status", "occurred_at"),
+        Index("ix_alarms_olt_status", "olt_id", "status"),
+        Index("ix_alarms_occurred_at", "occurred_at"),
+        Index("ix_alarms_type_olt_onu", "type", "olt_id", "onu_id"),
+        Index("ix_alarms_parent_id", "parent_id"),
+    )
 
 class PppoeAccount(Base):
     __tablename__ = "pppoe_accounts"
@@ -278,6 +310,24 @@ class ActivityLog(Base):
     # Relationships
     user = relationship("User", back_populates="activity_logs")
 
+    __table_args__ = (
+        Index("ix_activity_logs_user_created", "user_id", "created_at"),
+        Index("ix_activity_logs_created_at", "created_at"),
+    )
+
+class ActivityLogDaily(Base):
+    __tablename__ = "activity_log_daily"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    activity_type = Column(Enum(ActivityType), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    count = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_activity_log_daily_day", "day"),
+    )
+
 class OnuStatusHistory(Base):
     __tablename__ = "onu_status_history"
 
@@ -291,6 +341,11 @@ class OnuStatusHistory(Base):
     # Relationships
     onu = relationship("Onu", back_populates="status_history")
 
+    __table_args__ = (
+        Index("ix_onu_status_history_created_at", "created_at"),
+        Index("ix_onu_status_history_onu_created_at", "onu_id", "created_at"),
+    )
+
 class OltPerformanceLog(Base):
     __tablename__ = "olt_performance_logs"
 
@@ -305,3 +360,44 @@ class OltPerformanceLog(Base):
     # Relationships
     olt = relationship("Olt", back_populates="performance_logs")
 
+class StatusCounter(Base):
+    __tablename__ = "status_counters"
+
+    id = Column(Integer, primary_key=True, index=True)
+    olt_id = Column(Integer, ForeignKey("olts.id", ondelete="CASCADE"), nullable=False)
+    pon_port = Column(Integer, nullable=False)  # -1 untuk alarm level OLT (tanpa ONU)
+    onus_online = Column(Integer, nullable=False, default=0)
+    onus_offline = Column(Integer, nullable=False, default=0)
+    onus_unknown = Column(Integer, nullable=False, default=0)
+    alarms_critical = Column(Integer, nullable=False, default=0)
+    alarms_major = Column(Integer, nullable=False, default=0)
+    alarms_minor = Column(Integer, nullable=False, default=0)
+    alarms_warning = Column(Integer, nullable=False, default=0)
+    alarms_info = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("olt_id", "pon_port", name="uq_status_counters_olt_pon"),
+    )
+
+class OpticalThreshold(Base):
+    __tablename__ = "optical_thresholds"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # olt_id / onu_model kosong berarti berlaku untuk semua OLT / semua model
+    olt_id = Column(Integer, ForeignKey("olts.id", ondelete="CASCADE"), nullable=True)
+    onu_model = Column(String(255), nullable=True)
+    metric = Column(Enum(OpticalMetric), nullable=False)
+    # dBm; batas yang kosong tidak dievaluasi
+    major_low = Column(Float, nullable=True)
+    minor_low = Column(Float, nullable=True)
+    minor_high = Column(Float, nullable=True)
+    major_high = Column(Float, nullable=True)
+    # Alarm baru turun / di-clear setelah nilai kembali melewati batas sejauh hysteresis dB
+    hysteresis = Column(Float, nullable=False, default=1.0, server_default="1")
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_optical_thresholds_scope", "metric", "olt_id", "onu_model"),
+    )
@@ -0,0 +1,147 @@
+"""
+File: pagination.py
+
+Keyset (cursor) pagination untuk endpoint list
+
+Fungsi utama:
+- PageParams: parameter query cursor dan limit (dengan batas maksimum)
+- keyset_page: menerapkan ORDER BY (sort_key, id) + WHERE setelah cursor + LIMIT
+- set_next_cursor: memotong hasil ke limit dan mengisi header X-Next-Cursor
+- estimate_total / capped_count: perkiraan jumlah baris tanpa full scan
+
+Alur kerja:
+1. Client meminta halaman pertama tanpa cursor
+2. Jika masih ada data, response berisi header X-Next-Cursor
+3. Client mengirim nilai tersebut sebagai ?cursor= untuk halaman berikutnya
+4. Header X-Next-Cursor tidak ada pada halaman terakhir
+
+Environment variables:
+- PAGE_SIZE_DEFAULT: Jumlah item per halaman jika limit tidak diisi (default 100)
+- PAGE_SIZE_MAX: Batas maksimum limit (default 1000)
+- COUNT_CAP: Batas baris yang dihitung oleh capped_count (default 10000)
+
+Catatan:
+- Cursor bersifat opaque (base64 dari nilai (sort_key, id) baris terakhir),
+  client tidak boleh membuat atau mengubahnya sendiri
+- Tidak ada OFFSET, sehingga latency tiap halaman tetap konstan berapapun
+  dalamnya halaman, selama ada index yang sesuai dengan urutan (sort_key, id)
+- Body response tetap berupa list agar kompatibel dengan client lama
+"""
+import base64
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import and_, func, literal_column, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = int(os.getenv("PAGE_SIZE_DEFAULT", "100"))
+MAX_PAGE_SIZE = int(os.getenv("PAGE_SIZE_MAX", "1000"))
+COUNT_CAP = int(os.getenv("COUNT_CAP", "10000"))
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+@dataclass
+class PageParams:
+    cursor: Optional[str]
+    limit: int
+
+def page_params(
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+) -> PageParams:
+    """FastAPI dependency for cursor pagination query parameters"""
+    return PageParams(cursor=cursor, limit=limit)
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    """Decode a cursor into values typed like columns, 400 if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor length mismatch")
+        return [
+            datetime.fromisoformat(value) if value is not None and column.type.python_type is datetime else value
+            for value, column in zip(values, columns)
+        ]
+    except (ValueError, TypeError, NotImplementedError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_page(query, page: PageParams, id_column, sort_column=None, descending: bool = False):
+    """
+    Apply keyset ordering, cursor filter and limit to a Query or select()
+
+    Urutan selalu (sort_column, id_column) supaya deterministik walaupun
+    sort_column punya nilai duplikat. sort_column harus NOT NULL.
+    Mengambil limit + 1 baris untuk mengetahui apakah masih ada halaman berikutnya.
+    """
+    columns = [id_column] if sort_column is None else [sort_column, id_column]
+
+    if page.cursor:
+        values = decode_cursor(page.cursor, columns)
+        after = (lambda column, value: column < value) if descending else (lambda column, value: column > value)
+        if sort_column is None:
+            condition = after(id_column, values[0])
+        else:
+            # Ditulis sebagai OR/AND (bukan row comparison) agar index (sort, id) dipakai di MySQL
+            condition = or_(
+                after(sort_column, values[0]),
+                and_(sort_column == values[0], after(id_column, values[1])),
+            )
+        query = query.filter(condition)
+
+    order = [column.desc() if descending else column.asc() for column in columns]
+    return query.order_by(*order).limit(page.limit + 1)
+
+def set_next_cursor(rows: Sequence[Any], page: PageParams, response: Response, id_attr: str = "id", sort_attr: Optional[str] = None) -> List[Any]:
+    """Trim the extra row fetched by keyset_page and expose the next cursor header"""
+    rows = list(rows)
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = rows[-1]
+        values = [getattr(last, id_attr)] if sort_attr is None else [getattr(last, sort_attr), getattr(last, id_attr)]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(values)
+    return rows
+
+async def estimate_total(db: AsyncSession, table, id_column) -> int:
+    """
+    Approximate row count of a whole table without scanning it
+
+    MySQL: statistik InnoDB (information_schema.TABLES.TABLE_ROWS).
+    Database lain: MAX(id) - MIN(id) + 1 dari primary key.
+    """
+    if db.bind.dialect.name == "mysql":
+        rows = await db.scalar(
+            text(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"
+            ),
+            {"table": table.name},
+        )
+        if rows is not None:
+            return int(rows)
+    low, high = (await db.execute(select(func.min(id_column), func.max(id_column)))).one()
+    return 0 if low is None else high - low + 1
+
+async def capped_count(db: AsyncSession, query, cap: int = COUNT_CAP):
+    """
+    Count rows of query, stopping after cap rows
+
+    Returns (count, exact). Jika hasil mencapai cap, count = cap dan exact = False.
+    """
+    limited = (
+        query.order_by(None)
+        .with_only_columns(literal_column("1"), maintain_column_froms=True)
+        .limit(cap + 1)
+        .subquery()
+    )
+    count = await db.scalar(select(func.count()).select_from(limited))
+    return min(count, cap), count <= cap
@@ -0,0 +1,94 @@
+"""
+File: projection.py
+
+Sparse fieldset (parameter fields=) untuk endpoint baca ONU dan OLT
+
+Fungsi utama:
+- fields_param: dependency FastAPI yang mengubah ?fields=a,b,c menjadi FieldSet
+- FieldSet: daftar kolom SQL untuk SELECT dan response model yang dipangkas
+- projected_response: serialisasi hasil query kolom dengan model yang dipangkas
+
+Alur kerja:
+1. Client mengirim ?fields=serial_number,status,rx_power
+2. Nama field divalidasi terhadap kolom response schema (400 jika tidak dikenal)
+3. Route menjalankan db.query(*fieldset.columns), bukan db.query(Model),
+   sehingga tidak ada SELECT * dan tidak ada hidrasi objek ORM
+4. Hasil divalidasi dan diserialisasi dengan model Pydantic berisi field
+   yang diminta saja
+
+Catatan:
+- Field id selalu disertakan (dibutuhkan untuk cursor pagination)
+- Model yang dipangkas dibuat dengan create_model dan di-cache per kombinasi
+  field, urutan field mengikuti schema asli
+- Tanpa parameter fields, endpoint berperilaku seperti sebelumnya
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Query, Response
+from pydantic import BaseModel, TypeAdapter, create_model
+
+from app.streaming import schema_columns
+
+ALWAYS_INCLUDED = ("id",)
+
+@dataclass(frozen=True)
+class FieldSet:
+    names: Tuple[str, ...]
+    columns: Tuple[Any, ...]
+    model: Type[BaseModel]
+    list_adapter: TypeAdapter
+
+@lru_cache(maxsize=256)
+def field_set(model, schema: Type[BaseModel], names: Tuple[str, ...]) -> FieldSet:
+    """Column list and trimmed response model for names (cached per combination)"""
+    table_columns = model.__table__.c
+    trimmed = create_model(
+        f"{schema.__name__}Fields",
+        __config__={"from_attributes": True},
+        **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in names},
+    )
+    return FieldSet(
+        names=names,
+        columns=tuple(table_columns[name] for name in names),
+        model=trimmed,
+        list_adapter=TypeAdapter(List[trimmed]),
+    )
+
+def fields_param(model, schema: Type[BaseModel]):
+    """Build a dependency parsing ?fields= into a FieldSet (None when absent)"""
+    allowed = [column.key for column in schema_columns(model, schema)]
+
+    def dependency(
+        fields: Optional[str] = Query(None, description=f"Comma separated subset of: {', '.join(allowed)}"),
+    ) -> Optional[FieldSet]:
+        if not fields:
+            return None
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested.difference(allowed)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        names = tuple(name for name in allowed if name in requested or name in ALWAYS_INCLUDED)
+        return field_set(model, schema, names)
+
+    return dependency
+
+def projected_response(rows: Iterable[Any], fieldset: FieldSet, response: Optional[Response] = None) -> Response:
+    """
+    Serialize column rows with the trimmed model
+
+    Header yang sudah diset route pada response (mis. X-Next-Cursor) ikut disalin,
+    karena FastAPI tidak menggabungkannya jika route mengembalikan Response sendiri.
+    """
+    adapter = fieldset.list_adapter
+    body = adapter.dump_json(adapter.validate_python(list(rows), from_attributes=True))
+    headers = {}
+    if response is not None:
+        headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def projected_item(row: Any, fieldset: FieldSet) -> Response:
+    """Serialize a single column row with the trimmed model"""
+    item = fieldset.model.model_validate(row, from_attributes=True)
+    return Response(content=item.model_dump_json(), media_type="application/json")
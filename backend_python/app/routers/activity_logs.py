@@ -2,12 +2,18 @@
 Activity Log routes
 Handles activity logging and audit trails
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from app.database import get_db
-from app.models import ActivityLog, User, ActivityType
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from app.database import get_async_db
+from app.models import ActivityLog, ActivityLogDaily, User, ActivityType
+from app.services.activity_rollup_service import day_start
 from app.auth import get_current_active_user, RequireAdmin
+from app.pagination import (
+    NEXT_CURSOR_HEADER, PageParams, page_params, keyset_page, set_next_cursor,
+    estimate_total, capped_count
+)
+from collections import Counter
 from typing import List, Optional
 from datetime import datetime, timedelta
 
@@ -15,97 +21,145 @@ router = APIRouter(prefix="/api/activity-logs", tags=["Activity Logs"])
 
 @router.get("")
 async def get_activity_logs(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
+    response: Response,
+    skip: int = Query(0, ge=0, deprecated=True, description="Offset paging, use cursor instead"),
+    page: PageParams = Depends(page_params),
+    include_total: bool = Query(False, description="Count the exact total (slow on large tables)"),
     activity_type: Optional[ActivityType] = None,
     entity_type: Optional[str] = None,
     user_id: Optional[int] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get activity logs with filters"""
-    query = db.query(ActivityLog)
+    """
+    Get activity logs with filters, most recent first
+
+    Paging memakai cursor (created_at, id): kirim next_cursor sebagai ?cursor=
+    untuk halaman berikutnya. total berupa perkiraan kecuali include_total=true
+    (total_is_estimate menandai apakah total perkiraan).
+    """
+    query = select(ActivityLog)
+    filtered = False
     
     # Apply filters
     if activity_type:
-        query = query.filter(ActivityLog.activity_type == activity_type)
+        query = query.where(ActivityLog.activity_type == activity_type)
+        filtered = True
     if entity_type:
-        query = query.filter(ActivityLog.entity_type == entity_type)
+        query = query.where(ActivityLog.entity_type == entity_type)
+        filtered = True
     if user_id:
         # Only admins can filter by other users
         if current_user.role.value != "admin":
-            query = query.filter(ActivityLog.user_id == current_user.id)
+            query = query.where(ActivityLog.user_id == current_user.id)
         else:
-            query = query.filter(ActivityLog.user_id == user_id)
+            query = query.where(ActivityLog.user_id == user_id)
+        filtered = True
     else:
         # Non-admins only see their own logs
         if current_user.role.value != "admin":
-            query = query.filter(ActivityLog.user_id == current_user.id)
+            query = query.where(ActivityLog.user_id == current_user.id)
+            filtered = True
     
     if start_date:
-        query = query.filter(ActivityLog.created_at >= start_date)
+        query = query.where(ActivityLog.created_at >= start_date)
+        filtered = True
     if end_date:
-        query = query.filter(ActivityLog.created_at <= end_date)
+        query = query.where(ActivityLog.created_at <= end_date)
+        filtered = True
     
-    # Order by most recent first
-    query = query.order_by(desc(ActivityLog.created_at))
+    # Total: exact hanya jika diminta, selain itu statistik tabel (tanpa filter)
+    # atau COUNT yang dibatasi COUNT_CAP baris (dengan filter)
+    if include_total:
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+        total_is_estimate = False
+    elif filtered:
+        total, exact = await capped_count(db, query)
+        total_is_estimate = not exact
+    else:
+        total = await estimate_total(db, ActivityLog.__table__, ActivityLog.id)
+        total_is_estimate = True
     
-    # Pagination
-    total = query.count()
-    logs = query.offset(skip).limit(limit).all()
+    # Most recent first, keyset pada (created_at, id)
+    query = keyset_page(query, page, ActivityLog.id, sort_column=ActivityLog.created_at, descending=True)
+    if skip and not page.cursor:
+        query = query.offset(skip)
+    logs = set_next_cursor((await db.scalars(query)).all(), page, response, sort_attr="created_at")
     
     return {
         "total": total,
+        "total_is_estimate": total_is_estimate,
         "skip": skip,
-        "limit": limit,
+        "limit": page.limit,
+        "next_cursor": response.headers.get(NEXT_CURSOR_HEADER),
         "logs": logs
     }
 
 @router.get("/stats")
 async def get_activity_stats(
     days: int = Query(7, ge=1, le=365),
-    db: Session = Depends(get_db),
+    use_rollups: bool = Query(True, description="Read complete days from the daily rollup table"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(RequireAdmin)
 ):
     """Get activity statistics (admin only)"""
-    start_date = datetime.utcnow() - timedelta(days=days)
-    
-    # Get activity counts by type
-    activity_counts = {}
-    for activity_type in ActivityType:
-        count = db.query(ActivityLog).filter(
-            ActivityLog.activity_type == activity_type,
-            ActivityLog.created_at >= start_date
-        ).count()
-        activity_counts[activity_type.value] = count
-    
-    # Get activity by user
-    user_activities = db.query(
-        ActivityLog.user_id,
-        User.name,
-        User.email,
-        db.func.count(ActivityLog.id).label('count')
-    ).join(
-        User, ActivityLog.user_id == User.id
-    ).filter(
-        ActivityLog.created_at >= start_date
-    ).group_by(
-        ActivityLog.user_id, User.name, User.email
-    ).all()
+    now = datetime.utcnow()
+    start_date = now - timedelta(days=days)
+    counts = Counter()
+
+    # Hari lengkap yang sudah di-rollup dibaca dari activity_log_daily,
+    # sisanya (awal window dan hari yang belum di-rollup) dari log mentah
+    raw_ranges = [(start_date, None)]
+    rollups_used = False
+    if use_rollups:
+        last_day = await db.scalar(select(func.max(ActivityLogDaily.day)))
+        first_day = start_date.date() + timedelta(days=1)
+        if last_day is not None and last_day >= first_day:
+            rollup_rows = await db.execute(
+                select(ActivityLogDaily.activity_type, ActivityLogDaily.user_id, func.sum(ActivityLogDaily.count))
+                .where(ActivityLogDaily.day >= first_day, ActivityLogDaily.day <= last_day)
+                .group_by(ActivityLogDaily.activity_type, ActivityLogDaily.user_id)
+            )
+            for activity_type, user_id, count in rollup_rows:
+                counts[(activity_type, user_id)] += count
+            raw_ranges = [(start_date, day_start(first_day)), (day_start(last_day + timedelta(days=1)), None)]
+            rollups_used = True
+
+    # Satu query grouped (type, user) per rentang log mentah
+    for range_start, range_end in raw_ranges:
+        query = select(
+            ActivityLog.activity_type, ActivityLog.user_id, func.count(ActivityLog.id)
+        ).where(ActivityLog.created_at >= range_start)
+        if range_end is not None:
+            query = query.where(ActivityLog.created_at < range_end)
+        raw_rows = await db.execute(query.group_by(ActivityLog.activity_type, ActivityLog.user_id))
+        for activity_type, user_id, count in raw_rows:
+            counts[(activity_type, user_id)] += count
+
+    activity_counts = {activity_type.value: 0 for activity_type in ActivityType}
+    user_counts = Counter()
+    for (activity_type, user_id), count in counts.items():
+        activity_counts[ActivityType(activity_type).value] += count
+        if user_id is not None:
+            user_counts[user_id] += count
+
+    users = (await db.execute(
+        select(User.id, User.name, User.email).where(User.id.in_(user_counts))
+    )).all() if user_counts else []
     
     return {
         "period_days": days,
+        "rollups_used": rollups_used,
         "activity_by_type": activity_counts,
         "activity_by_user": [
             {
-                "user_id": ua.user_id,
-                "name": ua.name,
-                "email": ua.email,
-                "count": ua.count
+                "user_id": user.id,
+                "name": user.name,
+                "email": user.email,
+                "count": user_counts[user.id]
             }
-            for ua in user_activities
+            for user in users
         ]
     }
-
@@ -1,48 +1,118 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.database import get_db
-from app.models import Alarm
+from app.cache import dashboard_cache
+from app.pagination import PageParams, page_params, keyset_page, set_next_cursor
+from app.streaming import StreamFormat, schema_columns, stream_query
+from app.models import Alarm, AlarmStatus
 from app.schemas import AlarmCreate, AlarmResponse
+from app.services.alarm_correlator import alarm_correlator
+from app.services.alarm_manager import OPEN_STATUSES, alarm_manager
+from app.services.storm_guard import storm_guard
 from datetime import datetime
 
 router = APIRouter()
 
+def alarm_filters(status: Optional[str], severity: Optional[str], olt_id: Optional[int], onu_id: Optional[int]):
+    conditions = []
+    if status:
+        conditions.append(Alarm.status == status)
+    if severity:
+        conditions.append(Alarm.severity == severity)
+    if olt_id:
+        conditions.append(Alarm.olt_id == olt_id)
+    if onu_id:
+        conditions.append(Alarm.onu_id == onu_id)
+    return conditions
+
+def stream_alarms(conditions, fmt: StreamFormat, filename: Optional[str] = None):
+    statement = (
+        select(*schema_columns(Alarm, AlarmResponse))
+        .where(*conditions)
+        .order_by(Alarm.occurred_at.desc(), Alarm.id.desc())
+    )
+    return stream_query(statement, fmt, filename)
+
 @router.get("", response_model=List[AlarmResponse])
 def get_alarms(
+    response: Response,
     status: Optional[str] = Query(None),
     severity: Optional[str] = Query(None),
     olt_id: Optional[int] = Query(None),
     onu_id: Optional[int] = Query(None),
+    format: Optional[StreamFormat] = Query(None, description="Stream every matching alarm instead of one page"),
+    page: PageParams = Depends(page_params),
     db: Session = Depends(get_db)
 ):
-    """Get all alarms with optional filters"""
-    query = db.query(Alarm)
-    
-    if status:
-        query = query.filter(Alarm.status == status)
-    if severity:
-        query = query.filter(Alarm.severity == severity)
-    if olt_id:
-        query = query.filter(Alarm.olt_id == olt_id)
-    if onu_id:
-        query = query.filter(Alarm.onu_id == onu_id)
-    
-    alarms = query.order_by(Alarm.occurred_at.desc()).all()
-    return alarms
+    """Get alarms with optional filters, newest first, one page at a time"""
+    conditions = alarm_filters(status, severity, olt_id, onu_id)
+    if format is not None:
+        return stream_alarms(conditions, format)
 
-@router.post("", response_model=AlarmResponse, status_code=201)
-def create_alarm(alarm_data: AlarmCreate, db: Session = Depends(get_db)):
-    """Create new alarm"""
-    alarm_dict = alarm_data.model_dump()
-    if not alarm_dict.get('occurred_at'):
-        alarm_dict['occurred_at'] = datetime.now()
-    
-    alarm = Alarm(**alarm_dict)
-    db.add(alarm)
-    db.commit()
-    db.refresh(alarm)
-    return alarm
+    query = db.query(Alarm).filter(*conditions)
+    alarms = keyset_page(query, page, Alarm.id, sort_column=Alarm.occurred_at, descending=True).all()
+    return set_next_cursor(alarms, page, response, sort_attr="occurred_at")
+
+@router.get("/export")
+def export_alarms(
+    status: Optional[str] = Query(None),
+    severity: Optional[str] = Query(None),
+    olt_id: Optional[int] = Query(None),
+    onu_id: Optional[int] = Query(None),
+    format: StreamFormat = Query(StreamFormat.NDJSON),
+):
+    """Download all matching alarms as a streamed file, newest first"""
+    return stream_alarms(alarm_filters(status, severity, olt_id, onu_id), format, filename="alarms")
+
+@router.get("/storm")
+def get_storm_stats(db: Session = Depends(get_db)):
+    """Alarm events held back or dropped by the storm guard (counters, not rows)"""
+    return storm_guard.stats(db)
+
+@router.post(
+    "",
+    response_model=AlarmResponse,
+    status_code=201,
+    responses={202: {"model": AlarmResponse, "description": "Covered by an open alarm (PON LOS / OLT unreachable / flapping), which is returned"}},
+)
+def create_alarm(alarm_data: AlarmCreate, response: Response, db: Session = Depends(get_db)):
+    """Create new alarm, or count a repeat of the same open alarm"""
+    key = (alarm_data.type, alarm_data.olt_id, alarm_data.pon_port, alarm_data.onu_id)
+    batch = alarm_manager.batch()
+    batch.raise_alarm(
+        alarm_data.type,
+        alarm_data.olt_id,
+        alarm_data.onu_id,
+        alarm_data.severity,
+        alarm_data.message,
+        details=alarm_data.details,
+        at=alarm_data.occurred_at or datetime.now(),
+        pon_port=alarm_data.pon_port,
+    )
+    result = batch.commit(db)
+    if result.rate_limited:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many alarms for this device, event counted but not stored",
+            headers={"Retry-After": str(storm_guard.retry_after())},
+        )
+    if key in result.ids:
+        alarm = db.get(Alarm, result.ids[key])
+        if alarm.status != AlarmStatus.SUPPRESSED or alarm.parent_id is None:
+            return alarm
+        # Stored but suppressed in the same batch: answer with the alarm that covers it
+        parent_alarm = db.get(Alarm, alarm.parent_id)
+    else:
+        # Raise dropped by correlation / flap detection: answer with the alarm that covers it
+        parent = batch.discarded.get(key)
+        parent_alarm = alarm_manager.find_open(db, parent) if parent is not None else None
+    if parent_alarm is None:
+        return JSONResponse(status_code=202, content={"detail": "Alarm accepted but not stored"})
+    response.status_code = 202
+    return parent_alarm
 
 @router.get("/{alarm_id}", response_model=AlarmResponse)
 def get_alarm(alarm_id: int, db: Session = Depends(get_db)):
@@ -64,6 +134,7 @@ def update_alarm(alarm_id: int, alarm_data: dict, db: Session = Depends(get_db))
             setattr(alarm, field, value)
     
     db.commit()
+    dashboard_cache.invalidate()
     db.refresh(alarm)
     return alarm
 
@@ -76,6 +147,7 @@ def delete_alarm(alarm_id: int, db: Session = Depends(get_db)):
     
     db.delete(alarm)
     db.commit()
+    dashboard_cache.invalidate()
     return {"message": "Alarm deleted successfully"}
 
 @router.post("/{alarm_id}/acknowledge", response_model=AlarmResponse)
@@ -90,6 +162,7 @@ def acknowledge_alarm(alarm_id: int, db: Session = Depends(get_db)):
     # alarm.acknowledged_by = current_user.id  # Implement auth later
     
     db.commit()
+    dashboard_cache.invalidate()
     db.refresh(alarm)
     return alarm
 
@@ -100,10 +173,16 @@ def clear_alarm(alarm_id: int, db: Session = Depends(get_db)):
     if not alarm:
         raise HTTPException(status_code=404, detail="Alarm not found")
     
-    alarm.status = "cleared"
-    alarm.cleared_at = datetime.now()
-    
-    db.commit()
+    if alarm.status in OPEN_STATUSES:
+        # Suppressed children are cleared with it, still offline ONUs get their own onu_down back
+        batch = alarm_manager.batch()
+        alarm_correlator.release(db, batch, alarm)
+        batch.write(db)
+    else:
+        alarm.status = "cleared"
+        alarm.cleared_at = datetime.now()
+        db.commit()
+        dashboard_cache.invalidate()
     db.refresh(alarm)
     return alarm
 
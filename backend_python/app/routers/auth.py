@@ -5,15 +5,18 @@ Handles login, logout, user registration, and token refresh
 from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from app.database import get_db
+from app.database import get_async_db
 from app.models import User, UserRole, ActivityLog, ActivityType
 from app.auth import (
     authenticate_user,
     create_access_token,
-    get_password_hash,
+    get_password_hash_async,
     get_current_active_user,
+    invalidate_token,
+    oauth2_scheme,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 from app.schemas import UserCreate, UserResponse, Token, LoginRequest
@@ -35,11 +38,11 @@ class RegisterRequest(BaseModel):
 @router.post("/login", response_model=Token)
 async def login(
     login_data: LoginRequest,
-    db: Session = Depends(get_db),
-    request: Optional[Request] = None
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Login endpoint - returns JWT token"""
-    user = authenticate_user(db, login_data.email, login_data.password)
+    user = await authenticate_user(db, login_data.email, login_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -49,7 +52,7 @@ async def login(
     
     # Update last login
     user.last_login = datetime.utcnow()
-    db.commit()
+    await db.commit()
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -65,10 +68,10 @@ async def login(
         entity_type="user",
         entity_id=user.id,
         description=f"User {user.email} logged in",
-        ip_address=request.get("client_host") if request else None
+        ip_address=request.client.host if request.client else None
     )
     db.add(activity_log)
-    db.commit()
+    await db.commit()
     
     return {
         "access_token": access_token,
@@ -84,7 +87,7 @@ async def login(
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: RegisterRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Register a new user (admin only)"""
@@ -96,7 +99,7 @@ async def register(
         )
     
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -104,7 +107,7 @@ async def register(
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     new_user = User(
         name=user_data.name,
         email=user_data.email,
@@ -112,8 +115,8 @@ async def register(
         role=user_data.role
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     # Log activity
     activity_log = ActivityLog(
@@ -124,7 +127,7 @@ async def register(
         description=f"User {current_user.email} created new user {new_user.email}"
     )
     db.add(activity_log)
-    db.commit()
+    await db.commit()
     
     return new_user
 
@@ -137,10 +140,12 @@ async def get_current_user_info(
 
 @router.post("/logout")
 async def logout(
+    token: str = Depends(oauth2_scheme),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Logout endpoint - logs the activity"""
+    """Logout endpoint - logs the activity and forgets the cached principal"""
+    invalidate_token(token)
     activity_log = ActivityLog(
         user_id=current_user.id,
         activity_type=ActivityType.LOGOUT,
@@ -149,6 +154,6 @@ async def logout(
         description=f"User {current_user.email} logged out"
     )
     db.add(activity_log)
-    db.commit()
+    await db.commit()
     
     return {"message": "Logged out successfully"}
\ No newline at end of file
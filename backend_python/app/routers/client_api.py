@@ -3,21 +3,20 @@ Router untuk integrasi dengan API Client
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional, Dict
-from app.services.client_api_service import ClientApiService
+from app.services.container import services
 
 router = APIRouter(prefix="/api/client", tags=["Client API"])
-client_api = ClientApiService()
 
 @router.get("/health")
 async def check_client_api_health():
     """Check health status of client API"""
-    result = client_api.get_health()
+    result = services.client_api.get_health()
     return result
 
 @router.get("/data")
 async def get_client_data():
     """Get all data from client API"""
-    data = client_api.get_all_data()
+    data = services.client_api.get_all_data()
     return {
         "success": True,
         "count": len(data),
@@ -28,7 +27,7 @@ async def get_client_data():
 @router.get("/devices")
 async def get_client_devices():
     """Get devices from client API"""
-    devices = client_api.get_devices()
+    devices = services.client_api.get_devices()
     return {
         "success": True,
         "count": len(devices),
@@ -39,7 +38,7 @@ async def get_client_devices():
 @router.get("/devices/{device_id}")
 async def get_client_device(device_id: str):
     """Get specific device from client API"""
-    device = client_api.get_device_by_id(device_id)
+    device = services.client_api.get_device_by_id(device_id)
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
     return {
@@ -51,7 +50,7 @@ async def get_client_device(device_id: str):
 @router.get("/status")
 async def get_client_status():
     """Get status from client API"""
-    status = client_api.get_status()
+    status = services.client_api.get_status()
     return {
         "success": True,
         "status": status,
@@ -61,7 +60,7 @@ async def get_client_status():
 @router.get("/metrics")
 async def get_client_metrics():
     """Get metrics from client API"""
-    metrics = client_api.get_metrics()
+    metrics = services.client_api.get_metrics()
     return {
         "success": True,
         "metrics": metrics,
@@ -81,7 +80,7 @@ async def get_custom_endpoint(
     if param2:
         params["param2"] = param2
     
-    data = client_api.get_custom_endpoint(endpoint, params=params if params else None)
+    data = services.client_api.get_custom_endpoint(endpoint, params=params if params else None)
     if not data:
         raise HTTPException(status_code=404, detail="Endpoint not found or unavailable")
     
@@ -95,9 +94,9 @@ async def get_custom_endpoint(
 @router.get("/test")
 async def test_client_connection():
     """Test connection to client API"""
-    health = client_api.get_health()
-    devices = client_api.get_devices()
-    status = client_api.get_status()
+    health = services.client_api.get_health()
+    devices = services.client_api.get_devices()
+    status = services.client_api.get_status()
     
     return {
         "success": True,
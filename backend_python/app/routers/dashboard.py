@@ -3,11 +3,13 @@ Dashboard routes
 Provides summary statistics and real-time monitoring data
 """
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.database import get_db
-from app.models import Olt, Onu, Alarm, AlarmSeverity, AlarmStatus, OltStatus, OnuStatus
-from app.schemas import DashboardStats, OltPerformance
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import case, func, select, true
+from app.database import get_async_db
+from app.cache import dashboard_cache
+from app.models import Olt, Onu, Alarm, AlarmStatus, OltStatus
+from app.schemas import DashboardStats, OltPerformance, OltSummary, PonSummary
+from app.services.counter_service import CounterService, COUNTER_COLUMNS
 from app.auth import get_current_active_user
 from app.models import User
 from typing import List
@@ -16,55 +18,41 @@ router = APIRouter(prefix="/api/dashboard", tags=["Dashboard"])
 
 @router.get("/stats", response_model=DashboardStats)
 async def get_dashboard_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get dashboard statistics"""
-    # OLT stats
-    total_olts = db.query(Olt).count()
-    online_olts = db.query(Olt).filter(Olt.status == OltStatus.ONLINE).count()
-    offline_olts = db.query(Olt).filter(Olt.status == OltStatus.OFFLINE).count()
-    
-    # ONU stats
-    total_onus = db.query(Onu).count()
-    online_onus = db.query(Onu).filter(Onu.status == OnuStatus.ONLINE).count()
-    offline_onus = db.query(Onu).filter(Onu.status == OnuStatus.OFFLINE).count()
-    
-    # Alarm stats
-    active_alarms = db.query(Alarm).filter(Alarm.status == AlarmStatus.ACTIVE).count()
-    critical_alarms = db.query(Alarm).filter(
-        Alarm.status == AlarmStatus.ACTIVE,
-        Alarm.severity == AlarmSeverity.CRITICAL
-    ).count()
-    major_alarms = db.query(Alarm).filter(
-        Alarm.status == AlarmStatus.ACTIVE,
-        Alarm.severity == AlarmSeverity.MAJOR
-    ).count()
-    minor_alarms = db.query(Alarm).filter(
-        Alarm.status == AlarmStatus.ACTIVE,
-        Alarm.severity == AlarmSeverity.MINOR
-    ).count()
-    
-    return DashboardStats(
-        total_olts=total_olts,
-        online_olts=online_olts,
-        offline_olts=offline_olts,
-        total_onus=total_onus,
-        online_onus=online_onus,
-        offline_onus=offline_onus,
-        active_alarms=active_alarms,
-        critical_alarms=critical_alarms,
-        major_alarms=major_alarms,
-        minor_alarms=minor_alarms
-    )
+    stats = dashboard_cache.get("stats")
+    if stats is not None:
+        return stats
+
+    def count_if(condition):
+        return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+    # Semua hitungan dalam satu query: jumlah OLT dari tabel olts (kecil),
+    # ONU dan alarm aktif dari status_counters (O(#PON), bukan O(#ONU))
+    olt_stats = select(
+        func.count(Olt.id).label("total_olts"),
+        count_if(Olt.status == OltStatus.ONLINE).label("online_olts"),
+        count_if(Olt.status == OltStatus.OFFLINE).label("offline_olts"),
+    ).subquery()
+    counter_stats = CounterService.totals_query().subquery()
+
+    row = (await db.execute(
+        select(olt_stats, counter_stats).select_from(olt_stats.join(counter_stats, true()))
+    )).one()
+
+    stats = DashboardStats(**row._mapping)
+    dashboard_cache.set("stats", stats.model_dump())
+    return stats
 
 @router.get("/olt-performance", response_model=List[OltPerformance])
 async def get_olt_performance(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get OLT performance metrics"""
-    olts = db.query(Olt).all()
+    olts = (await db.scalars(select(Olt))).all()
     
     performance_list = []
     for olt in olts:
@@ -82,26 +70,61 @@ async def get_olt_performance(
     
     return performance_list
 
+@router.get("/olt-summary", response_model=List[OltSummary])
+async def get_olt_summary(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get ONU status and active alarm counts per OLT"""
+    counters = CounterService.per_olt_query().subquery()
+    rows = (await db.execute(
+        select(Olt.id, Olt.name, Olt.status, *(counters.c[column] for column in COUNTER_COLUMNS))
+        .outerjoin(counters, counters.c.olt_id == Olt.id)
+        .order_by(Olt.id)
+    )).all()
+
+    return [
+        OltSummary(
+            id=row.id,
+            name=row.name,
+            status=row.status,
+            **{column: getattr(row, column) or 0 for column in COUNTER_COLUMNS}
+        )
+        for row in rows
+    ]
+
+@router.get("/olt-summary/{olt_id}/pons", response_model=List[PonSummary])
+async def get_pon_summary(
+    olt_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get ONU status and active alarm counts per PON port of an OLT"""
+    counters = (await db.scalars(CounterService.per_pon_query(olt_id))).all()
+    return counters
+
 @router.get("/recent-alarms")
 async def get_recent_alarms(
     limit: int = 10,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get recent alarms"""
-    alarms = db.query(Alarm).filter(
-        Alarm.status == AlarmStatus.ACTIVE
-    ).order_by(Alarm.occurred_at.desc()).limit(limit).all()
+    alarms = (await db.scalars(
+        select(Alarm).where(
+            Alarm.status == AlarmStatus.ACTIVE
+        ).order_by(Alarm.occurred_at.desc()).limit(limit)
+    )).all()
     
     return alarms
 
 @router.get("/recent-onus")
 async def get_recent_onus(
     limit: int = 10,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get recently updated ONUs"""
-    onus = db.query(Onu).order_by(Onu.updated_at.desc()).limit(limit).all()
+    onus = (await db.scalars(select(Onu).order_by(Onu.updated_at.desc()).limit(limit))).all()
     return onus
 
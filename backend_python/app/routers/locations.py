@@ -1,17 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
 from app.models import Location
+from app.pagination import PageParams, page_params, keyset_page, set_next_cursor
 from app.schemas import LocationCreate, LocationResponse
 
 router = APIRouter()
 
 @router.get("", response_model=List[LocationResponse])
-def get_locations(db: Session = Depends(get_db)):
-    """Get all locations"""
-    locations = db.query(Location).all()
-    return locations
+def get_locations(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_db)
+):
+    """Get locations, one page at a time (ordered by id)"""
+    locations = keyset_page(db.query(Location), page, Location.id).all()
+    return set_next_cursor(locations, page, response)
 
 @router.post("", response_model=LocationResponse, status_code=201)
 def create_location(location_data: LocationCreate, db: Session = Depends(get_db)):
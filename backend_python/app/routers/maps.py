@@ -1,30 +1,50 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import List
+from typing import List, Optional
 from app.database import get_db
-from app.models import Olt, Onu, Alarm, Location
+from app.geo import BoundingBox, bbox_params
+from app.models import Olt
+from app.streaming import StreamFormat, stream_items
+from app.services.counter_service import CounterService
+from app.services.geo_index import (
+    onu_geo_index, GEO_INDEXES, MapLayer, CLUSTER_MAX_ZOOM, GEO_INDEX_MAX_POINTS
+)
 
 router = APIRouter()
 
+# Radius maksimum untuk GET /api/maps/nearby (meter)
+MAX_RADIUS_M = 50_000
+
 @router.get("/olts")
-def get_olts_for_map(db: Session = Depends(get_db)):
-    """Get OLTs with location data for maps"""
-    from sqlalchemy import func
-    
-    olts = db.query(
+def get_olts_for_map(
+    bbox: Optional[BoundingBox] = Depends(bbox_params),
+    db: Session = Depends(get_db)
+):
+    """Get OLTs with location data for maps, optionally only those inside a viewport"""
+    # Jumlah ONU dan alarm aktif dari status_counters yang sudah diagregasi per OLT
+    # (satu baris per OLT), bukan join Olt -> Onu -> Alarm yang melipatgandakan baris
+    counters = CounterService.per_olt_query().subquery()
+    query = db.query(
         Olt.id,
         Olt.name,
         Olt.ip_address,
         Olt.status,
         Olt.latitude,
         Olt.longitude,
-        func.count(Onu.id).label('onus_count'),
-        func.count(Alarm.id).filter(Alarm.status == 'active').label('active_alarms_count')
-    ).outerjoin(Onu).outerjoin(Alarm).filter(
+        func.coalesce(counters.c.onus_online + counters.c.onus_offline + counters.c.onus_unknown, 0).label('onus_count'),
+        func.coalesce(
+            counters.c.alarms_critical + counters.c.alarms_major + counters.c.alarms_minor
+            + counters.c.alarms_warning + counters.c.alarms_info,
+            0
+        ).label('active_alarms_count')
+    ).outerjoin(counters, counters.c.olt_id == Olt.id).filter(
         Olt.latitude.isnot(None),
         Olt.longitude.isnot(None)
-    ).group_by(Olt.id).all()
+    )
+    if bbox:
+        query = query.filter(bbox.sql_filter(Olt.latitude, Olt.longitude))
+    olts = query.all()
     
     return [
         {
@@ -34,31 +54,76 @@ def get_olts_for_map(db: Session = Depends(get_db)):
             'status': olt.status,
             'latitude': float(olt.latitude) if olt.latitude else None,
             'longitude': float(olt.longitude) if olt.longitude else None,
-            'onus_count': olt.onus_count or 0,
-            'active_alarms_count': olt.active_alarms_count or 0,
+            'onus_count': olt.onus_count,
+            'active_alarms_count': olt.active_alarms_count,
         }
         for olt in olts
     ]
 
 @router.get("/onus")
-def get_onus_for_map(db: Session = Depends(get_db)):
-    """Get ONUs with location data for maps"""
-    onus = db.query(Onu).join(Location).filter(
-        Location.latitude.isnot(None),
-        Location.longitude.isnot(None)
-    ).all()
-    
-    return [
-        {
-            'id': onu.id,
-            'name': onu.name or onu.serial_number,
-            'serial_number': onu.serial_number,
-            'status': onu.status,
-            'olt_name': onu.olt.name if onu.olt else None,
-            'latitude': float(onu.location.latitude) if onu.location and onu.location.latitude else None,
-            'longitude': float(onu.location.longitude) if onu.location and onu.location.longitude else None,
-            'location_name': onu.location.name if onu.location else None,
-        }
-        for onu in onus
-    ]
+def get_onus_for_map(
+    bbox: Optional[BoundingBox] = Depends(bbox_params),
+    format: Optional[StreamFormat] = Query(None, description="Stream the result in chunks"),
+    db: Session = Depends(get_db)
+):
+    """Get ONUs with location data for maps, optionally only those inside a viewport"""
+    onu_geo_index.ensure_fresh(db)
+    onus, _ = onu_geo_index.points(bbox)
+    if format is not None:
+        return stream_items(onus, format)
+    return onus
+
+@router.get("/onus/clusters")
+def get_onu_clusters(
+    zoom: int = Query(..., ge=0, le=22, description="Web map zoom level"),
+    bbox: Optional[BoundingBox] = Depends(bbox_params),
+    db: Session = Depends(get_db)
+):
+    """
+    Get ONU map data for a viewport and zoom level
+
+    Di bawah CLUSTER_MAX_ZOOM dikembalikan cluster per sel grid (jumlah ONU
+    dan breakdown status); mulai CLUSTER_MAX_ZOOM dikembalikan ONU satu per satu
+    (maksimal GEO_INDEX_MAX_POINTS, truncated=true jika terpotong).
+    """
+    onu_geo_index.ensure_fresh(db)
+    if zoom >= CLUSTER_MAX_ZOOM:
+        onus, truncated = onu_geo_index.points(bbox, limit=GEO_INDEX_MAX_POINTS)
+        return {"zoom": zoom, "clustered": False, "clusters": [], "onus": onus, "truncated": truncated}
+
+    return {
+        "zoom": zoom,
+        "clustered": True,
+        "clusters": onu_geo_index.clusters(zoom, bbox),
+        "onus": [],
+        "truncated": False,
+    }
+
+@router.get("/nearby")
+def get_nearby(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_m: float = Query(500, gt=0, le=MAX_RADIUS_M, description="Search radius in meters"),
+    layer: MapLayer = Query(MapLayer.ONUS),
+    limit: int = Query(1000, ge=1, le=GEO_INDEX_MAX_POINTS),
+    db: Session = Depends(get_db)
+):
+    """Get ONUs, OLTs or locations within radius_m of a point, nearest first"""
+    index = GEO_INDEXES[layer]
+    index.ensure_fresh(db)
+    items, truncated = index.within(lat, lon, radius_m, limit)
+    return {"layer": layer, "radius_m": radius_m, "items": items, "truncated": truncated}
 
+@router.get("/nearest")
+def get_nearest(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    layer: MapLayer = Query(MapLayer.OLTS),
+    k: int = Query(1, ge=1, le=100),
+    max_distance_m: Optional[float] = Query(None, gt=0, description="Ignore objects farther than this"),
+    db: Session = Depends(get_db)
+):
+    """Get the k ONUs, OLTs or locations nearest to a point"""
+    index = GEO_INDEXES[layer]
+    index.ensure_fresh(db)
+    return {"layer": layer, "items": index.nearest(lat, lon, k, max_distance_m)}
@@ -2,20 +2,43 @@
 Monitoring routes
 Handles real-time monitoring, polling, and status checks
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_async_db
 from app.models import Olt, Onu, User
-from app.services.olt_service import OltService
+from app.services.container import services
+from app.services.flap_detector import flap_detector
+from app.schemas import FlappingOnuResponse
 from app.auth import get_current_active_user
+from app.pagination import PageParams, page_params, keyset_page, set_next_cursor
+from app.shared_state import RateLimiter
 from typing import List, Optional
 from datetime import datetime
+import os
 
 router = APIRouter(prefix="/api/monitoring", tags=["Monitoring"])
-olt_service = OltService()
+
+# Poll / sync manual per OLT dibatasi lewat shared state (berlaku untuk semua
+# worker dan instance), agar klik berulang tidak melipatgandakan beban SNMP ke OLT
+DEVICE_ACTION_INTERVAL = int(os.getenv("DEVICE_ACTION_INTERVAL", "10"))
+poll_limiter = RateLimiter("olt-poll", limit=1, window=DEVICE_ACTION_INTERVAL)
+sync_limiter = RateLimiter("olt-sync", limit=1, window=DEVICE_ACTION_INTERVAL)
+
+def check_device_rate(limiter: RateLimiter, olt_id: int):
+    if not limiter.hit(olt_id):
+        raise HTTPException(
+            status_code=429,
+            detail=f"OLT {olt_id} was contacted less than {DEVICE_ACTION_INTERVAL} seconds ago",
+            headers={"Retry-After": str(DEVICE_ACTION_INTERVAL)},
+        )
+
+# poll, sync-onus dan status ONU melakukan SNMP secara blocking, jadi route ini
+# sengaja def biasa (dijalankan di threadpool) dengan session sync
 
 @router.post("/olt/{olt_id}/poll")
-async def poll_olt(
+def poll_olt(
     olt_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -25,11 +48,12 @@ async def poll_olt(
     if not olt:
         raise HTTPException(status_code=404, detail="OLT not found")
     
-    result = olt_service.poll_olt(olt, db)
+    check_device_rate(poll_limiter, olt_id)
+    result = services.olt.poll_olt(olt, db)
     return result
 
 @router.post("/olt/{olt_id}/sync-onus")
-async def sync_onus(
+def sync_onus(
     olt_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -39,30 +63,43 @@ async def sync_onus(
     if not olt:
         raise HTTPException(status_code=404, detail="OLT not found")
     
-    result = olt_service.sync_onus(olt, db)
+    check_device_rate(sync_limiter, olt_id)
+    result = services.olt.sync_onus(olt, db)
     return result
 
 @router.get("/olt/{olt_id}/onus")
 async def get_olt_onus(
     olt_id: int,
+    response: Response,
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get all ONUs for a specific OLT"""
-    olt = db.query(Olt).filter(Olt.id == olt_id).first()
+    """Get ONUs of a specific OLT, ordered by PON port, one page at a time"""
+    olt = await db.get(Olt, olt_id)
     if not olt:
         raise HTTPException(status_code=404, detail="OLT not found")
     
-    query = db.query(Onu).filter(Onu.olt_id == olt_id)
+    query = select(Onu).where(Onu.olt_id == olt_id)
     if status:
-        query = query.filter(Onu.status == status)
+        query = query.where(Onu.status == status)
     
-    onus = query.all()
-    return onus
+    onus = (await db.scalars(keyset_page(query, page, Onu.id, sort_column=Onu.pon_port))).all()
+    return set_next_cursor(onus, page, response, sort_attr="pon_port")
+
+@router.get("/flapping", response_model=List[FlappingOnuResponse])
+def get_flapping_onus(
+    limit: int = Query(20, ge=1, le=500),
+    olt_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """ONUs with the highest flap score, worst first"""
+    return flap_detector.ranked(db, limit=limit, olt_id=olt_id)
 
 @router.get("/onu/{onu_id}/status")
-async def get_onu_status(
+def get_onu_status(
     onu_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -76,13 +113,14 @@ async def get_onu_status(
     try:
         olt = onu.olt
         # Try to get updated status via SNMP
-        snmp_service = olt_service.snmp
-        onu_list = snmp_service.get_onu_list(olt)
+        onu_list = services.snmp.get_onu_list(olt)
         
         for onu_data in onu_list:
             if (onu_data.get('pon_port') == onu.pon_port and 
                 onu_data.get('onu_id') == onu.onu_id):
                 # Update ONU with latest data
+                if onu_data.get('status', onu.status) != onu.status:
+                    onu.last_status_change = datetime.utcnow()
                 onu.status = onu_data.get('status', onu.status)
                 onu.rx_power = onu_data.get('rx_power')
                 onu.tx_power = onu_data.get('tx_power')
@@ -1,21 +1,76 @@
-from fastapi import APIRouter, Depends, HTTPException
+import hashlib
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List
+from typing import List, Optional
 from app.database import get_db
 from app.models import Olt, Onu, Alarm
 from app.schemas import OltCreate, OltUpdate, OltResponse
-from app.services.snmp_service import SnmpService
-from datetime import datetime
+from app.pagination import PageParams, page_params, keyset_page, set_next_cursor
+from app.projection import FieldSet, fields_param, projected_item, projected_response
+from app.services.container import services
+from datetime import datetime, timedelta
 
 router = APIRouter()
-snmp_service = SnmpService()
+
+def olt_ids_digest(count: int, id_sum: int) -> str:
+    """
+    Digest of the OLT id set from its size and id sum (worker computes the same from its cached ids)
+
+    Dihitung dari agregat, bukan dari daftar id. Hapus + tambah OLT (count sama)
+    tetap mengubah total id, karena id baru lebih besar dari id yang dihapus.
+    """
+    return hashlib.sha1(f"{count}:{id_sum}".encode()).hexdigest()[:16]
+
+olt_fields = fields_param(Olt, OltResponse)
 
 @router.get("", response_model=List[OltResponse])
-def get_olts(db: Session = Depends(get_db)):
-    """Get all OLTs"""
-    olts = db.query(Olt).all()
-    return olts
+def get_olts(
+    response: Response,
+    since: Optional[datetime] = Query(None, description="Only return OLTs changed at or after this cursor"),
+    if_none_match: Optional[str] = Header(None),
+    fieldset: Optional[FieldSet] = Depends(olt_fields),
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_db)
+):
+    """
+    Get all OLTs, or only OLTs changed since a cursor
+
+    Change feed for pollers:
+    - ETag / If-None-Match: 304 jika daftar OLT tidak berubah
+    - X-Olt-Cursor: nilai untuk parameter since pada request berikutnya
+    - X-Olt-Count: jumlah total OLT
+    - X-Olt-Ids: digest himpunan id OLT (lihat olt_ids_digest); jika berbeda
+      dengan digest id di cache client berarti ada OLT yang dihapus (juga saat
+      jumlahnya sama karena ada OLT baru), client mencocokkan ulang daftar id
+      lewat ?fields=id
+    - X-Next-Cursor: cursor halaman berikutnya (diurutkan berdasarkan id)
+    """
+    total, id_sum, last_updated, db_now = db.query(
+        func.count(Olt.id), func.coalesce(func.sum(Olt.id), 0), func.max(Olt.updated_at), func.now()
+    ).one()
+    digest = olt_ids_digest(total, int(id_sum))
+    cursor = last_updated.isoformat() if last_updated else ""
+    headers = {"X-Olt-Count": str(total), "X-Olt-Cursor": cursor, "X-Olt-Ids": digest}
+
+    # updated_at hanya presisi detik - perubahan di detik yang sama bisa
+    # menghasilkan ETag yang sama, jadi ETag tidak dikirim untuk detik berjalan
+    if last_updated is None or last_updated < db_now - timedelta(seconds=1):
+        # Bentuk query ikut di ETag, supaya ETag respons penuh tidak berlaku untuk ?fields= / since / limit lain
+        shape = "|".join((",".join(fieldset.names) if fieldset else "", since.isoformat() if since else "", str(page.limit)))
+        etag = f'W/"olts-{digest}-{cursor}-{hashlib.sha1(shape.encode()).hexdigest()[:8]}"'
+        headers["ETag"] = etag
+        # ETag mewakili seluruh daftar, jadi hanya dicek pada halaman pertama
+        if if_none_match == etag and not page.cursor:
+            return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+    query = db.query(*fieldset.columns) if fieldset else db.query(Olt)
+    if since:
+        # >= karena presisi detik, OLT di detik cursor dikirim ulang (idempotent)
+        query = query.filter(Olt.updated_at >= since)
+    olts = set_next_cursor(keyset_page(query, page, Olt.id).all(), page, response)
+    return projected_response(olts, fieldset, response) if fieldset else olts
 
 @router.post("", response_model=OltResponse, status_code=201)
 def create_olt(olt_data: OltCreate, db: Session = Depends(get_db)):
@@ -27,12 +82,13 @@ def create_olt(olt_data: OltCreate, db: Session = Depends(get_db)):
     return olt
 
 @router.get("/{olt_id}", response_model=OltResponse)
-def get_olt(olt_id: int, db: Session = Depends(get_db)):
+def get_olt(olt_id: int, fieldset: Optional[FieldSet] = Depends(olt_fields), db: Session = Depends(get_db)):
     """Get OLT by ID"""
-    olt = db.query(Olt).filter(Olt.id == olt_id).first()
+    query = db.query(*fieldset.columns) if fieldset else db.query(Olt)
+    olt = query.filter(Olt.id == olt_id).first()
     if not olt:
         raise HTTPException(status_code=404, detail="OLT not found")
-    return olt
+    return projected_item(olt, fieldset) if fieldset else olt
 
 @router.put("/{olt_id}", response_model=OltResponse)
 def update_olt(olt_id: int, olt_data: OltUpdate, db: Session = Depends(get_db)):
@@ -68,7 +124,7 @@ def get_olt_status(olt_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="OLT not found")
     
     try:
-        system_info = snmp_service.get_system_info(olt)
+        system_info = services.snmp.get_system_info(olt)
         olt.status = "online"
         olt.last_polled_at = datetime.now()
         db.commit()
@@ -1,31 +1,62 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.database import get_db
+from app.cache import dashboard_cache
+from app.pagination import PageParams, page_params, keyset_page, set_next_cursor
+from app.projection import FieldSet, fields_param, projected_item, projected_response
+from app.streaming import StreamFormat, schema_columns, stream_query
 from app.models import Onu, Olt
 from app.schemas import OnuCreate, OnuUpdate, OnuResponse, OnuSyncRequest, OnuSyncItem
-from app.services.snmp_service import SnmpService
+from app.services.alarm_manager import alarm_manager
+from app.services.optical_engine import optical_engine
 from datetime import datetime
 
 router = APIRouter()
-snmp_service = SnmpService()
+onu_fields = fields_param(Onu, OnuResponse)
+
+def onu_filters(olt_id: Optional[int], status: Optional[str]):
+    conditions = []
+    if olt_id:
+        conditions.append(Onu.olt_id == olt_id)
+    if status:
+        conditions.append(Onu.status == status)
+    return conditions
+
+def stream_onus(olt_id: Optional[int], status: Optional[str], fieldset: Optional[FieldSet], fmt: StreamFormat, filename: Optional[str] = None):
+    columns = fieldset.columns if fieldset else schema_columns(Onu, OnuResponse)
+    statement = select(*columns).where(*onu_filters(olt_id, status)).order_by(Onu.id)
+    return stream_query(statement, fmt, filename)
 
 @router.get("", response_model=List[OnuResponse])
 def get_onus(
+    response: Response,
     olt_id: Optional[int] = Query(None),
     status: Optional[str] = Query(None),
+    format: Optional[StreamFormat] = Query(None, description="Stream every matching ONU instead of one page"),
+    fieldset: Optional[FieldSet] = Depends(onu_fields),
+    page: PageParams = Depends(page_params),
     db: Session = Depends(get_db)
 ):
-    """Get all ONUs with optional filters"""
-    query = db.query(Onu)
-    
-    if olt_id:
-        query = query.filter(Onu.olt_id == olt_id)
-    if status:
-        query = query.filter(Onu.status == status)
-    
-    onus = query.all()
-    return onus
+    """Get ONUs with optional filters, one page at a time (ordered by id)"""
+    if format is not None:
+        return stream_onus(olt_id, status, fieldset, format)
+
+    query = db.query(*fieldset.columns) if fieldset else db.query(Onu)
+    query = query.filter(*onu_filters(olt_id, status))
+    onus = set_next_cursor(keyset_page(query, page, Onu.id).all(), page, response)
+    return projected_response(onus, fieldset, response) if fieldset else onus
+
+@router.get("/export")
+def export_onus(
+    olt_id: Optional[int] = Query(None),
+    status: Optional[str] = Query(None),
+    format: StreamFormat = Query(StreamFormat.NDJSON),
+    fieldset: Optional[FieldSet] = Depends(onu_fields),
+):
+    """Download all matching ONUs as a streamed file"""
+    return stream_onus(olt_id, status, fieldset, format, filename="onus")
 
 @router.post("", response_model=OnuResponse, status_code=201)
 def create_onu(onu_data: OnuCreate, db: Session = Depends(get_db)):
@@ -47,12 +78,13 @@ def create_onu(onu_data: OnuCreate, db: Session = Depends(get_db)):
     return onu
 
 @router.get("/{onu_id}", response_model=OnuResponse)
-def get_onu(onu_id: int, db: Session = Depends(get_db)):
+def get_onu(onu_id: int, fieldset: Optional[FieldSet] = Depends(onu_fields), db: Session = Depends(get_db)):
     """Get ONU by ID"""
-    onu = db.query(Onu).filter(Onu.id == onu_id).first()
+    query = db.query(*fieldset.columns) if fieldset else db.query(Onu)
+    onu = query.filter(Onu.id == onu_id).first()
     if not onu:
         raise HTTPException(status_code=404, detail="ONU not found")
-    return onu
+    return projected_item(onu, fieldset) if fieldset else onu
 
 @router.put("/{onu_id}", response_model=OnuResponse)
 def update_onu(onu_id: int, onu_data: OnuUpdate, db: Session = Depends(get_db)):
@@ -82,48 +114,62 @@ def delete_onu(onu_id: int, db: Session = Depends(get_db)):
 
 @router.post("/sync")
 def sync_onus(sync_data: OnuSyncRequest, db: Session = Depends(get_db)):
-    """Sync ONUs from poller"""
+    """Sync ONUs from poller, with the same alarm pipeline as an in-process poll, one commit per OLT"""
     synced = 0
     updated = 0
-    
+    # ONU yang dibuat di request ini (belum di-flush, tidak ditemukan query berikutnya)
+    created = {}
+    by_olt = {}
     for onu_data in sync_data.onus:
-        onu = db.query(Onu).filter(
-            Onu.olt_id == onu_data.olt_id,
-            Onu.pon_port == onu_data.pon_port,
-            Onu.onu_id == onu_data.onu_id
-        ).first()
+        by_olt.setdefault(onu_data.olt_id, []).append(onu_data)
+    
+    for olt_id, items in by_olt.items():
+        # onu_down / pon_los / flapping / optik ditulis lewat AlarmBatch seperti OltService.sync_onus
+        alarms = alarm_manager.batch(olt_id)
+        for onu_data in items:
+            key = (onu_data.olt_id, onu_data.pon_port, onu_data.onu_id)
+            onu = created.get(key) or db.query(Onu).filter(
+                Onu.olt_id == onu_data.olt_id,
+                Onu.pon_port == onu_data.pon_port,
+                Onu.onu_id == onu_data.onu_id
+            ).first()
+            
+            if onu:
+                # Update existing (last_status_change diperbarui oleh onu_status_changed)
+                alarms.onu_status_changed(onu, onu.status, onu_data.status)
+                onu.status = onu_data.status
+                if onu_data.rx_power is not None:
+                    onu.rx_power = onu_data.rx_power
+                if onu_data.tx_power is not None:
+                    onu.tx_power = onu_data.tx_power
+                if onu_data.rx_bytes is not None:
+                    onu.rx_bytes = onu_data.rx_bytes
+                if onu_data.tx_bytes is not None:
+                    onu.tx_bytes = onu_data.tx_bytes
+                onu.last_seen_at = datetime.now()
+                updated += 1
+            else:
+                # Create new
+                onu = Onu(
+                    olt_id=onu_data.olt_id,
+                    serial_number=onu_data.serial_number,
+                    pon_port=onu_data.pon_port,
+                    onu_id=onu_data.onu_id,
+                    status=onu_data.status,
+                    rx_power=onu_data.rx_power,
+                    tx_power=onu_data.tx_power,
+                    rx_bytes=onu_data.rx_bytes or 0,
+                    tx_bytes=onu_data.tx_bytes or 0,
+                    last_seen_at=datetime.now()
+                )
+                db.add(onu)
+                created[key] = onu
+                synced += 1
         
-        if onu:
-            # Update existing
-            onu.status = onu_data.status
-            if onu_data.rx_power is not None:
-                onu.rx_power = onu_data.rx_power
-            if onu_data.tx_power is not None:
-                onu.tx_power = onu_data.tx_power
-            if onu_data.rx_bytes is not None:
-                onu.rx_bytes = onu_data.rx_bytes
-            if onu_data.tx_bytes is not None:
-                onu.tx_bytes = onu_data.tx_bytes
-            onu.last_seen_at = datetime.now()
-            updated += 1
-        else:
-            # Create new
-            onu = Onu(
-                olt_id=onu_data.olt_id,
-                serial_number=onu_data.serial_number,
-                pon_port=onu_data.pon_port,
-                onu_id=onu_data.onu_id,
-                status=onu_data.status,
-                rx_power=onu_data.rx_power,
-                tx_power=onu_data.tx_power,
-                rx_bytes=onu_data.rx_bytes or 0,
-                tx_bytes=onu_data.tx_bytes or 0,
-                last_seen_at=datetime.now()
-            )
-            db.add(onu)
-            synced += 1
+        optical_engine.evaluate(db, olt_id, alarms)
+        alarms.commit(db)
     
-    db.commit()
+    dashboard_cache.invalidate()
     return {
         "message": "ONUs synced successfully",
         "created": synced,
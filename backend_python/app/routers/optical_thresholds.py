@@ -0,0 +1,89 @@
+"""
+Optical threshold routes
+RX / TX power limits used by the optical engine after every poll
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database import get_db
+from app.models import OpticalMetric, OpticalThreshold
+from app.schemas import OpticalThresholdCreate, OpticalThresholdResponse, OpticalThresholdUpdate
+from app.services.optical_engine import optical_engine
+
+router = APIRouter()
+
+LIMIT_FIELDS = ("major_low", "minor_low", "minor_high", "major_high")
+
+def check_limits(threshold: OpticalThreshold):
+    """Limits that are set must be ordered major_low <= minor_low <= minor_high <= major_high"""
+    limits = [getattr(threshold, field) for field in LIMIT_FIELDS]
+    limits = [limit for limit in limits if limit is not None]
+    if limits != sorted(limits):
+        raise HTTPException(status_code=400, detail="Limits must satisfy major_low <= minor_low <= minor_high <= major_high")
+
+def check_scope(db: Session, threshold: OpticalThreshold):
+    """Only one threshold per (metric, olt_id, onu_model)"""
+    existing = db.scalar(
+        select(OpticalThreshold.id).where(
+            OpticalThreshold.metric == threshold.metric,
+            OpticalThreshold.olt_id.is_(None) if threshold.olt_id is None else OpticalThreshold.olt_id == threshold.olt_id,
+            OpticalThreshold.onu_model.is_(None) if threshold.onu_model is None else OpticalThreshold.onu_model == threshold.onu_model,
+        )
+    )
+    if existing is not None:
+        raise HTTPException(status_code=400, detail=f"Threshold for this scope already exists (id {existing})")
+
+@router.get("", response_model=List[OpticalThresholdResponse])
+def get_optical_thresholds(
+    metric: Optional[OpticalMetric] = Query(None),
+    olt_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Get configured optical thresholds"""
+    query = db.query(OpticalThreshold)
+    if metric:
+        query = query.filter(OpticalThreshold.metric == metric)
+    if olt_id:
+        query = query.filter(OpticalThreshold.olt_id == olt_id)
+    return query.order_by(OpticalThreshold.id).all()
+
+@router.post("", response_model=OpticalThresholdResponse, status_code=201)
+def create_optical_threshold(threshold_data: OpticalThresholdCreate, db: Session = Depends(get_db)):
+    """Create optical threshold (global, per OLT and/or per ONU model)"""
+    threshold = OpticalThreshold(**threshold_data.model_dump())
+    check_limits(threshold)
+    check_scope(db, threshold)
+    db.add(threshold)
+    db.commit()
+    db.refresh(threshold)
+    optical_engine.invalidate()
+    return threshold
+
+@router.put("/{threshold_id}", response_model=OpticalThresholdResponse)
+def update_optical_threshold(threshold_id: int, threshold_data: OpticalThresholdUpdate, db: Session = Depends(get_db)):
+    """Update optical threshold limits"""
+    threshold = db.get(OpticalThreshold, threshold_id)
+    if not threshold:
+        raise HTTPException(status_code=404, detail="Optical threshold not found")
+
+    for field, value in threshold_data.model_dump(exclude_unset=True).items():
+        setattr(threshold, field, value)
+    check_limits(threshold)
+
+    db.commit()
+    db.refresh(threshold)
+    optical_engine.invalidate()
+    return threshold
+
+@router.delete("/{threshold_id}")
+def delete_optical_threshold(threshold_id: int, db: Session = Depends(get_db)):
+    """Delete optical threshold"""
+    threshold = db.get(OpticalThreshold, threshold_id)
+    if not threshold:
+        raise HTTPException(status_code=404, detail="Optical threshold not found")
+
+    db.delete(threshold)
+    db.commit()
+    optical_engine.invalidate()
+    return {"message": "Optical threshold deleted successfully"}
@@ -6,13 +6,11 @@ from app.schemas import (
     ProvisionOnuRequest, UpdateSerialRequest, UpdateNameRequest,
     PppoeAccountCreate
 )
-from app.services.snmp_service import SnmpService
-from passlib.context import CryptContext
+from app.services.container import services
+from app.auth import get_password_hash
 from datetime import datetime
 
 router = APIRouter()
-snmp_service = SnmpService()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 @router.post("/onu", status_code=201)
 def provision_onu(provision_data: ProvisionOnuRequest, db: Session = Depends(get_db)):
@@ -28,7 +26,7 @@ def provision_onu(provision_data: ProvisionOnuRequest, db: Session = Depends(get
     
     try:
         # Provision ONU on OLT via SNMP
-        provisioned = snmp_service.provision_onu(
+        provisioned = services.snmp.provision_onu(
             olt,
             provision_data.pon_port,
             provision_data.onu_id,
@@ -56,7 +54,7 @@ def provision_onu(provision_data: ProvisionOnuRequest, db: Session = Depends(get
         # Create PPPoE account if provided
         if provision_data.pppoe:
             # Create PPPoE on OLT
-            pppoe_created = snmp_service.create_pppoe_account(
+            pppoe_created = services.snmp.create_pppoe_account(
                 olt,
                 provision_data.pon_port,
                 provision_data.onu_id,
@@ -67,7 +65,7 @@ def provision_onu(provision_data: ProvisionOnuRequest, db: Session = Depends(get
                 pppoe_account = PppoeAccount(
                     onu_id=onu.id,
                     username=provision_data.pppoe.get('username'),
-                    password=pwd_context.hash(provision_data.pppoe.get('password')),
+                    password=get_password_hash(provision_data.pppoe.get('password')),
                     vlan_id=provision_data.pppoe.get('vlan_id'),
                     download_speed=provision_data.pppoe.get('download_speed'),
                     upload_speed=provision_data.pppoe.get('upload_speed'),
@@ -91,7 +89,7 @@ def delete_onu(onu_id: int, db: Session = Depends(get_db)):
     
     try:
         # Delete from OLT via SNMP
-        deleted = snmp_service.delete_onu(onu.olt, onu.pon_port, onu.onu_id)
+        deleted = services.snmp.delete_onu(onu.olt, onu.pon_port, onu.onu_id)
         
         if not deleted:
             raise HTTPException(status_code=500, detail="Failed to delete ONU from OLT")
@@ -122,7 +120,7 @@ def update_serial(onu_id: int, update_data: UpdateSerialRequest, db: Session = D
     
     try:
         # Update on OLT via SNMP
-        updated = snmp_service.update_onu_serial(
+        updated = services.snmp.update_onu_serial(
             onu.olt,
             onu.pon_port,
             onu.onu_id,
@@ -162,7 +160,7 @@ def reboot_onu(onu_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="ONU not found")
     
     try:
-        rebooted = snmp_service.reboot_onu(onu.olt, onu.pon_port, onu.onu_id)
+        rebooted = services.snmp.reboot_onu(onu.olt, onu.pon_port, onu.onu_id)
         if rebooted:
             return {"message": "ONU reboot command sent successfully"}
         raise HTTPException(status_code=500, detail="Failed to reboot ONU")
@@ -177,7 +175,7 @@ def reset_onu(onu_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="ONU not found")
     
     try:
-        reset = snmp_service.reset_onu(onu.olt, onu.pon_port, onu.onu_id)
+        reset = services.snmp.reset_onu(onu.olt, onu.pon_port, onu.onu_id)
         if reset:
             return {"message": "ONU reset command sent successfully"}
         raise HTTPException(status_code=500, detail="Failed to reset ONU")
@@ -193,7 +191,7 @@ def create_pppoe(onu_id: int, pppoe_data: PppoeAccountCreate, db: Session = Depe
     
     try:
         # Create PPPoE on OLT
-        created = snmp_service.create_pppoe_account(
+        created = services.snmp.create_pppoe_account(
             onu.olt,
             onu.pon_port,
             onu.onu_id,
@@ -206,7 +204,7 @@ def create_pppoe(onu_id: int, pppoe_data: PppoeAccountCreate, db: Session = Depe
         # Create in database
         pppoe_dict = pppoe_data.model_dump()
         pppoe_dict['onu_id'] = onu_id
-        pppoe_dict['password'] = pwd_context.hash(pppoe_dict['password'])
+        pppoe_dict['password'] = get_password_hash(pppoe_dict['password'])
         
         pppoe_account = PppoeAccount(**pppoe_dict)
         db.add(pppoe_account)
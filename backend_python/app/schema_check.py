@@ -0,0 +1,56 @@
+"""
+File: schema_check.py
+
+Pengecekan versi schema database saat startup
+
+Fungsi utama:
+- check_schema: membandingkan revision Alembic di database dengan head
+  migration di folder alembic/versions
+
+Environment variables:
+- SCHEMA_CHECK: warn (default) = log warning jika schema belum di-upgrade,
+  strict = startup gagal, off = tidak dicek
+
+Catatan:
+- Schema dibuat dan di-upgrade oleh Alembic (alembic upgrade head) sebelum
+  server dijalankan, aplikasi tidak lagi menjalankan create_all saat import
+- Dipanggil dari lifespan di main.py, alembic di-import di sini saja
+"""
+import logging
+import os
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_CHECK = os.getenv("SCHEMA_CHECK", "warn").lower()
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+def check_schema(engine) -> Optional[bool]:
+    """
+    Compare the database revision with the migration head
+
+    Returns True jika schema up to date, False jika tidak, None jika pengecekan dimatikan.
+    """
+    if SCHEMA_CHECK == "off":
+        return None
+
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "alembic"))
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+    with engine.connect() as conn:
+        current = set(MigrationContext.configure(conn).get_current_heads())
+
+    if current == heads:
+        return True
+    message = (
+        f"Database schema revision {sorted(current) or 'none'} does not match migration head "
+        f"{sorted(heads)}, run 'alembic upgrade head'"
+    )
+    if SCHEMA_CHECK == "strict":
+        raise RuntimeError(message)
+    logger.warning(message)
+    return False
@@ -26,7 +26,7 @@ Catatan:
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
-from app.models import OltStatus, OnuStatus, AlarmSeverity, AlarmStatus, PppoeStatus, AdminStatus
+from app.models import OltStatus, OnuStatus, AlarmSeverity, AlarmStatus, PppoeStatus, AdminStatus, OpticalMetric
 
 # OLT Schemas
 class OltBase(BaseModel):
@@ -119,14 +119,19 @@ class AlarmBase(BaseModel):
 class AlarmCreate(AlarmBase):
     olt_id: Optional[int] = None
     onu_id: Optional[int] = None
+    pon_port: Optional[int] = None  # Hanya untuk alarm level PON
     occurred_at: Optional[datetime] = None
 
 class AlarmResponse(AlarmBase):
     id: int
     olt_id: Optional[int] = None
     onu_id: Optional[int] = None
+    pon_port: Optional[int] = None
+    parent_id: Optional[int] = None
     status: AlarmStatus
     occurred_at: datetime
+    occurrence_count: int = 1
+    last_occurred_at: Optional[datetime] = None
     cleared_at: Optional[datetime] = None
     acknowledged_at: Optional[datetime] = None
     created_at: datetime
@@ -135,6 +140,49 @@ class AlarmResponse(AlarmBase):
     class Config:
         from_attributes = True
 
+class FlapTransition(BaseModel):
+    at: datetime
+    status: OnuStatus
+
+class FlappingOnuResponse(BaseModel):
+    onu_id: int
+    olt_id: int
+    serial_number: str
+    score: float
+    flapping: bool
+    transitions: int
+    last_change: Optional[datetime] = None
+    recent: List[FlapTransition] = []
+
+# Optical Threshold Schemas
+class OpticalThresholdBase(BaseModel):
+    olt_id: Optional[int] = None
+    onu_model: Optional[str] = None
+    metric: OpticalMetric
+    major_low: Optional[float] = None
+    minor_low: Optional[float] = None
+    minor_high: Optional[float] = None
+    major_high: Optional[float] = None
+    hysteresis: float = Field(1.0, ge=0)
+
+class OpticalThresholdCreate(OpticalThresholdBase):
+    pass
+
+class OpticalThresholdUpdate(BaseModel):
+    major_low: Optional[float] = None
+    minor_low: Optional[float] = None
+    minor_high: Optional[float] = None
+    major_high: Optional[float] = None
+    hysteresis: Optional[float] = Field(None, ge=0)
+
+class OpticalThresholdResponse(OpticalThresholdBase):
+    id: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
 # PPPoE Schemas
 class PppoeAccountBase(BaseModel):
     username: str
@@ -255,6 +303,34 @@ class DashboardStats(BaseModel):
     major_alarms: int
     minor_alarms: int
 
+class PonSummary(BaseModel):
+    olt_id: int
+    pon_port: int  # -1: alarm level OLT yang tidak terkait ONU
+    onus_online: int
+    onus_offline: int
+    onus_unknown: int
+    alarms_critical: int
+    alarms_major: int
+    alarms_minor: int
+    alarms_warning: int
+    alarms_info: int
+
+    class Config:
+        from_attributes = True
+
+class OltSummary(BaseModel):
+    id: int
+    name: str
+    status: OltStatus
+    onus_online: int
+    onus_offline: int
+    onus_unknown: int
+    alarms_critical: int
+    alarms_major: int
+    alarms_minor: int
+    alarms_warning: int
+    alarms_info: int
+
 class OltPerformance(BaseModel):
     id: int
     name: str
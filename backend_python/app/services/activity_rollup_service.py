@@ -0,0 +1,90 @@
+"""
+File: services/activity_rollup_service.py
+
+Rollup harian activity log untuk statistik jangka panjang
+
+Fungsi utama:
+- Mengagregasi activity_logs per (hari, activity_type, user_id) ke tabel
+  activity_log_daily, sehingga statistik 90/365 hari tidak perlu membaca log mentah
+- Menentukan watermark: hari pertama yang belum di-rollup
+
+Alur kerja:
+1. refresh() mencari watermark = hari rollup terakhir + 1
+   (atau hari log tertua jika tabel rollup masih kosong)
+2. Hari-hari lengkap dari watermark sampai kemarin (UTC) diagregasi per chunk
+3. Baris hari yang diproses dihapus dulu lalu diisi ulang, sehingga refresh aman diulang
+
+Environment variables:
+- ACTIVITY_ROLLUP_CHUNK_DAYS: Jumlah hari per query agregasi (default 31)
+
+Catatan:
+- Hari berjalan (hari ini) tidak pernah di-rollup, statistik membaca log mentah
+  untuk bagian tersebut
+- Dijalankan berkala oleh background poller (app/tasks/poller.py)
+"""
+
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.models import ActivityLog, ActivityLogDaily
+
+ROLLUP_CHUNK_DAYS = int(os.getenv("ACTIVITY_ROLLUP_CHUNK_DAYS", "31"))
+
+def day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+class ActivityRollupService:
+    """Maintain the activity_log_daily rollup table"""
+
+    def watermark(self, db: Session) -> Optional[date]:
+        """First day not yet rolled up, None if there is nothing to roll up"""
+        last_day = db.scalar(select(func.max(ActivityLogDaily.day)))
+        if last_day is not None:
+            return last_day + timedelta(days=1)
+        first_log = db.scalar(select(func.min(ActivityLog.created_at)))
+        return first_log.date() if first_log is not None else None
+
+    def refresh(self, db: Session, today: Optional[date] = None) -> int:
+        """
+        Roll up every complete day after the watermark
+
+        Returns:
+            Jumlah hari yang di-rollup
+        """
+        today = today or datetime.utcnow().date()
+        start = self.watermark(db)
+        if start is None or start >= today:
+            return 0
+
+        day = start
+        while day < today:
+            chunk_end = min(day + timedelta(days=ROLLUP_CHUNK_DAYS), today)
+            self._rollup_range(db, day, chunk_end)
+            db.commit()
+            day = chunk_end
+        return (today - start).days
+
+    def _rollup_range(self, db: Session, start: date, end: date):
+        """Replace rollup rows for days in [start, end) with fresh aggregates"""
+        log_day = func.date(ActivityLog.created_at)
+        rows = db.execute(
+            select(log_day, ActivityLog.activity_type, ActivityLog.user_id, func.count(ActivityLog.id))
+            .where(ActivityLog.created_at >= day_start(start), ActivityLog.created_at < day_start(end))
+            .group_by(log_day, ActivityLog.activity_type, ActivityLog.user_id)
+        ).all()
+
+        db.execute(delete(ActivityLogDaily).where(ActivityLogDaily.day >= start, ActivityLogDaily.day < end))
+        db.add_all(
+            ActivityLogDaily(
+                # SQLite mengembalikan DATE() sebagai string
+                day=date.fromisoformat(day) if isinstance(day, str) else day,
+                activity_type=activity_type,
+                user_id=user_id,
+                count=count,
+            )
+            for day, activity_type, user_id, count in rows
+        )
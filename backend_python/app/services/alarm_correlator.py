@@ -0,0 +1,270 @@
+"""
+File: services/alarm_correlator.py
+
+Korelasi alarm untuk gangguan massal (putus feeder fiber / OLT mati)
+
+Fungsi utama:
+- Mengelompokkan transisi ONU offline per (olt_id, pon_port) dalam satu window waktu
+- PON LOS: jika banyak ONU pada satu PON turun bersamaan, dibuat satu alarm
+  pon_los (daftar ONU terdampak di details) dan alarm onu_down per ONU ditekan
+- OLT unreachable: OLT tidak merespon poll, atau ONU di beberapa PON turun
+  bersamaan, diringkas menjadi satu alarm olt_unreachable yang menekan
+  alarm onu_down dan pon_los milik OLT tsb
+
+Alur kerja (dipanggil AlarmBatch.commit setelah setiap sync / poll):
+1. Flush perubahan status ONU sehingga status_counters sudah terbaru
+2. Transisi offline dicatat ke window per PON, transisi online menghapusnya
+3. Per OLT: evaluasi olt_unreachable, lalu per PON evaluasi pon_los
+4. Raise onu_down yang tercakup alarm korelasi dibuang dari batch, alarm
+   onu_down yang sudah terbuka diberi status suppressed
+5. Saat alarm korelasi di-clear, ONU yang masih offline mendapat alarm
+   onu_down sendiri lagi (atau pon_los jika satu PON masih turun)
+6. Clear manual (POST /api/alarms/{id}/clear) lewat release: alarm di-clear
+   dan setiap ONU tercakup yang masih offline mendapat onu_down lagi
+
+Environment variables:
+- ALARM_CORRELATION_WINDOW: Window pengelompokan transisi dalam detik (default 120)
+- PON_LOS_MIN_ONUS: Minimal ONU turun pada satu PON untuk pon_los (default 4)
+- PON_LOS_RATIO: Minimal porsi ONU pada PON yang turun (default 0.5)
+- OLT_OUTAGE_MIN_PONS: Minimal PON terdampak untuk olt_unreachable (default 2)
+- OLT_OUTAGE_RATIO: Minimal porsi ONU pada OLT yang turun (default 0.8)
+
+Catatan:
+- Window transisi disimpan per process; poller berjalan di satu process (leader)
+- Jumlah ONU per PON dibaca dari status_counters, bukan COUNT(*) ke tabel onus
+"""
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Alarm, AlarmSeverity, AlarmStatus, Olt, OltStatus, Onu, OnuStatus, StatusCounter
+from app.services.alarm_manager import ONU_DOWN, OPEN_STATUSES, AlarmBatch, AlarmKey, alarm_key
+from app.services.counter_service import OLT_LEVEL_PON
+
+ALARM_CORRELATION_WINDOW = float(os.getenv("ALARM_CORRELATION_WINDOW", "120"))
+PON_LOS_MIN_ONUS = int(os.getenv("PON_LOS_MIN_ONUS", "4"))
+PON_LOS_RATIO = float(os.getenv("PON_LOS_RATIO", "0.5"))
+OLT_OUTAGE_MIN_PONS = int(os.getenv("OLT_OUTAGE_MIN_PONS", "2"))
+OLT_OUTAGE_RATIO = float(os.getenv("OLT_OUTAGE_RATIO", "0.8"))
+
+PON_LOS = "pon_los"
+OLT_UNREACHABLE = "olt_unreachable"
+
+# Batas jumlah ONU yang dicantumkan di details alarm
+MAX_AFFECTED_LISTED = 256
+
+PonKey = Tuple[int, int]
+
+def pon_los_key(olt_id: int, pon_port: int) -> AlarmKey:
+    return (PON_LOS, olt_id, pon_port, None)
+
+def olt_unreachable_key(olt_id: int) -> AlarmKey:
+    return (OLT_UNREACHABLE, olt_id, None, None)
+
+def _threshold(total: int, ratio: float) -> int:
+    return max(PON_LOS_MIN_ONUS, math.ceil(total * ratio))
+
+def _affected_details(onus: List[tuple]) -> str:
+    return json.dumps({
+        "affected_count": len(onus),
+        "affected_onus": [
+            {"id": onu_id, "serial_number": serial_number}
+            for onu_id, serial_number in onus[:MAX_AFFECTED_LISTED]
+        ],
+    })
+
+class AlarmCorrelator:
+    """Collapse per-ONU down transitions into PON LOS / OLT unreachable alarms"""
+
+    def __init__(self):
+        # (olt_id, pon_port) -> {onu_id: waktu transisi offline (monotonic)}
+        self._recent: Dict[PonKey, Dict[int, float]] = defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self._recent.clear()
+
+    def _record(self, batch: AlarmBatch, olt_ids: Set[int]) -> Dict[PonKey, Set[int]]:
+        """Add the batch transitions to the window, return recent down ONUs per PON of olt_ids"""
+        now = time.monotonic()
+        horizon = now - ALARM_CORRELATION_WINDOW
+        with self._lock:
+            for transition in batch.onu_transitions:
+                pon = (transition.olt_id, transition.pon_port)
+                if transition.status == OnuStatus.OFFLINE:
+                    self._recent[pon][transition.onu_id] = now
+                else:
+                    self._recent[pon].pop(transition.onu_id, None)
+            recent = {}
+            for pon in list(self._recent):
+                downs = {onu_id: at for onu_id, at in self._recent[pon].items() if at >= horizon}
+                if not downs:
+                    del self._recent[pon]
+                    continue
+                self._recent[pon] = downs
+                if pon[0] in olt_ids:
+                    recent[pon] = set(downs)
+            return recent
+
+    def correlate(self, db: Session, batch: AlarmBatch):
+        olt_ids = {t.olt_id for t in batch.onu_transitions} | set(batch.olt_transitions)
+        # Raise onu_down yang dilepas hold-down (storm_guard) juga dikorelasikan
+        olt_ids.update(
+            key[1] for key, pending in batch.pending().items()
+            if key[0] == ONU_DOWN and pending is not None and key[1] is not None
+        )
+        if not olt_ids:
+            return
+
+        # Status ONU dari batch ini ikut terhitung di status_counters
+        db.flush()
+        recent = self._record(batch, olt_ids)
+
+        counters: Dict[int, Dict[int, StatusCounter]] = defaultdict(dict)
+        for row in db.scalars(
+            select(StatusCounter).where(StatusCounter.olt_id.in_(olt_ids), StatusCounter.pon_port != OLT_LEVEL_PON)
+        ):
+            counters[row.olt_id][row.pon_port] = row
+
+        open_keys = {
+            alarm_key(row)
+            for row in db.execute(
+                select(Alarm.type, Alarm.olt_id, Alarm.pon_port, Alarm.onu_id).where(
+                    Alarm.type.in_((PON_LOS, OLT_UNREACHABLE)),
+                    Alarm.olt_id.in_(olt_ids),
+                    Alarm.status.in_(OPEN_STATUSES),
+                )
+            )
+        }
+        olts = {row.id: row for row in db.execute(select(Olt.id, Olt.name, Olt.status).where(Olt.id.in_(olt_ids)))}
+
+        for olt_id in olt_ids:
+            self._correlate_olt(db, batch, olt_id, olts.get(olt_id), counters[olt_id], recent, open_keys)
+
+    def _correlate_olt(self, db, batch, olt_id, olt, pons: Dict[int, StatusCounter], recent, open_keys):
+        key = olt_unreachable_key(olt_id)
+        status = batch.olt_transitions.get(olt_id) or (OltStatus(olt.status) if olt and olt.status else None)
+        name = olt.name if olt else str(olt_id)
+
+        total = sum(row.onus_online + row.onus_offline + row.onus_unknown for row in pons.values())
+        offline = sum(row.onus_offline for row in pons.values())
+        recent_pons = {pon: ids for (owner, pon), ids in recent.items() if owner == olt_id}
+        recent_count = sum(len(ids) for ids in recent_pons.values())
+        threshold = _threshold(total, OLT_OUTAGE_RATIO)
+
+        burst = len(recent_pons) >= OLT_OUTAGE_MIN_PONS and recent_count >= threshold
+        still_down = key in open_keys and offline >= threshold
+        if status == OltStatus.OFFLINE or burst or still_down:
+            new_downs = any(
+                t.olt_id == olt_id and t.status == OnuStatus.OFFLINE for t in batch.onu_transitions
+            )
+            if key not in open_keys or olt_id in batch.olt_transitions or new_downs:
+                reason = "not responding" if status == OltStatus.OFFLINE else f"{offline} of {total} ONUs offline"
+                batch.raise_alarm(
+                    OLT_UNREACHABLE, olt_id, None, AlarmSeverity.CRITICAL,
+                    f"OLT {name} unreachable ({reason})",
+                    details=json.dumps({"offline_onus": offline, "total_onus": total, "affected_pons": sorted(recent_pons)}),
+                )
+            # Semua alarm ONU / PON milik OLT ditekan oleh alarm OLT
+            for pending_key in list(batch.pending()):
+                if pending_key[1] == olt_id and pending_key[0] in (ONU_DOWN, PON_LOS) and batch.pending()[pending_key] is not None:
+                    batch.discard(pending_key, key)
+            batch.suppress(key, (Alarm.olt_id == olt_id) & Alarm.type.in_((ONU_DOWN, PON_LOS)))
+            return
+
+        restore = False
+        if key in open_keys:
+            batch.clear(OLT_UNREACHABLE, olt_id, None)
+            restore = True
+
+        self._correlate_pons(db, batch, olt_id, pons, recent_pons, open_keys, restore)
+
+    def _correlate_pons(self, db, batch, olt_id, pons, recent_pons, open_keys, restore: bool):
+        down: List[int] = []
+        restored: List[int] = []
+        for pon, row in pons.items():
+            key = pon_los_key(olt_id, pon)
+            total = row.onus_online + row.onus_offline + row.onus_unknown
+            threshold = _threshold(total, PON_LOS_RATIO)
+            burst = len(recent_pons.get(pon, ())) >= threshold
+            if burst or (row.onus_offline >= threshold and (key in open_keys or restore)):
+                down.append(pon)
+            elif key in open_keys:
+                batch.clear(PON_LOS, olt_id, None, pon_port=pon)
+                restored.append(pon)
+            elif restore and row.onus_offline:
+                restored.append(pon)
+
+        if not down and not restored:
+            return
+        offline = self._offline_onus(db, olt_id, down + restored)
+
+        for pon in down:
+            key = pon_los_key(olt_id, pon)
+            onus = offline.get(pon, [])
+            new_downs = recent_pons.get(pon, set())
+            for onu_id, _ in onus:
+                batch.discard((ONU_DOWN, olt_id, None, onu_id), key)
+            # Raise ulang hanya jika ada ONU baru turun, supaya occurrence_count
+            # tidak bertambah setiap siklus selama PON masih turun
+            if key not in open_keys or restore or any(
+                t.olt_id == olt_id and t.pon_port == pon and t.onu_id in new_downs for t in batch.onu_transitions
+            ):
+                batch.raise_alarm(
+                    PON_LOS, olt_id, None, AlarmSeverity.CRITICAL,
+                    f"PON {pon} LOS: {len(onus)} ONUs offline",
+                    details=_affected_details(onus),
+                    pon_port=pon,
+                )
+            batch.suppress(
+                key,
+                (Alarm.type == ONU_DOWN) & Alarm.onu_id.in_(
+                    select(Onu.id).where(Onu.olt_id == olt_id, Onu.pon_port == pon)
+                ),
+            )
+
+        # Alarm korelasi di-clear: ONU yang masih offline mendapat alarm sendiri lagi
+        for pon in restored:
+            for onu_id, serial_number in offline.get(pon, []):
+                # Bisa sudah di-raise oleh hold-down storm_guard di batch yang sama
+                if (ONU_DOWN, olt_id, None, onu_id) not in batch.pending():
+                    batch.raise_alarm(ONU_DOWN, olt_id, onu_id, AlarmSeverity.MAJOR, f"ONU {serial_number} is offline")
+
+    def release(self, db: Session, batch: AlarmBatch, alarm: Alarm):
+        """
+        Clear an alarm by hand; still offline ONUs it covered get their own onu_down back
+
+        pon_los / olt_unreachable mencakup semua ONU pada PON / OLT tsb, alarm
+        lain (mis. onu_flapping) hanya ONU yang alarm onu_down-nya ia tekan.
+        """
+        batch.clear(alarm.type, alarm.olt_id, alarm.onu_id, pon_port=alarm.pon_port)
+        query = select(Onu.id, Onu.serial_number).where(Onu.olt_id == alarm.olt_id, Onu.status == OnuStatus.OFFLINE)
+        if alarm.type == PON_LOS:
+            query = query.where(Onu.pon_port == alarm.pon_port)
+        elif alarm.type != OLT_UNREACHABLE:
+            query = query.where(Onu.id.in_(
+                select(Alarm.onu_id).where(Alarm.parent_id == alarm.id, Alarm.status == AlarmStatus.SUPPRESSED)
+            ))
+        for onu_id, serial_number in db.execute(query.order_by(Onu.id)):
+            batch.raise_alarm(ONU_DOWN, alarm.olt_id, onu_id, AlarmSeverity.MAJOR, f"ONU {serial_number} is offline")
+
+    def _offline_onus(self, db: Session, olt_id: int, pon_ports: Iterable[int]) -> Dict[int, List[tuple]]:
+        result: Dict[int, List[tuple]] = defaultdict(list)
+        rows = db.execute(
+            select(Onu.id, Onu.pon_port, Onu.serial_number)
+            .where(Onu.olt_id == olt_id, Onu.pon_port.in_(list(pon_ports)), Onu.status == OnuStatus.OFFLINE)
+            .order_by(Onu.id)
+        )
+        for onu_id, pon_port, serial_number in rows:
+            result[pon_port].append((onu_id, serial_number))
+        return result
+
+alarm_correlator = AlarmCorrelator()
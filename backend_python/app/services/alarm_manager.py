@@ -0,0 +1,400 @@
+"""
+File: services/alarm_manager.py
+
+Siklus hidup alarm: deduplikasi, auto-clear dan penulisan batch
+
+Fungsi utama:
+- Menyimpan index in-memory alarm terbuka (active / acknowledged) dengan key
+  (type, olt_id, pon_port, onu_id) -> id alarm
+- AlarmBatch: mengumpulkan raise / clear selama satu siklus poll lalu
+  menulisnya sekaligus dalam satu transaksi
+- Raise untuk key yang masih terbuka menaikkan occurrence_count dan
+  last_occurred_at, bukan menambah baris baru
+- Clear saat recovery (mis. ONU kembali online) menutup alarm terbuka untuk key tsb
+  beserta alarm yang ditekan (suppressed) olehnya
+- Suppress: alarm terbuka yang tercakup alarm korelasi (lihat alarm_correlator.py)
+  diberi status suppressed dan parent_id ke alarm korelasi tsb
+
+Alur kerja commit batch:
+1. Stage korelasi (alarm_correlator) mengubah raise per ONU menjadi alarm PON / OLT,
+   flap_detector mengganti alarm ONU yang flapping dengan onu_flapping,
+   lalu storm_guard menahan transisi baru (hold-down) dan membatasi raise per entity
+2. Key yang ada di index diverifikasi, key yang tidak ada dicari langsung di
+   database (fallback), semuanya dalam satu SELECT
+3. Alarm terbuka di-update (occurrence / clear), key tanpa alarm terbuka di-insert
+4. Commit satu kali, lalu index diperbarui dan cache dashboard di-invalidate
+
+Environment variables:
+- ALARM_INDEX_REFRESH_INTERVAL: Interval reload penuh index dari database
+  dalam detik (default 300)
+
+Catatan:
+- Index per process; alarm yang dibuat / di-clear process lain tetap
+  ditemukan oleh pencarian fallback ke database
+- pon_port pada key hanya diisi untuk alarm level PON, alarm ONU memakai None
+- Perubahan memakai ORM (bukan bulk UPDATE) supaya listener status_counters ikut berjalan
+- Dipakai oleh OltService.sync_onus / poll_olt dan background poller
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from app.cache import dashboard_cache
+from app.models import Alarm, AlarmSeverity, AlarmStatus, OltStatus, OnuStatus
+
+ALARM_INDEX_REFRESH_INTERVAL = int(os.getenv("ALARM_INDEX_REFRESH_INTERVAL", "300"))
+
+# Batas jumlah key per SELECT fallback
+LOOKUP_CHUNK = 500
+
+ONU_DOWN = "onu_down"
+
+AlarmKey = Tuple[str, Optional[int], Optional[int], Optional[int]]
+
+OPEN_STATUSES = (AlarmStatus.ACTIVE, AlarmStatus.ACKNOWLEDGED)
+
+def alarm_key(alarm) -> AlarmKey:
+    return (alarm.type, alarm.olt_id, alarm.pon_port, alarm.onu_id)
+
+def _matches(column, value):
+    return column == value if value is not None else column.is_(None)
+
+def _key_condition(key: AlarmKey):
+    alarm_type, olt_id, pon_port, onu_id = key
+    return and_(
+        Alarm.type == alarm_type,
+        _matches(Alarm.olt_id, olt_id),
+        _matches(Alarm.pon_port, pon_port),
+        _matches(Alarm.onu_id, onu_id),
+    )
+
+@dataclass
+class PendingRaise:
+    severity: AlarmSeverity
+    message: str
+    details: Optional[str]
+    count: int
+    first_at: datetime
+    last_at: datetime
+
+@dataclass
+class OnuTransition:
+    olt_id: int
+    pon_port: int
+    onu_id: int
+    serial_number: str
+    status: OnuStatus
+    at: datetime
+    # Waktu perubahan status sebelumnya (last_status_change lama), None jika belum pernah
+    since: Optional[datetime] = None
+
+@dataclass
+class BatchResult:
+    created: int = 0
+    repeated: int = 0
+    cleared: int = 0
+    suppressed: int = 0
+    rate_limited: int = 0
+    # Id alarm yang ditulis (insert / repeat) per key raise
+    ids: Dict[AlarmKey, int] = field(default_factory=dict)
+
+class AlarmBatch:
+    """Raise / clear requests collected during one poll cycle"""
+
+    def __init__(self, manager: "AlarmManager", olt_id: Optional[int] = None):
+        self.manager = manager
+        # OLT yang di-poll / sync oleh batch ini; hold-down onu_down (storm_guard) dievaluasi untuk OLT tsb
+        self.olt_id = olt_id
+        # Urutan dipertahankan; untuk key yang sama, aksi terakhir yang berlaku
+        self._actions: "OrderedDict[AlarmKey, Optional[PendingRaise]]" = OrderedDict()
+        # Alarm terbuka yang cocok dengan condition ditekan oleh alarm parent key
+        self._suppressions: List[Tuple[AlarmKey, object]] = []
+        # Perubahan status ONU / OLT untuk stage korelasi
+        self.onu_transitions: List[OnuTransition] = []
+        self.olt_transitions: Dict[int, OltStatus] = {}
+        # Key yang dibuang dari batch -> key alarm yang mewakilinya (None: ditahan / dibatasi)
+        self.discarded: Dict[AlarmKey, Optional[AlarmKey]] = {}
+
+    def __len__(self) -> int:
+        return len(self._actions) + len(self._suppressions)
+
+    def raise_alarm(
+        self,
+        alarm_type: str,
+        olt_id: Optional[int],
+        onu_id: Optional[int],
+        severity: AlarmSeverity,
+        message: str,
+        details: Optional[str] = None,
+        at: Optional[datetime] = None,
+        pon_port: Optional[int] = None,
+    ):
+        at = at or datetime.utcnow()
+        key = (alarm_type, olt_id, pon_port, onu_id)
+        self.discarded.pop(key, None)
+        pending = self._actions.get(key)
+        if pending is None:
+            self._actions[key] = PendingRaise(severity, message, details, 1, at, at)
+        else:
+            pending.count += 1
+            pending.last_at = at
+            pending.severity, pending.message, pending.details = severity, message, details
+        self._actions.move_to_end(key)
+
+    def clear(self, alarm_type: str, olt_id: Optional[int], onu_id: Optional[int], pon_port: Optional[int] = None):
+        key = (alarm_type, olt_id, pon_port, onu_id)
+        self.discarded.pop(key, None)
+        self._actions[key] = None
+        self._actions.move_to_end(key)
+
+    def restore(self, key: AlarmKey, pending: PendingRaise):
+        """Queue a raise that was held back earlier (see storm_guard)"""
+        self.discarded.pop(key, None)
+        self._actions[key] = pending
+        self._actions.move_to_end(key)
+
+    def discard(self, key: AlarmKey, parent: Optional[AlarmKey] = None):
+        """Drop a pending raise / clear for key, parent is the alarm that covers it (if any)"""
+        if self._actions.pop(key, None) is not None:
+            self.discarded[key] = parent
+
+    def pending(self) -> Dict[AlarmKey, Optional[PendingRaise]]:
+        return self._actions
+
+    def suppress(self, parent: AlarmKey, condition):
+        """Suppress every open alarm matching condition under the alarm of parent key"""
+        self._suppressions.append((parent, condition))
+
+    def onu_status_changed(self, onu, old_status, new_status):
+        """
+        Raise onu_down when an ONU goes offline, clear it when the ONU is back online
+
+        last_status_change ONU ikut diperbarui; storm_guard menghitung hold-down dari kolom tsb.
+        """
+        old_status = OnuStatus(old_status) if old_status is not None else None
+        new_status = OnuStatus(new_status)
+        if old_status == new_status:
+            return
+        at = datetime.utcnow()
+        since = onu.last_status_change
+        onu.last_status_change = at
+        if new_status == OnuStatus.OFFLINE:
+            self.raise_alarm(ONU_DOWN, onu.olt_id, onu.id, AlarmSeverity.MAJOR, f"ONU {onu.serial_number} is offline")
+        elif new_status == OnuStatus.ONLINE:
+            self.clear(ONU_DOWN, onu.olt_id, onu.id)
+        else:
+            return
+        self.onu_transitions.append(
+            OnuTransition(onu.olt_id, onu.pon_port, onu.id, onu.serial_number, new_status, at, since)
+        )
+
+    def olt_status_changed(self, olt_id: int, old_status, new_status):
+        """Record an OLT reachability change for the correlation stage"""
+        old_status = OltStatus(old_status) if old_status is not None else None
+        new_status = OltStatus(new_status)
+        if old_status != new_status and new_status in (OltStatus.ONLINE, OltStatus.OFFLINE):
+            self.olt_transitions[olt_id] = new_status
+
+    def commit(self, db: Session) -> BatchResult:
+        """Correlate, write every collected action and commit the session (including pending changes)"""
+        from app.services.alarm_correlator import alarm_correlator
+        from app.services.flap_detector import flap_detector
+        from app.services.storm_guard import storm_guard
+
+        storm_guard.release_due(db, self)
+        alarm_correlator.correlate(db, self)
+        flap_detector.observe(db, self)
+        rate_limited = storm_guard.filter(self)
+        result = self.manager.apply(db, self._actions, self._suppressions)
+        result.rate_limited = rate_limited
+        return result
+
+    def write(self, db: Session) -> BatchResult:
+        """Write the collected actions as they are, without correlation / storm guard (manual operator actions)"""
+        return self.manager.apply(db, self._actions, self._suppressions)
+
+class AlarmManager:
+    """Process-wide index of open alarms keyed by (type, olt_id, pon_port, onu_id)"""
+
+    def __init__(self):
+        self._index: Dict[AlarmKey, int] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def batch(self, olt_id: Optional[int] = None) -> AlarmBatch:
+        return AlarmBatch(self, olt_id)
+
+    def ensure_loaded(self, db: Session):
+        """Load (or periodically reload) the index of open alarms"""
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < ALARM_INDEX_REFRESH_INTERVAL:
+            return
+        rows = db.execute(
+            select(Alarm.id, Alarm.type, Alarm.olt_id, Alarm.pon_port, Alarm.onu_id)
+            .where(Alarm.status.in_(OPEN_STATUSES))
+            .order_by(Alarm.id)
+        ).all()
+        with self._lock:
+            # Jika ada duplikasi lama, alarm terbaru yang menjadi acuan
+            self._index = {(row.type, row.olt_id, row.pon_port, row.onu_id): row.id for row in rows}
+            self._loaded_at = time.monotonic()
+
+    def get(self, key: AlarmKey) -> Optional[int]:
+        with self._lock:
+            return self._index.get(key)
+
+    def find_open(self, db: Session, key: AlarmKey) -> Optional[Alarm]:
+        """Newest open alarm for key"""
+        alarms = self._open_alarms(db, [key]).get(key)
+        return alarms[-1] if alarms else None
+
+    def invalidate(self):
+        """Force a reload on next use"""
+        with self._lock:
+            self._loaded_at = None
+
+    def _open_alarms(self, db: Session, keys: List[AlarmKey]) -> Dict[AlarmKey, List[Alarm]]:
+        """Open alarms for keys: indexed ids by primary key, the rest looked up by key"""
+        with self._lock:
+            known_ids = [self._index[key] for key in keys if key in self._index]
+            unknown = [key for key in keys if key not in self._index]
+
+        conditions = []
+        if known_ids:
+            conditions.append(Alarm.id.in_(known_ids))
+        for start in range(0, len(unknown), LOOKUP_CHUNK):
+            chunk = unknown[start:start + LOOKUP_CHUNK]
+            conditions.append(or_(*(_key_condition(key) for key in chunk)))
+
+        found: Dict[AlarmKey, List[Alarm]] = {}
+        for condition in conditions:
+            alarms = db.scalars(
+                select(Alarm).where(condition, Alarm.status.in_(OPEN_STATUSES)).order_by(Alarm.id)
+            ).all()
+            for alarm in alarms:
+                found.setdefault(alarm_key(alarm), []).append(alarm)
+
+        # Alarm terindex yang sudah di-clear di luar manager (mis. lewat API):
+        # cek lagi apakah masih ada alarm terbuka lain untuk key tsb
+        unknown_keys = set(unknown)
+        stale = [key for key in keys if key not in found and key not in unknown_keys]
+        for start in range(0, len(stale), LOOKUP_CHUNK):
+            chunk = stale[start:start + LOOKUP_CHUNK]
+            alarms = db.scalars(
+                select(Alarm)
+                .where(or_(*(_key_condition(key) for key in chunk)), Alarm.status.in_(OPEN_STATUSES))
+                .order_by(Alarm.id)
+            ).all()
+            for alarm in alarms:
+                found.setdefault(alarm_key(alarm), []).append(alarm)
+        return found
+
+    def apply(
+        self,
+        db: Session,
+        actions: "OrderedDict[AlarmKey, Optional[PendingRaise]]",
+        suppressions: List[Tuple[AlarmKey, object]] = (),
+    ) -> BatchResult:
+        result = BatchResult()
+        if not actions and not suppressions:
+            db.commit()
+            return result
+
+        self.ensure_loaded(db)
+        keys = list(dict.fromkeys([*actions, *(parent for parent, _ in suppressions)]))
+        open_alarms = self._open_alarms(db, keys)
+        now = datetime.utcnow()
+        closed: List[AlarmKey] = []
+        cleared_ids: List[int] = []
+        raised: List[AlarmKey] = []
+
+        for key, pending in actions.items():
+            existing = open_alarms.get(key, [])
+            if pending is None:
+                for alarm in existing:
+                    alarm.status = AlarmStatus.CLEARED
+                    alarm.cleared_at = now
+                    cleared_ids.append(alarm.id)
+                    result.cleared += 1
+                open_alarms.pop(key, None)
+                closed.append(key)
+            elif existing:
+                raised.append(key)
+                alarm = existing[-1]
+                alarm.occurrence_count = (alarm.occurrence_count or 1) + pending.count
+                alarm.last_occurred_at = pending.last_at
+                alarm.severity = pending.severity
+                alarm.message = pending.message
+                if pending.details is not None:
+                    alarm.details = pending.details
+                result.repeated += 1
+            else:
+                raised.append(key)
+                alarm_type, olt_id, pon_port, onu_id = key
+                alarm = Alarm(
+                    type=alarm_type,
+                    olt_id=olt_id,
+                    pon_port=pon_port,
+                    onu_id=onu_id,
+                    severity=pending.severity,
+                    message=pending.message,
+                    details=pending.details,
+                    status=AlarmStatus.ACTIVE,
+                    occurred_at=pending.first_at,
+                    occurrence_count=pending.count,
+                    last_occurred_at=pending.last_at if pending.count > 1 else None,
+                )
+                db.add(alarm)
+                open_alarms[key] = [alarm]
+                result.created += 1
+
+        try:
+            # Alarm yang ditekan oleh alarm yang di-clear ikut di-clear
+            if cleared_ids:
+                children = db.scalars(
+                    select(Alarm).where(Alarm.parent_id.in_(cleared_ids), Alarm.status == AlarmStatus.SUPPRESSED)
+                ).all()
+                for child in children:
+                    child.status = AlarmStatus.CLEARED
+                    child.cleared_at = now
+
+            db.flush()
+            if suppressions:
+                for parent_key, condition in suppressions:
+                    parents = open_alarms.get(parent_key)
+                    if not parents:
+                        continue
+                    parent_id = parents[-1].id
+                    children = db.scalars(
+                        select(Alarm).where(condition, Alarm.status.in_(OPEN_STATUSES), Alarm.id != parent_id)
+                    ).all()
+                    for alarm in children:
+                        alarm.status = AlarmStatus.SUPPRESSED
+                        alarm.parent_id = parent_id
+                        closed.append(alarm_key(alarm))
+                        result.suppressed += 1
+
+            # Id dibaca sebelum commit (setelah commit object di-expire)
+            opened = {key: alarms[-1].id for key, alarms in open_alarms.items()}
+            result.ids = {key: opened[key] for key in raised}
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.invalidate()
+            raise
+
+        with self._lock:
+            self._index.update(opened)
+            for key in closed:
+                self._index.pop(key, None)
+        if result.created or result.cleared or result.suppressed:
+            dashboard_cache.invalidate()
+        return result
+
+alarm_manager = AlarmManager()
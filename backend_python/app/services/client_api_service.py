@@ -2,10 +2,12 @@
 Service untuk integrasi dengan API Client
 API Client: http://165.99.239.14:1661
 """
-import requests
 from typing import Dict, List, Optional
 from datetime import datetime
 import logging
+from app.lazy import lazy_import
+
+requests = lazy_import("requests")
 
 logger = logging.getLogger(__name__)
 
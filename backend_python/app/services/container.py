@@ -0,0 +1,65 @@
+"""
+File: services/container.py
+
+Container service bersama untuk seluruh process
+
+Fungsi utama:
+- Menyediakan satu instance per service (SNMP, SSH, ZTE API, OLT, Client API)
+  yang dipakai bersama oleh semua router dan background poller
+- Instance dibuat saat pertama kali diakses (lazy), bukan saat import
+
+Catatan:
+- Sebelumnya setiap router membuat SnmpService() / OltService() sendiri saat
+  import, sehingga startup ikut memuat library protokol yang berat
+- OltService memakai instance SNMP/SSH/ZTE API yang sama dari container
+- reset() mengosongkan container (dipanggil saat shutdown)
+"""
+import threading
+from typing import Any, Callable, Dict
+
+class ServiceContainer:
+    """Lazily constructed, process-wide service instances"""
+
+    def __init__(self):
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = self._instances[name] = factory()
+        return instance
+
+    @property
+    def snmp(self):
+        from app.services.snmp_service import SnmpService
+        return self._get("snmp", SnmpService)
+
+    @property
+    def ssh(self):
+        from app.services.ssh_service import SshService
+        return self._get("ssh", SshService)
+
+    @property
+    def zte_api(self):
+        from app.services.zte_api_service import ZteApiService
+        return self._get("zte_api", ZteApiService)
+
+    @property
+    def olt(self):
+        from app.services.olt_service import OltService
+        return self._get("olt", lambda: OltService(snmp=self.snmp, ssh=self.ssh, zte_api=self.zte_api))
+
+    @property
+    def client_api(self):
+        from app.services.client_api_service import ClientApiService
+        return self._get("client_api", ClientApiService)
+
+    def reset(self):
+        with self._lock:
+            self._instances.clear()
+
+services = ServiceContainer()
@@ -0,0 +1,280 @@
+"""
+File: services/counter_service.py
+
+Counter status ONU dan alarm aktif per OLT/PON yang dipelihara secara inkremental
+
+Fungsi utama:
+- Menjaga tabel status_counters tetap sesuai dengan tabel onus dan alarms
+  tanpa perlu COUNT(*) ke seluruh tabel setiap kali dashboard/maps dibuka
+- Menyediakan query agregat (total, per OLT, per PON) di atas tabel counter
+- Rekonsiliasi berkala untuk memperbaiki drift
+
+Alur kerja:
+1. Listener before_flush pada Session membaca perubahan object Onu dan Alarm
+   (insert, perubahan status/severity/port, delete) di dalam flush
+2. Perubahan diubah menjadi delta per (olt_id, pon_port) lalu di-upsert ke
+   status_counters pada transaksi yang sama, sehingga counter ikut commit/rollback
+3. reconcile() menghitung ulang dari tabel sumber dan menimpa baris yang berbeda
+
+Catatan:
+- ONU dikelompokkan per (olt_id, pon_port)
+- Alarm aktif (status ACTIVE) dihitung pada PON milik ONU-nya, pada pon_port
+  alarm untuk alarm level PON (pon_los), atau pada pon_port OLT_LEVEL_PON (-1)
+  jika alarm tidak terkait ONU maupun PON
+- Bulk UPDATE/DELETE (query.update/delete) tidak melewati listener, perubahannya
+  baru terlihat setelah reconcile berikutnya
+"""
+
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models import (
+    Alarm, AlarmSeverity, AlarmStatus, Olt, Onu, OnuStatus, StatusCounter
+)
+
+OLT_LEVEL_PON = -1
+
+ONU_COLUMNS = {
+    OnuStatus.ONLINE: "onus_online",
+    OnuStatus.OFFLINE: "onus_offline",
+    OnuStatus.UNKNOWN: "onus_unknown",
+}
+ALARM_COLUMNS = {
+    AlarmSeverity.CRITICAL: "alarms_critical",
+    AlarmSeverity.MAJOR: "alarms_major",
+    AlarmSeverity.MINOR: "alarms_minor",
+    AlarmSeverity.WARNING: "alarms_warning",
+    AlarmSeverity.INFO: "alarms_info",
+}
+COUNTER_COLUMNS = tuple(ONU_COLUMNS.values()) + tuple(ALARM_COLUMNS.values())
+
+# Atribut yang menentukan counter mana yang dihitung oleh sebuah ONU/alarm
+ONU_ATTRS = ("olt_id", "pon_port", "status")
+ALARM_ATTRS = ("olt_id", "onu_id", "status", "severity", "pon_port")
+
+CounterKey = Tuple[int, int]
+Deltas = Dict[CounterKey, Dict[str, int]]
+
+def _enum(enum_cls, value):
+    """Normalize a str/enum column value, None if missing or invalid"""
+    if value is None:
+        return None
+    try:
+        return enum_cls(value)
+    except ValueError:
+        return None
+
+def _old_value(obj, attr: str):
+    """Value of attr as currently stored in the database"""
+    history = inspect(obj).attrs[attr].history
+    if history.has_changes():
+        return history.deleted[0] if history.deleted else None
+    return getattr(obj, attr)
+
+def _onu_entry(olt_id, pon_port, status) -> Optional[Tuple[CounterKey, str]]:
+    if olt_id is None or pon_port is None:
+        return None
+    status = _enum(OnuStatus, status) or OnuStatus.UNKNOWN
+    return (olt_id, pon_port), ONU_COLUMNS[status]
+
+def _alarm_entry(session: Session, olt_id, onu_id, status, severity, pon_port=None) -> Optional[Tuple[CounterKey, str]]:
+    if olt_id is None or (_enum(AlarmStatus, status) or AlarmStatus.ACTIVE) != AlarmStatus.ACTIVE:
+        return None
+    severity = _enum(AlarmSeverity, severity) or AlarmSeverity.WARNING
+    if pon_port is None:
+        pon_port = OLT_LEVEL_PON
+    if onu_id is not None:
+        onu = session.get(Onu, onu_id)
+        if onu is not None:
+            pon_port = onu.pon_port
+    return (olt_id, pon_port), ALARM_COLUMNS[severity]
+
+def _entry(session: Session, obj, read) -> Optional[Tuple[CounterKey, str]]:
+    """Counter (key, column) an Onu/Alarm contributes to, reading attributes with read"""
+    if isinstance(obj, Onu):
+        return _onu_entry(*(read(obj, attr) for attr in ONU_ATTRS))
+    return _alarm_entry(session, *(read(obj, attr) for attr in ALARM_ATTRS))
+
+def _collect_deltas(session: Session) -> Tuple[Deltas, set]:
+    deltas: Deltas = defaultdict(lambda: defaultdict(int))
+    deleted_olts = {obj.id for obj in session.deleted if isinstance(obj, Olt)}
+
+    def add(entry, amount):
+        if entry is not None and entry[0][0] not in deleted_olts:
+            key, column = entry
+            deltas[key][column] += amount
+
+    for obj in session.new:
+        if isinstance(obj, (Onu, Alarm)):
+            add(_entry(session, obj, getattr), 1)
+
+    for obj in session.dirty:
+        if isinstance(obj, (Onu, Alarm)):
+            old, new = _entry(session, obj, _old_value), _entry(session, obj, getattr)
+            if old != new:
+                add(old, -1)
+                add(new, 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, (Onu, Alarm)):
+            add(_entry(session, obj, _old_value), -1)
+
+    return deltas, deleted_olts
+
+def _upsert(connection, key: CounterKey, changes: Dict[str, int]):
+    """Add changes to the counter row of key, creating the row if needed"""
+    table = StatusCounter.__table__
+    olt_id, pon_port = key
+    increments = {column: table.c[column] + amount for column, amount in changes.items()}
+    increments["updated_at"] = func.now()
+    values = dict({column: 0 for column in COUNTER_COLUMNS}, olt_id=olt_id, pon_port=pon_port, **changes)
+
+    dialect = connection.dialect.name
+    if dialect == "mysql":
+        connection.execute(mysql_insert(table).values(values).on_duplicate_key_update(**increments))
+    elif dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        connection.execute(
+            insert(table).values(values).on_conflict_do_update(
+                index_elements=["olt_id", "pon_port"], set_=increments
+            )
+        )
+    else:
+        result = connection.execute(
+            update(table).where(table.c.olt_id == olt_id, table.c.pon_port == pon_port).values(**increments)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(values))
+
+@event.listens_for(Session, "before_flush")
+def _update_counters(session: Session, flush_context, instances):
+    tracked = (Onu, Alarm, Olt)
+    if not any(isinstance(obj, tracked) for group in (session.new, session.dirty, session.deleted) for obj in group):
+        return
+
+    with session.no_autoflush:
+        deltas, deleted_olts = _collect_deltas(session)
+        connection = session.connection()
+        for key, changes in deltas.items():
+            changes = {column: amount for column, amount in changes.items() if amount}
+            if changes:
+                _upsert(connection, key, changes)
+        if deleted_olts:
+            table = StatusCounter.__table__
+            connection.execute(table.delete().where(table.c.olt_id.in_(deleted_olts)))
+
+def _load_old_value(target, value, oldvalue, initiator):
+    pass
+
+# active_history: nilai lama dimuat saat atribut di-set, supaya history di
+# before_flush tetap punya nilai lama walaupun atribut sudah di-expire setelah commit
+for _attr in ONU_ATTRS:
+    event.listen(getattr(Onu, _attr), "set", _load_old_value, active_history=True)
+for _attr in ALARM_ATTRS:
+    event.listen(getattr(Alarm, _attr), "set", _load_old_value, active_history=True)
+
+class CounterService:
+    """
+    Query dan rekonsiliasi tabel status_counters
+
+    Semua query dikembalikan sebagai statement select() sehingga bisa dipakai
+    oleh Session sync maupun AsyncSession.
+    """
+
+    @staticmethod
+    def totals_query():
+        """Fleet-wide ONU status and active alarm counts (one row)"""
+        c = StatusCounter
+        return select(
+            func.coalesce(func.sum(c.onus_online + c.onus_offline + c.onus_unknown), 0).label("total_onus"),
+            func.coalesce(func.sum(c.onus_online), 0).label("online_onus"),
+            func.coalesce(func.sum(c.onus_offline), 0).label("offline_onus"),
+            func.coalesce(func.sum(
+                c.alarms_critical + c.alarms_major + c.alarms_minor + c.alarms_warning + c.alarms_info
+            ), 0).label("active_alarms"),
+            func.coalesce(func.sum(c.alarms_critical), 0).label("critical_alarms"),
+            func.coalesce(func.sum(c.alarms_major), 0).label("major_alarms"),
+            func.coalesce(func.sum(c.alarms_minor), 0).label("minor_alarms"),
+        )
+
+    @staticmethod
+    def per_olt_query():
+        """Counter columns summed per OLT, one row per olt_id"""
+        c = StatusCounter
+        return select(
+            c.olt_id,
+            *(func.sum(getattr(c, column)).label(column) for column in COUNTER_COLUMNS),
+        ).group_by(c.olt_id)
+
+    @staticmethod
+    def per_pon_query(olt_id: int):
+        """Counter rows of one OLT ordered by PON port"""
+        return select(StatusCounter).where(StatusCounter.olt_id == olt_id).order_by(StatusCounter.pon_port)
+
+    def count_from_source(self, db: Session) -> Dict[CounterKey, Dict[str, int]]:
+        """Recompute all counters from the onus and alarms tables"""
+        counts: Dict[CounterKey, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(COUNTER_COLUMNS, 0))
+
+        onu_rows = db.execute(
+            select(Onu.olt_id, Onu.pon_port, Onu.status, func.count(Onu.id))
+            .group_by(Onu.olt_id, Onu.pon_port, Onu.status)
+        )
+        for olt_id, pon_port, status, total in onu_rows:
+            entry = _onu_entry(olt_id, pon_port, status)
+            if entry is not None:
+                counts[entry[0]][entry[1]] += total
+
+        alarm_pon = func.coalesce(Onu.pon_port, Alarm.pon_port, OLT_LEVEL_PON)
+        alarm_rows = db.execute(
+            select(Alarm.olt_id, alarm_pon, Alarm.severity, func.count(Alarm.id))
+            .outerjoin(Onu, Alarm.onu_id == Onu.id)
+            .where(Alarm.status == AlarmStatus.ACTIVE, Alarm.olt_id.isnot(None))
+            .group_by(Alarm.olt_id, alarm_pon, Alarm.severity)
+        )
+        for olt_id, pon_port, severity, total in alarm_rows:
+            severity = _enum(AlarmSeverity, severity) or AlarmSeverity.WARNING
+            counts[(olt_id, pon_port)][ALARM_COLUMNS[severity]] += total
+
+        return counts
+
+    def reconcile(self, db: Session) -> int:
+        """
+        Rewrite counter rows that drifted from the source tables
+
+        Baris counter dikunci (SELECT ... FOR UPDATE) sebelum menghitung ulang,
+        sehingga penulis yang sedang berjalan selesai dulu dan penulis baru
+        menunggu sampai rekonsiliasi commit.
+
+        Returns:
+            Jumlah baris counter yang diperbaiki
+        """
+        stored = {
+            (row.olt_id, row.pon_port): row
+            for row in db.scalars(select(StatusCounter).with_for_update())
+        }
+        actual = self.count_from_source(db)
+
+        drifted = 0
+        for key, counts in actual.items():
+            row = stored.pop(key, None)
+            if row is None:
+                db.add(StatusCounter(olt_id=key[0], pon_port=key[1], **counts))
+                drifted += 1
+            elif any(getattr(row, column) != value for column, value in counts.items()):
+                for column, value in counts.items():
+                    setattr(row, column, value)
+                drifted += 1
+
+        for row in stored.values():
+            if any(getattr(row, column) for column in COUNTER_COLUMNS):
+                drifted += 1
+            db.delete(row)
+
+        db.commit()
+        return drifted
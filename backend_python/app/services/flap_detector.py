@@ -0,0 +1,230 @@
+"""
+File: services/flap_detector.py
+
+Deteksi ONU flapping (bolak-balik online / offline) dengan hysteresis
+
+Fungsi utama:
+- Per ONU: ring buffer transisi terakhir (deque maxlen FLAP_HISTORY_SIZE) dan
+  flap score yang meluruh eksponensial (half-life FLAP_HALF_LIFE). Setiap
+  transisi: score = score * 0.5^(dt / half_life) + 1, biaya O(1)
+- Hysteresis: ONU ditandai flapping saat score >= FLAP_THRESHOLD dan baru
+  dilepas saat score turun di bawah FLAP_REUSE_THRESHOLD, sehingga status
+  flapping tidak ikut bolak-balik
+- ONU flapping mendapat satu alarm onu_flapping; alarm onu_down ONU tsb ditekan
+  (suppressed) dan raise / clear onu_down berikutnya tidak ditulis
+- Ranking ONU terburuk dengan heapq.nlargest untuk /api/monitoring/flapping
+
+Alur kerja (dipanggil AlarmBatch.commit setelah korelasi):
+1. Setiap transisi ONU masuk ring buffer + score, dan ditulis ke tabel
+   onu_status_history pada transaksi batch yang sama (backup di storage)
+2. Score melewati FLAP_THRESHOLD -> raise onu_flapping
+3. ONU yang sedang flapping dicek ulang setiap commit; score di bawah
+   FLAP_REUSE_THRESHOLD -> clear onu_flapping, dan jika ONU masih offline
+   alarm onu_down-nya dibuat lagi
+4. Saat pertama dipakai (atau process restart), state dibangun ulang dari
+   onu_status_history dalam window FLAP_HISTORY_WINDOW
+
+Environment variables:
+- FLAP_HALF_LIFE: Half-life flap score dalam detik (default 900)
+- FLAP_THRESHOLD: Score untuk mulai menandai flapping (default 4)
+- FLAP_REUSE_THRESHOLD: Score untuk melepas tanda flapping (default 1.5)
+- FLAP_HISTORY_SIZE: Jumlah transisi yang disimpan per ONU (default 16)
+- FLAP_RELOAD_INTERVAL: Process yang tidak melakukan polling memuat ulang state
+  dari database paling sering setiap N detik (default 30)
+
+Catatan:
+- Waktu memakai datetime UTC naive, sama dengan kolom created_at yang ditulis
+- Process API (tanpa poller) membaca state dari onu_status_history, bukan dari memori poller
+"""
+import heapq
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Alarm, AlarmSeverity, Onu, OnuStatus, OnuStatusHistory
+from app.services.alarm_manager import ONU_DOWN, OPEN_STATUSES, AlarmBatch
+
+FLAP_HALF_LIFE = float(os.getenv("FLAP_HALF_LIFE", "900"))
+FLAP_THRESHOLD = float(os.getenv("FLAP_THRESHOLD", "4"))
+FLAP_REUSE_THRESHOLD = float(os.getenv("FLAP_REUSE_THRESHOLD", "1.5"))
+FLAP_HISTORY_SIZE = int(os.getenv("FLAP_HISTORY_SIZE", "16"))
+FLAP_RELOAD_INTERVAL = float(os.getenv("FLAP_RELOAD_INTERVAL", "30"))
+
+# Transisi yang lebih tua dari ini sudah meluruh < 1/16, tidak perlu dimuat ulang
+FLAP_HISTORY_WINDOW = timedelta(seconds=FLAP_HALF_LIFE * 4)
+
+ONU_FLAPPING = "onu_flapping"
+
+class OnuFlapState:
+    __slots__ = ("onu_id", "olt_id", "serial_number", "score", "updated_at", "flagged", "transitions", "history")
+
+    def __init__(self, onu_id: int, olt_id: int, serial_number: str):
+        self.onu_id = onu_id
+        self.olt_id = olt_id
+        self.serial_number = serial_number
+        self.score = 0.0
+        self.updated_at: Optional[datetime] = None
+        self.flagged = False
+        self.transitions = 0
+        self.history = deque(maxlen=FLAP_HISTORY_SIZE)
+
+    def decayed(self, now: datetime) -> float:
+        if self.updated_at is None:
+            return 0.0
+        elapsed = max(0.0, (now - self.updated_at).total_seconds())
+        return self.score * 0.5 ** (elapsed / FLAP_HALF_LIFE)
+
+    def add(self, status: OnuStatus, at: datetime):
+        self.score = self.decayed(at) + 1
+        self.updated_at = at
+        self.transitions += 1
+        self.history.append((at, status))
+
+    @property
+    def last_status(self) -> Optional[OnuStatus]:
+        return self.history[-1][1] if self.history else None
+
+    def as_dict(self, now: datetime) -> dict:
+        return {
+            "onu_id": self.onu_id,
+            "olt_id": self.olt_id,
+            "serial_number": self.serial_number,
+            "score": round(self.decayed(now), 3),
+            "flapping": self.flagged,
+            "transitions": self.transitions,
+            "last_change": self.updated_at,
+            "recent": [{"at": at, "status": status} for at, status in self.history],
+        }
+
+class FlapDetector:
+    """Per-ONU transition ring buffers and decaying flap scores"""
+
+    def __init__(self):
+        self._states: Dict[int, OnuFlapState] = {}
+        self._flagged: Set[int] = set()
+        self._loaded_at: Optional[float] = None
+        self._observed_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def load(self, db: Session):
+        """Rebuild every ring buffer and score from onu_status_history"""
+        since = datetime.utcnow() - FLAP_HISTORY_WINDOW
+        rows = db.execute(
+            select(
+                OnuStatusHistory.onu_id, OnuStatusHistory.status, OnuStatusHistory.created_at,
+                Onu.olt_id, Onu.serial_number,
+            )
+            .join(Onu, Onu.id == OnuStatusHistory.onu_id)
+            .where(OnuStatusHistory.created_at >= since)
+            .order_by(OnuStatusHistory.created_at, OnuStatusHistory.id)
+        )
+        states: Dict[int, OnuFlapState] = {}
+        for onu_id, status, created_at, olt_id, serial_number in rows:
+            state = states.get(onu_id)
+            if state is None:
+                state = states[onu_id] = OnuFlapState(onu_id, olt_id, serial_number)
+            state.add(OnuStatus(status), created_at)
+
+        # Tanda flapping mengikuti alarm onu_flapping yang masih terbuka
+        flagged = set(db.scalars(
+            select(Alarm.onu_id).where(Alarm.type == ONU_FLAPPING, Alarm.status.in_(OPEN_STATUSES))
+        ))
+        flagged &= set(states)
+        for onu_id in flagged:
+            states[onu_id].flagged = True
+
+        with self._lock:
+            self._states = states
+            self._flagged = flagged
+            self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self, db: Session):
+        if self._loaded_at is None:
+            self.load(db)
+
+    def refresh(self, db: Session):
+        """Reload from storage when another process is doing the polling"""
+        now = time.monotonic()
+        observed_recently = self._observed_at is not None and now - self._observed_at < FLAP_RELOAD_INTERVAL
+        if self._loaded_at is None or (not observed_recently and now - self._loaded_at >= FLAP_RELOAD_INTERVAL):
+            self.load(db)
+
+    def observe(self, db: Session, batch: AlarmBatch):
+        """Feed the batch transitions, flag / unflag flapping ONUs and adjust the batch alarms"""
+        self.ensure_loaded(db)
+        self._observed_at = time.monotonic()
+        now = datetime.utcnow()
+        history = []
+
+        with self._lock:
+            for transition in batch.onu_transitions:
+                state = self._states.get(transition.onu_id)
+                if state is None:
+                    state = self._states[transition.onu_id] = OnuFlapState(
+                        transition.onu_id, transition.olt_id, transition.serial_number
+                    )
+                state.add(transition.status, transition.at)
+                history.append({"onu_id": transition.onu_id, "status": transition.status, "created_at": transition.at})
+
+                if not state.flagged and state.score >= FLAP_THRESHOLD:
+                    state.flagged = True
+                    self._flagged.add(state.onu_id)
+                    key = (ONU_FLAPPING, state.olt_id, None, state.onu_id)
+                    batch.raise_alarm(
+                        ONU_FLAPPING, state.olt_id, state.onu_id, AlarmSeverity.MINOR,
+                        f"ONU {state.serial_number} is flapping",
+                        details=json.dumps({"score": round(state.score, 3), "transitions": state.transitions}),
+                    )
+                    batch.suppress(key, (Alarm.type == ONU_DOWN) & (Alarm.onu_id == state.onu_id))
+
+            # Hysteresis: dilepas hanya setelah score meluruh di bawah FLAP_REUSE_THRESHOLD
+            released = [
+                self._states[onu_id] for onu_id in self._flagged
+                if self._states[onu_id].decayed(now) < FLAP_REUSE_THRESHOLD
+            ]
+            for state in released:
+                state.flagged = False
+                self._flagged.discard(state.onu_id)
+            flagged = [self._states[onu_id] for onu_id in self._flagged]
+
+        # ONU flapping diwakili alarm onu_flapping, raise / clear onu_down tidak ditulis
+        for state in flagged:
+            batch.discard((ONU_DOWN, state.olt_id, None, state.onu_id), (ONU_FLAPPING, state.olt_id, None, state.onu_id))
+        for state in released:
+            batch.clear(ONU_FLAPPING, state.olt_id, state.onu_id)
+            if state.last_status == OnuStatus.OFFLINE:
+                batch.raise_alarm(
+                    ONU_DOWN, state.olt_id, state.onu_id, AlarmSeverity.MAJOR,
+                    f"ONU {state.serial_number} is offline",
+                )
+
+        if history:
+            # Satu INSERT multi-row per siklus poll
+            db.execute(OnuStatusHistory.__table__.insert(), history)
+
+    def ranked(self, db: Session, limit: int = 20, olt_id: Optional[int] = None) -> List[dict]:
+        """Worst flapping ONUs by current (decayed) score, highest first"""
+        self.refresh(db)
+        now = datetime.utcnow()
+        with self._lock:
+            states = self._states.values()
+            if olt_id is not None:
+                states = [state for state in states if state.olt_id == olt_id]
+            worst = heapq.nlargest(limit, states, key=lambda state: state.decayed(now))
+            return [state.as_dict(now) for state in worst if state.decayed(now) > 0.01]
+
+    def reset(self):
+        with self._lock:
+            self._states.clear()
+            self._flagged.clear()
+            self._loaded_at = None
+            self._observed_at = None
+
+flap_detector = FlapDetector()
@@ -0,0 +1,533 @@
+"""
+File: services/geo_index.py
+
+Spatial index in-memory untuk ONU, OLT dan lokasi di peta
+
+Fungsi utama:
+- GridIndex: grid lat/lon (bucket per sel) untuk query viewport, radius dan k-nearest
+- PointIndex: index objek peta (OLT, lokasi) yang dimuat dari database dan
+  diperbarui di tempat saat data berubah
+- OnuGeoIndex: index ONU (lokasi dari tabel locations) plus cluster per sel grid
+  sesuai level zoom (jumlah ONU dan breakdown status)
+- Memperbarui index secara inkremental setelah commit, tanpa rebuild
+
+Alur kerja:
+1. rebuild() memuat semua objek dalam satu query (ONU: + lokasi + nama OLT, tanpa N+1)
+2. Setiap level zoom punya ukuran sel sendiri (CLUSTER_CELLS_PER_TILE sel per tile peta),
+   agregat per sel dihitung saat zoom tersebut pertama kali diminta lalu disimpan
+3. Listener session (after_flush/after_commit) meneruskan perubahan ke index:
+   - OLT dan lokasi: insert/update/delete diterapkan langsung ke index
+   - ONU: perubahan status diterapkan langsung; perubahan lokasi, ONU baru atau
+     ONU terhapus menandai index ONU perlu rebuild
+4. Radius: hanya sel yang beririsan dengan lingkaran yang diperiksa (jarak haversine)
+5. k-nearest: pencarian cincin sel yang melebar dari titik asal, berhenti saat
+   cincin berikutnya pasti lebih jauh dari hasil ke-k
+6. Index juga di-rebuild berkala (GEO_INDEX_REFRESH_INTERVAL) untuk menangkap perubahan
+   dari proses lain (background poller, worker uvicorn lain)
+
+Environment variables:
+- GEO_INDEX_REFRESH_INTERVAL: Umur maksimum index dalam detik (default 60)
+- CLUSTER_MAX_ZOOM: Mulai zoom ini ONU dikirim satu per satu (default 15)
+- CLUSTER_CELLS_PER_TILE: Jumlah sel cluster per lebar tile peta (default 4, ~64px)
+- GEO_INDEX_MAX_POINTS: Batas jumlah titik individual per response (default 5000)
+"""
+
+import enum
+import heapq
+import math
+import os
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.geo import BoundingBox
+from app.models import Location, Olt, Onu, OnuStatus
+
+GEO_INDEX_REFRESH_INTERVAL = float(os.getenv("GEO_INDEX_REFRESH_INTERVAL", "60"))
+CLUSTER_MAX_ZOOM = int(os.getenv("CLUSTER_MAX_ZOOM", "15"))
+CLUSTER_CELLS_PER_TILE = int(os.getenv("CLUSTER_CELLS_PER_TILE", "4"))
+GEO_INDEX_MAX_POINTS = int(os.getenv("GEO_INDEX_MAX_POINTS", "5000"))
+
+# Ukuran sel grid untuk query titik individual (derajat, 0.01 ~ 1 km)
+POINT_CELL_DEG = 0.01
+OLT_CELL_DEG = 0.1
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180.0
+
+STATUS_SLOTS = {OnuStatus.ONLINE: 1, OnuStatus.OFFLINE: 2, OnuStatus.UNKNOWN: 3}
+
+Cell = Tuple[int, int]
+
+class OnuPoint:
+    __slots__ = ("id", "name", "serial_number", "status", "olt_id", "olt_name",
+                 "location_id", "location_name", "lat", "lon")
+
+    def __init__(self, id, name, serial_number, status, olt_id, olt_name, location_id, location_name, lat, lon):
+        self.id = id
+        self.name = name
+        self.serial_number = serial_number
+        self.status = OnuStatus(status) if status else OnuStatus.UNKNOWN
+        self.olt_id = olt_id
+        self.olt_name = olt_name
+        self.location_id = location_id
+        self.location_name = location_name
+        self.lat = float(lat)
+        self.lon = float(lon)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name or self.serial_number,
+            "serial_number": self.serial_number,
+            "status": self.status.value,
+            "olt_id": self.olt_id,
+            "olt_name": self.olt_name,
+            "latitude": self.lat,
+            "longitude": self.lon,
+            "location_name": self.location_name,
+        }
+
+def cell_size(zoom: int) -> float:
+    """Cluster cell width in degrees for a web-map zoom level"""
+    return 360.0 / (2 ** zoom * CLUSTER_CELLS_PER_TILE)
+
+def cell_of(lat: float, lon: float, size: float) -> Cell:
+    return math.floor((lon + 180.0) / size), math.floor((lat + 90.0) / size)
+
+def cells_in(bbox: BoundingBox, size: float) -> Iterator[Cell]:
+    """Every grid cell overlapping bbox"""
+    lon_ranges = [(bbox.min_lon, bbox.max_lon)]
+    if bbox.crosses_antimeridian:
+        lon_ranges = [(bbox.min_lon, 180.0), (-180.0, bbox.max_lon)]
+    y0 = cell_of(bbox.min_lat, 0.0, size)[1]
+    y1 = cell_of(bbox.max_lat, 0.0, size)[1]
+    for min_lon, max_lon in lon_ranges:
+        x0 = cell_of(0.0, min_lon, size)[0]
+        x1 = cell_of(0.0, max_lon, size)[0]
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                yield x, y
+
+def cell_count(bbox: BoundingBox, size: float) -> int:
+    width = bbox.max_lon - bbox.min_lon
+    if bbox.crosses_antimeridian:
+        width += 360.0
+    return (int(width / size) + 2) * (int((bbox.max_lat - bbox.min_lat) / size) + 2)
+
+def cell_overlaps(cell: Cell, bbox: BoundingBox, size: float) -> bool:
+    lon = cell[0] * size - 180.0
+    lat = cell[1] * size - 90.0
+    if lat + size < bbox.min_lat or lat > bbox.max_lat:
+        return False
+    if bbox.crosses_antimeridian:
+        return lon + size >= bbox.min_lon or lon <= bbox.max_lon
+    return lon + size >= bbox.min_lon and lon <= bbox.max_lon
+
+def select_cells(cells: Dict[Cell, object], bbox: Optional[BoundingBox], size: float) -> list:
+    """(cell, value) pairs inside bbox, scanning whichever is smaller: bbox range or all cells"""
+    if bbox is None:
+        return list(cells.items())
+    if cell_count(bbox, size) <= len(cells):
+        return [(cell, cells[cell]) for cell in cells_in(bbox, size) if cell in cells]
+    return [(cell, value) for cell, value in cells.items() if cell_overlaps(cell, bbox, size)]
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in meters"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+def radius_bbox(lat: float, lon: float, radius_m: float) -> BoundingBox:
+    """Smallest lat/lon box containing the circle of radius_m around (lat, lon)"""
+    dlat = radius_m / METERS_PER_DEGREE
+    cos_lat = math.cos(math.radians(min(90.0, abs(lat) + dlat)))
+    if cos_lat < 1e-9 or dlat / cos_lat >= 180.0:
+        return BoundingBox(max(-90.0, lat - dlat), min(90.0, lat + dlat), -180.0, 180.0)
+    dlon = dlat / cos_lat
+
+    def wrap(value):
+        return (value + 180.0) % 360.0 - 180.0
+
+    return BoundingBox(max(-90.0, lat - dlat), min(90.0, lat + dlat), wrap(lon - dlon), wrap(lon + dlon))
+
+class GridIndex:
+    """
+    Points bucketed into fixed-size lat/lon cells
+
+    Tidak thread-safe sendiri, pemanggil memegang lock index.
+    """
+
+    def __init__(self, cell_deg: float):
+        self.cell_deg = cell_deg
+        self._columns = math.ceil(360.0 / cell_deg)
+        self._cells: Dict[Cell, Dict[int, Tuple[float, float]]] = {}
+        self._positions: Dict[int, Tuple[float, float]] = {}
+
+    def __len__(self):
+        return len(self._positions)
+
+    def add(self, key: int, lat: float, lon: float):
+        self.remove(key)
+        self._cells.setdefault(cell_of(lat, lon, self.cell_deg), {})[key] = (lat, lon)
+        self._positions[key] = (lat, lon)
+
+    def remove(self, key: int):
+        position = self._positions.pop(key, None)
+        if position is None:
+            return
+        cell = cell_of(*position, self.cell_deg)
+        bucket = self._cells[cell]
+        del bucket[key]
+        if not bucket:
+            del self._cells[cell]
+
+    def in_bbox(self, bbox: BoundingBox) -> Iterator[int]:
+        for _, bucket in select_cells(self._cells, bbox, self.cell_deg):
+            for key, (lat, lon) in bucket.items():
+                if bbox.contains(lat, lon):
+                    yield key
+
+    def within(self, lat: float, lon: float, radius_m: float) -> List[Tuple[float, int]]:
+        """(distance_m, key) of every point within radius_m, nearest first"""
+        results = []
+        for key in self.in_bbox(radius_bbox(lat, lon, radius_m)):
+            distance = haversine_m(lat, lon, *self._positions[key])
+            if distance <= radius_m:
+                results.append((distance, key))
+        results.sort()
+        return results
+
+    def _ring(self, origin: Cell, ring: int) -> Iterator[Cell]:
+        """Cells at Chebyshev distance ring from origin (longitude wraps around)"""
+        x0, y0 = origin
+        if ring == 0:
+            yield origin
+            return
+        for dx in range(-ring, ring + 1):
+            for dy in (-ring, ring) if abs(dx) != ring else range(-ring, ring + 1):
+                yield (x0 + dx) % self._columns, y0 + dy
+
+    def nearest(self, lat: float, lon: float, k: int, max_distance_m: Optional[float] = None) -> List[Tuple[float, int]]:
+        """(distance_m, key) of the k nearest points, nearest first"""
+        if not self._positions:
+            return []
+
+        best: List[Tuple[float, int]] = []  # max-heap via jarak negatif
+        origin = cell_of(lat, lon, self.cell_deg)
+        seen = set()
+        ring = 0
+        while True:
+            # Cincin sudah lebih luas dari jumlah titik: hitung semua jarak saja
+            if (2 * ring + 1) ** 2 > 4 * len(self._positions) or ring * self.cell_deg > 180.0:
+                candidates = (
+                    (haversine_m(lat, lon, *position), key) for key, position in self._positions.items()
+                )
+                best = [(-distance, key) for distance, key in heapq.nsmallest(k, candidates)]
+                break
+
+            for cell in self._ring(origin, ring):
+                if cell in seen:
+                    continue
+                seen.add(cell)
+                for key, position in self._cells.get(cell, {}).items():
+                    distance = haversine_m(lat, lon, *position)
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, key))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, key))
+
+            # Jarak minimum ke titik mana pun di luar cincin ini
+            cos_lat = math.cos(math.radians(min(90.0, abs(lat) + (ring + 1) * self.cell_deg)))
+            bound = ring * self.cell_deg * METERS_PER_DEGREE * max(cos_lat, 0.0)
+            if len(best) == k and bound >= -best[0][0]:
+                break
+            if max_distance_m is not None and bound > max_distance_m:
+                break
+            ring += 1
+
+        results = sorted((-distance, key) for distance, key in best)
+        if max_distance_m is not None:
+            results = [(distance, key) for distance, key in results if distance <= max_distance_m]
+        return results
+
+def _json_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+class PointIndex:
+    """
+    In-memory index of map objects that have a latitude/longitude
+
+    Subclass menentukan model dan fields; item disimpan sebagai dict siap kirim.
+    """
+
+    model = None
+    fields: Tuple[str, ...] = ()
+    cell_deg = POINT_CELL_DEG
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._items: Dict[int, object] = {}
+        self._grid = GridIndex(self.cell_deg)
+        self._built_at = 0.0
+        self._stale = True
+
+    # Pemeliharaan index
+
+    def mark_stale(self):
+        self._stale = True
+
+    def ensure_fresh(self, db: Session):
+        """Rebuild the index if it was invalidated or is older than the refresh interval"""
+        if self._stale or time.monotonic() - self._built_at > GEO_INDEX_REFRESH_INTERVAL:
+            with self._lock:
+                if self._stale or time.monotonic() - self._built_at > GEO_INDEX_REFRESH_INTERVAL:
+                    self.rebuild(db)
+
+    def load(self, db: Session) -> Iterable[Tuple[int, float, float, object]]:
+        """(id, lat, lon, item) for every located object"""
+        columns = [getattr(self.model, field) for field in self.fields]
+        rows = db.execute(
+            select(*columns).where(self.model.latitude.isnot(None), self.model.longitude.isnot(None))
+        )
+        for row in rows:
+            item = self.item_from(row)
+            yield item["id"], item["latitude"], item["longitude"], item
+
+    def item_from(self, obj) -> dict:
+        return {field: _json_value(getattr(obj, field)) for field in self.fields}
+
+    def rebuild(self, db: Session):
+        items = {}
+        grid = GridIndex(self.cell_deg)
+        for key, lat, lon, item in self.load(db):
+            items[key] = item
+            grid.add(key, float(lat), float(lon))
+
+        with self._lock:
+            self._items = items
+            self._grid = grid
+            self._built_at = time.monotonic()
+            self._stale = False
+            self.on_rebuild()
+
+    def on_rebuild(self):
+        pass
+
+    def upsert(self, item: dict):
+        """Insert or move one object (item built by item_from)"""
+        with self._lock:
+            if item["latitude"] is None or item["longitude"] is None:
+                self.remove(item["id"])
+                return
+            self._items[item["id"]] = item
+            self._grid.add(item["id"], item["latitude"], item["longitude"])
+
+    def remove(self, key: int):
+        with self._lock:
+            self._items.pop(key, None)
+            self._grid.remove(key)
+
+    # Query
+
+    def serialize(self, item) -> dict:
+        return item
+
+    def points(self, bbox: Optional[BoundingBox] = None, limit: Optional[int] = None) -> Tuple[List[dict], bool]:
+        """
+        Individual objects inside bbox
+
+        Returns (items, truncated). truncated True jika jumlah objek melebihi limit.
+        """
+        with self._lock:
+            keys = self._items.keys() if bbox is None else self._grid.in_bbox(bbox)
+            result = []
+            for key in keys:
+                if limit is not None and len(result) >= limit:
+                    return result, True
+                result.append(self.serialize(self._items[key]))
+            return result, False
+
+    def _with_distance(self, matches: List[Tuple[float, int]]) -> List[dict]:
+        return [dict(self.serialize(self._items[key]), distance_m=round(distance, 1)) for distance, key in matches]
+
+    def within(self, lat: float, lon: float, radius_m: float, limit: int) -> Tuple[List[dict], bool]:
+        """Objects within radius_m of (lat, lon), nearest first"""
+        with self._lock:
+            matches = self._grid.within(lat, lon, radius_m)
+            return self._with_distance(matches[:limit]), len(matches) > limit
+
+    def nearest(self, lat: float, lon: float, k: int, max_distance_m: Optional[float] = None) -> List[dict]:
+        """The k objects nearest to (lat, lon)"""
+        with self._lock:
+            return self._with_distance(self._grid.nearest(lat, lon, k, max_distance_m))
+
+class OltGeoIndex(PointIndex):
+    model = Olt
+    fields = ("id", "name", "ip_address", "status", "latitude", "longitude")
+    cell_deg = OLT_CELL_DEG
+
+class LocationGeoIndex(PointIndex):
+    model = Location
+    fields = ("id", "name", "address", "city", "latitude", "longitude")
+
+class OnuGeoIndex(PointIndex):
+    """
+    ONU positioned at their Location, with per-zoom cluster aggregates
+
+    Agregat sel: [count, online, offline, unknown, sum_lat, sum_lon]
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._clusters: Dict[int, Dict[Cell, list]] = {}
+
+    def load(self, db: Session) -> Iterable[Tuple[int, float, float, object]]:
+        """Every ONU with a located Location, in a single joined query"""
+        rows = db.execute(
+            select(
+                Onu.id, Onu.name, Onu.serial_number, Onu.status, Onu.olt_id, Olt.name,
+                Onu.location_id, Location.name, Location.latitude, Location.longitude,
+            )
+            .join(Location, Onu.location_id == Location.id)
+            .outerjoin(Olt, Onu.olt_id == Olt.id)
+            .where(Location.latitude.isnot(None), Location.longitude.isnot(None))
+        )
+        for row in rows:
+            point = OnuPoint(*row)
+            yield point.id, point.lat, point.lon, point
+
+    def on_rebuild(self):
+        self._clusters = {}
+
+    def serialize(self, item) -> dict:
+        return item.to_dict()
+
+    def apply_status_changes(self, changes: Iterable[Tuple[int, OnuStatus]]):
+        """Update ONU statuses in place, adjusting every cached zoom aggregate"""
+        with self._lock:
+            for onu_id, status in changes:
+                point = self._items.get(onu_id)
+                status = OnuStatus(status) if status else OnuStatus.UNKNOWN
+                if point is None or point.status == status:
+                    continue
+                for zoom, cells in self._clusters.items():
+                    aggregate = cells[cell_of(point.lat, point.lon, cell_size(zoom))]
+                    aggregate[STATUS_SLOTS[point.status]] -= 1
+                    aggregate[STATUS_SLOTS[status]] += 1
+                point.status = status
+
+    def _cluster_cells(self, zoom: int) -> Dict[Cell, list]:
+        cells = self._clusters.get(zoom)
+        if cells is None:
+            size = cell_size(zoom)
+            cells = {}
+            for point in self._items.values():
+                aggregate = cells.setdefault(cell_of(point.lat, point.lon, size), [0, 0, 0, 0, 0.0, 0.0])
+                aggregate[0] += 1
+                aggregate[STATUS_SLOTS[point.status]] += 1
+                aggregate[4] += point.lat
+                aggregate[5] += point.lon
+            self._clusters[zoom] = cells
+        return cells
+
+    def clusters(self, zoom: int, bbox: Optional[BoundingBox] = None) -> List[dict]:
+        """Aggregated ONU counts per cluster cell for zoom, inside bbox"""
+        with self._lock:
+            selected = select_cells(self._cluster_cells(zoom), bbox, cell_size(zoom))
+            return [
+                {
+                    "cell": f"{zoom}/{x}/{y}",
+                    "latitude": aggregate[4] / aggregate[0],
+                    "longitude": aggregate[5] / aggregate[0],
+                    "count": aggregate[0],
+                    "online": aggregate[1],
+                    "offline": aggregate[2],
+                    "unknown": aggregate[3],
+                }
+                for (x, y), aggregate in selected
+                if aggregate[0]
+            ]
+
+onu_geo_index = OnuGeoIndex()
+olt_geo_index = OltGeoIndex()
+location_geo_index = LocationGeoIndex()
+
+class MapLayer(str, enum.Enum):
+    ONUS = "onus"
+    OLTS = "olts"
+    LOCATIONS = "locations"
+
+GEO_INDEXES = {
+    MapLayer.ONUS: onu_geo_index,
+    MapLayer.OLTS: olt_geo_index,
+    MapLayer.LOCATIONS: location_geo_index,
+}
+
+# Perubahan dikumpulkan saat flush dan baru diterapkan ke index setelah commit,
+# sehingga transaksi yang di-rollback tidak mengubah index
+
+POINT_INDEXES = ((Olt, olt_geo_index), (Location, location_geo_index))
+
+def _attribute_changed(obj, attr: str) -> bool:
+    return inspect(obj).attrs[attr].history.has_changes()
+
+@event.listens_for(Session, "after_flush")
+def _collect_geo_changes(session: Session, flush_context):
+    changes = session.info.setdefault("geo_status_changes", [])
+    upserts = session.info.setdefault("geo_upserts", [])
+    removals = session.info.setdefault("geo_removals", [])
+
+    for obj in session.new:
+        if isinstance(obj, (Onu, Location)):
+            session.info["geo_stale"] = True
+    for obj in session.deleted:
+        if isinstance(obj, (Onu, Location, Olt)):
+            session.info["geo_stale"] = True
+    for obj in session.dirty:
+        if isinstance(obj, Onu):
+            if _attribute_changed(obj, "location_id") or _attribute_changed(obj, "name"):
+                session.info["geo_stale"] = True
+            elif _attribute_changed(obj, "status"):
+                changes.append((obj.id, obj.status))
+        elif isinstance(obj, (Location, Olt)):
+            if any(_attribute_changed(obj, attr) for attr in ("latitude", "longitude", "name")):
+                session.info["geo_stale"] = True
+
+    for model, index in POINT_INDEXES:
+        for obj in session.new:
+            if isinstance(obj, model):
+                upserts.append((index, index.item_from(obj)))
+        for obj in session.dirty:
+            if isinstance(obj, model) and any(_attribute_changed(obj, field) for field in index.fields):
+                upserts.append((index, index.item_from(obj)))
+        for obj in session.deleted:
+            if isinstance(obj, model):
+                removals.append((index, obj.id))
+
+@event.listens_for(Session, "after_commit")
+def _apply_geo_changes(session: Session):
+    changes = session.info.pop("geo_status_changes", None)
+    for index, item in session.info.pop("geo_upserts", ()):
+        index.upsert(item)
+    for index, key in session.info.pop("geo_removals", ()):
+        index.remove(key)
+    if session.info.pop("geo_stale", False):
+        onu_geo_index.mark_stale()
+    elif changes:
+        onu_geo_index.apply_status_changes(changes)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_geo_changes(session: Session):
+    for key in ("geo_status_changes", "geo_upserts", "geo_removals", "geo_stale"):
+        session.info.pop(key, None)
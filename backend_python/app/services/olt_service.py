@@ -28,13 +28,16 @@ Catatan:
 """
 
 from app.models import Olt
+from app.cache import dashboard_cache
 from app.services.snmp_service import SnmpService
 from app.services.ssh_service import SshService
 from app.services.zte_api_service import ZteApiService
 from typing import Optional, Dict, List
 from datetime import datetime
 from sqlalchemy.orm import Session
-from app.models import OltStatus, OnuStatus, Onu, Alarm, AlarmSeverity, AlarmStatus
+from app.models import OltStatus, OnuStatus, Onu
+from app.services.alarm_manager import alarm_manager
+from app.services.optical_engine import optical_engine
 
 class OltService:
     """
@@ -44,10 +47,15 @@ class OltService:
     untuk menyediakan interface yang konsisten untuk semua operasi OLT.
     """
     
-    def __init__(self):
-        self.snmp = SnmpService()
-        self.ssh = SshService()
-        self.zte_api = ZteApiService()
+    def __init__(
+        self,
+        snmp: Optional[SnmpService] = None,
+        ssh: Optional[SshService] = None,
+        zte_api: Optional[ZteApiService] = None,
+    ):
+        self.snmp = snmp or SnmpService()
+        self.ssh = ssh or SshService()
+        self.zte_api = zte_api or ZteApiService()
     
     def check_olt_status(self, olt: Olt) -> bool:
         """
@@ -88,7 +96,11 @@ class OltService:
         try:
             # Cek status
             is_online = self.check_olt_status(olt)
+            old_status = olt.status
             olt.status = OltStatus.ONLINE if is_online else OltStatus.OFFLINE
+            # OLT tidak merespon -> alarm olt_unreachable (lihat alarm_correlator)
+            alarms = alarm_manager.batch(olt.id)
+            alarms.olt_status_changed(olt.id, old_status, olt.status)
             olt.last_polled_at = datetime.utcnow()
             
             if is_online:
@@ -109,7 +121,8 @@ class OltService:
                     if 'version' in descr.lower():
                         olt.firmware_version = descr
                 
-                db.commit()
+                alarms.commit(db)
+                dashboard_cache.invalidate()
                 
                 return {
                     "status": "online",
@@ -117,7 +130,8 @@ class OltService:
                     "system_info": sys_info
                 }
             else:
-                db.commit()
+                alarms.commit(db)
+                dashboard_cache.invalidate()
                 return {"status": "offline"}
         except Exception as e:
             print(f"Error polling OLT {olt.id}: {e}")
@@ -143,6 +157,7 @@ class OltService:
             synced_count = 0
             updated_count = 0
             created_count = 0
+            alarms = alarm_manager.batch(olt.id)
             
             for onu_data in onu_list:
                 serial_number = onu_data.get('serial_number')
@@ -169,21 +184,10 @@ class OltService:
                     existing_onu.tx_power = tx_power
                     existing_onu.last_seen_at = datetime.utcnow()
                     
-                    # Track perubahan status
+                    # Track perubahan status (last_status_change diperbarui oleh onu_status_changed)
                     if old_status != status:
-                        existing_onu.last_status_change = datetime.utcnow()
-                        # Buat alarm jika ONU offline
-                        if status == OnuStatus.OFFLINE:
-                            alarm = Alarm(
-                                olt_id=olt.id,
-                                onu_id=existing_onu.id,
-                                severity=AlarmSeverity.MAJOR,
-                                type="onu_down",
-                                message=f"ONU {serial_number} is offline",
-                                status=AlarmStatus.ACTIVE,
-                                occurred_at=datetime.utcnow()
-                            )
-                            db.add(alarm)
+                        # Alarm onu_down dibuat / ditambah saat offline, di-clear saat online lagi
+                        alarms.onu_status_changed(existing_onu, old_status, status)
                     
                     updated_count += 1
                 else:
@@ -204,7 +208,11 @@ class OltService:
                 
                 synced_count += 1
             
-            db.commit()
+            # Ambang RX / TX power dievaluasi sekaligus untuk semua ONU OLT ini
+            optical_engine.evaluate(db, olt.id, alarms)
+            # Perubahan ONU dan alarm ditulis dalam satu commit
+            alarms.commit(db)
+            dashboard_cache.invalidate()
             
             return {
                 "synced": synced_count,
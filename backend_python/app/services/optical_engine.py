@@ -0,0 +1,210 @@
+"""
+File: services/optical_engine.py
+
+Evaluasi ambang RX / TX power ONU secara vektor (NumPy) per OLT
+
+Fungsi utama:
+- Ambang minor / major untuk sisi low dan high, per metric (rx_power / tx_power)
+- Prioritas ambang: OLT + model ONU > model ONU > OLT > global (baris tanpa
+  olt_id / onu_model) > default dari environment
+- Hysteresis: alarm baru turun level / di-clear setelah nilai kembali melewati
+  batas sejauh hysteresis dB, sehingga ONU di sekitar batas tidak bolak-balik
+- Alarm rx_power_low, rx_power_high, tx_power_low, tx_power_high per ONU
+  (minor / major) di-raise, diubah severity-nya atau di-clear lewat AlarmBatch
+
+Alur kerja (dipanggil setelah sync / poll OLT, sebelum AlarmBatch.commit):
+1. Flush perubahan ONU, lalu satu SELECT kolom optik semua ONU OLT tsb dan
+   satu SELECT alarm optik yang masih terbuka (level saat ini)
+2. Ambang di-resolve sekali per model ONU, lalu disebar ke array per ONU
+3. Level setiap ONU dihitung sekaligus dengan NumPy (np.where), dengan batas
+   yang digeser hysteresis untuk ONU yang alarm-nya sudah aktif
+4. Hanya ONU yang level-nya berubah (np.nonzero) yang masuk batch
+
+Environment variables:
+- OPTICAL_RX_MAJOR_LOW / OPTICAL_RX_MINOR_LOW: Default batas bawah RX dBm (default -27 / -25)
+- OPTICAL_RX_MINOR_HIGH / OPTICAL_RX_MAJOR_HIGH: Default batas atas RX dBm (default -10 / -8)
+- OPTICAL_TX_MAJOR_LOW / OPTICAL_TX_MINOR_LOW: Default batas bawah TX dBm (default 0 / 0.5)
+- OPTICAL_TX_MINOR_HIGH / OPTICAL_TX_MAJOR_HIGH: Default batas atas TX dBm (default 5 / 6)
+- OPTICAL_HYSTERESIS: Default hysteresis dalam dB (default 1)
+- OPTICAL_THRESHOLD_CACHE_TTL: Masa berlaku cache tabel optical_thresholds
+  dalam detik (default 60)
+
+Catatan:
+- ONU yang tidak online atau tidak punya nilai (NULL) mempertahankan level
+  terakhirnya; kondisi offline sudah diwakili alarm onu_down
+- Cache ambang per process; route /api/optical-thresholds meng-invalidate cache
+  worker API, poller membaca perubahan setelah OPTICAL_THRESHOLD_CACHE_TTL
+- NumPy di-import lazy, baru dimuat saat poll pertama
+"""
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.cache import TTLCache
+from app.lazy import lazy_import
+from app.models import Alarm, AlarmSeverity, Onu, OnuStatus, OpticalMetric, OpticalThreshold
+from app.services.alarm_manager import OPEN_STATUSES, AlarmBatch
+
+np = lazy_import("numpy")
+
+def _env(name: str, default: str) -> float:
+    return float(os.getenv(name, default))
+
+OPTICAL_HYSTERESIS = _env("OPTICAL_HYSTERESIS", "1")
+OPTICAL_THRESHOLD_CACHE_TTL = _env("OPTICAL_THRESHOLD_CACHE_TTL", "60")
+
+# (major_low, minor_low, minor_high, major_high, hysteresis)
+Limits = Tuple[float, float, float, float, float]
+
+DEFAULT_LIMITS: Dict[OpticalMetric, Limits] = {
+    OpticalMetric.RX_POWER: (
+        _env("OPTICAL_RX_MAJOR_LOW", "-27"), _env("OPTICAL_RX_MINOR_LOW", "-25"),
+        _env("OPTICAL_RX_MINOR_HIGH", "-10"), _env("OPTICAL_RX_MAJOR_HIGH", "-8"),
+        OPTICAL_HYSTERESIS,
+    ),
+    OpticalMetric.TX_POWER: (
+        _env("OPTICAL_TX_MAJOR_LOW", "0"), _env("OPTICAL_TX_MINOR_LOW", "0.5"),
+        _env("OPTICAL_TX_MINOR_HIGH", "5"), _env("OPTICAL_TX_MAJOR_HIGH", "6"),
+        OPTICAL_HYSTERESIS,
+    ),
+}
+
+LOW = "low"
+HIGH = "high"
+
+def optical_alarm_type(metric: OpticalMetric, side: str) -> str:
+    return f"{metric.value}_{side}"
+
+OPTICAL_ALARM_TYPES = {
+    optical_alarm_type(metric, side): (metric, side)
+    for metric in OpticalMetric for side in (LOW, HIGH)
+}
+
+METRIC_LABELS = {OpticalMetric.RX_POWER: "RX", OpticalMetric.TX_POWER: "TX"}
+
+SEVERITY_LEVELS = {AlarmSeverity.MINOR: 1, AlarmSeverity.MAJOR: 2, AlarmSeverity.CRITICAL: 2}
+LEVEL_SEVERITIES = {1: AlarmSeverity.MINOR, 2: AlarmSeverity.MAJOR}
+
+# Kolom ambang per sisi: (major, minor)
+SIDE_COLUMNS = {LOW: (0, 1), HIGH: (3, 2)}
+
+ScopeKey = Tuple[OpticalMetric, Optional[int], Optional[str]]
+
+def _value(limit: Optional[float]) -> float:
+    return float("nan") if limit is None else limit
+
+def _levels(values, current, major, minor, hysteresis):
+    """
+    Alarm level (0 / 1 minor / 2 major) of every value below its limits
+
+    Sisi high dihitung dengan argumen yang dinegasikan. Batas ONU yang sudah
+    pada level tsb digeser sejauh hysteresis; batas NaN tidak pernah terlampaui.
+    """
+    minor = minor + hysteresis * (current >= 1)
+    major = major + hysteresis * (current >= 2)
+    return np.where(values < major, 2, np.where(values < minor, 1, 0)).astype(np.int8)
+
+class OpticalEngine:
+    """Vectorized RX / TX power threshold evaluation for one OLT per call"""
+
+    def __init__(self):
+        self._cache = TTLCache(ttl=OPTICAL_THRESHOLD_CACHE_TTL, maxsize=1)
+
+    def invalidate(self):
+        self._cache.invalidate()
+
+    def thresholds(self, db: Session) -> Dict[ScopeKey, Limits]:
+        """Configured thresholds keyed by (metric, olt_id, onu_model)"""
+        rules = self._cache.get("rules")
+        if rules is None:
+            rules = {
+                (OpticalMetric(row.metric), row.olt_id, row.onu_model): (
+                    _value(row.major_low), _value(row.minor_low),
+                    _value(row.minor_high), _value(row.major_high),
+                    row.hysteresis if row.hysteresis is not None else OPTICAL_HYSTERESIS,
+                )
+                for row in db.scalars(select(OpticalThreshold).order_by(OpticalThreshold.id))
+            }
+            self._cache.set("rules", rules)
+        return rules
+
+    @staticmethod
+    def resolve(rules: Dict[ScopeKey, Limits], metric: OpticalMetric, olt_id: int, model: Optional[str]) -> Limits:
+        """Most specific limits for an ONU model on an OLT"""
+        for scope in ((olt_id, model), (None, model), (olt_id, None), (None, None)):
+            limits = rules.get((metric, *scope))
+            if limits is not None:
+                return limits
+        return DEFAULT_LIMITS[metric]
+
+    def evaluate(self, db: Session, olt_id: int, batch: AlarmBatch) -> int:
+        """
+        Raise / clear optical alarms of every ONU of olt_id in batch
+
+        Returns:
+            Jumlah alarm optik yang berubah level
+        """
+        # ONU baru dari sync ini perlu id
+        db.flush()
+        onus = db.execute(
+            select(Onu.id, Onu.serial_number, Onu.model, Onu.status, Onu.rx_power, Onu.tx_power)
+            .where(Onu.olt_id == olt_id)
+        ).all()
+        if not onus:
+            return 0
+
+        count = len(onus)
+        position = {onu.id: index for index, onu in enumerate(onus)}
+        current = {alarm_type: np.zeros(count, dtype=np.int8) for alarm_type in OPTICAL_ALARM_TYPES}
+        for alarm_type, onu_id, severity in db.execute(
+            select(Alarm.type, Alarm.onu_id, Alarm.severity).where(
+                Alarm.olt_id == olt_id,
+                Alarm.type.in_(list(OPTICAL_ALARM_TYPES)),
+                Alarm.status.in_(OPEN_STATUSES),
+            )
+        ):
+            index = position.get(onu_id)
+            if index is not None:
+                current[alarm_type][index] = SEVERITY_LEVELS.get(AlarmSeverity(severity), 1)
+
+        # Ambang di-resolve sekali per model, lalu disebar ke setiap ONU
+        models: Dict[Optional[str], int] = {}
+        groups = np.fromiter((models.setdefault(onu.model, len(models)) for onu in onus), dtype=np.intp, count=count)
+        online = np.fromiter((onu.status == OnuStatus.ONLINE for onu in onus), dtype=bool, count=count)
+        rules = self.thresholds(db)
+
+        changed = 0
+        for metric in OpticalMetric:
+            values = np.array([getattr(onu, metric.value) for onu in onus], dtype=float)
+            measured = online & ~np.isnan(values)
+            limits = np.array([self.resolve(rules, metric, olt_id, model) for model in models], dtype=float)[groups]
+            hysteresis = limits[:, 4]
+
+            for side, (major, minor) in SIDE_COLUMNS.items():
+                alarm_type = optical_alarm_type(metric, side)
+                sign = 1.0 if side == LOW else -1.0
+                level = _levels(sign * values, current[alarm_type], sign * limits[:, major], sign * limits[:, minor], hysteresis)
+                level = np.where(measured, level, current[alarm_type])
+
+                for index in np.nonzero(level != current[alarm_type])[0]:
+                    onu = onus[index]
+                    new_level = int(level[index])
+                    if new_level == 0:
+                        batch.clear(alarm_type, olt_id, onu.id)
+                    else:
+                        limit = float(limits[index, major if new_level == 2 else minor])
+                        severity = LEVEL_SEVERITIES[new_level]
+                        value = float(values[index])
+                        batch.raise_alarm(
+                            alarm_type, olt_id, onu.id, severity,
+                            f"ONU {onu.serial_number} {METRIC_LABELS[metric]} power {side}: "
+                            f"{value:.2f} dBm ({severity.value} {'<' if side == LOW else '>'} {limit:.2f} dBm)",
+                            details=json.dumps({"value": value, "threshold": limit, "hysteresis": float(hysteresis[index])}),
+                        )
+                    changed += 1
+        return changed
+
+optical_engine = OpticalEngine()
@@ -28,15 +28,17 @@ Catatan:
 - Password SNMP v3 disimpan terenkripsi di database
 - Timeout default 5-10 detik untuk menghindari blocking
 """
-from pysnmp.hlapi import *
-from pysnmp import hlapi
+from app.lazy import lazy_import
 from app.models import Olt
 from typing import Optional, Dict, List
 import time
-from cryptography.fernet import Fernet
 import os
 import base64
 
+# pysnmp (beserta MIB) dan cryptography baru di-import saat operasi SNMP pertama
+hlapi = lazy_import("pysnmp.hlapi")
+fernet = lazy_import("cryptography.fernet")
+
 class SnmpService:
     """SNMP Service for ZTE OLT communication"""
     
@@ -69,28 +71,28 @@ class SnmpService:
             if olt.snmp_username and olt.snmp_password:
                 # Decrypt password if encrypted
                 password = self._decrypt_password(olt.snmp_password)
-                return UsmUserData(
+                return hlapi.UsmUserData(
                     olt.snmp_username,
                     authKey=password,
                     privKey=password,
-                    authProtocol=usmHMACSHAAuthProtocol,
-                    privProtocol=usmAesCfb128Protocol
+                    authProtocol=hlapi.usmHMACSHAAuthProtocol,
+                    privProtocol=hlapi.usmAesCfb128Protocol
                 )
             else:
                 # Default v3 credentials
-                return UsmUserData('admin', 'admin', 'admin')
+                return hlapi.UsmUserData('admin', 'admin', 'admin')
         else:
             # SNMP v2c
-            return CommunityData(olt.snmp_community or 'public')
+            return hlapi.CommunityData(olt.snmp_community or 'public')
     
     def _decrypt_password(self, encrypted_password: str) -> str:
         """Decrypt password (simple implementation - use proper key management in production)"""
         try:
             # In production, use proper key management
-            key = os.getenv('ENCRYPTION_KEY', Fernet.generate_key())
+            key = os.getenv('ENCRYPTION_KEY', fernet.Fernet.generate_key())
             if isinstance(key, str):
                 key = key.encode()
-            f = Fernet(key)
+            f = fernet.Fernet(key)
             return f.decrypt(encrypted_password.encode()).decode()
         except:
             # If decryption fails, assume it's plain text (for development)
@@ -101,12 +103,12 @@ class SnmpService:
         try:
             auth_data = self._get_auth_data(olt)
             
-            for (errorIndication, errorStatus, errorIndex, varBinds) in getCmd(
-                SnmpEngine(),
+            for (errorIndication, errorStatus, errorIndex, varBinds) in hlapi.getCmd(
+                hlapi.SnmpEngine(),
                 auth_data,
-                UdpTransportTarget((olt.ip_address, olt.snmp_port), timeout=timeout, retries=3),
-                ContextData(),
-                ObjectType(ObjectIdentity(oid)),
+                hlapi.UdpTransportTarget((olt.ip_address, olt.snmp_port), timeout=timeout, retries=3),
+                hlapi.ContextData(),
+                hlapi.ObjectType(hlapi.ObjectIdentity(oid)),
                 lexicographicMode=False
             ):
                 if errorIndication:
@@ -131,18 +133,18 @@ class SnmpService:
             
             # Map value types to SNMP types
             if value_type == 'i':
-                obj_type = Integer(value)
+                obj_type = hlapi.Integer(value)
             elif value_type == 's':
-                obj_type = OctetString(value)
+                obj_type = hlapi.OctetString(value)
             else:
-                obj_type = OctetString(str(value))
+                obj_type = hlapi.OctetString(str(value))
             
-            for (errorIndication, errorStatus, errorIndex, varBinds) in setCmd(
-                SnmpEngine(),
+            for (errorIndication, errorStatus, errorIndex, varBinds) in hlapi.setCmd(
+                hlapi.SnmpEngine(),
                 auth_data,
-                UdpTransportTarget((olt.ip_address, olt.snmp_port), timeout=timeout, retries=3),
-                ContextData(),
-                ObjectType(ObjectIdentity(oid), obj_type),
+                hlapi.UdpTransportTarget((olt.ip_address, olt.snmp_port), timeout=timeout, retries=3),
+                hlapi.ContextData(),
+                hlapi.ObjectType(hlapi.ObjectIdentity(oid), obj_type),
                 lexicographicMode=False
             ):
                 if errorIndication:
@@ -165,12 +167,12 @@ class SnmpService:
         try:
             auth_data = self._get_auth_data(olt)
             
-            for (errorIndication, errorStatus, errorIndex, varBinds) in nextCmd(
-                SnmpEngine(),
+            for (errorIndication, errorStatus, errorIndex, varBinds) in hlapi.nextCmd(
+                hlapi.SnmpEngine(),
                 auth_data,
-                UdpTransportTarget((olt.ip_address, olt.snmp_port), timeout=timeout, retries=3),
-                ContextData(),
-                ObjectType(ObjectIdentity(oid)),
+                hlapi.UdpTransportTarget((olt.ip_address, olt.snmp_port), timeout=timeout, retries=3),
+                hlapi.ContextData(),
+                hlapi.ObjectType(hlapi.ObjectIdentity(oid)),
                 lexicographicMode=False,
                 maxRows=1000  # Limit rows to prevent timeout
             ):
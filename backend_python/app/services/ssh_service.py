@@ -31,13 +31,16 @@ Catatan:
 - Password SSH disimpan terenkripsi di database
 """
 
-import paramiko
+from app.lazy import lazy_import
 from app.models import Olt
 from typing import Optional, List, Dict
 import time
-from cryptography.fernet import Fernet
 import os
 
+# paramiko dan cryptography baru di-import saat koneksi SSH pertama
+paramiko = lazy_import("paramiko")
+fernet = lazy_import("cryptography.fernet")
+
 class SshService:
     """
     Service untuk komunikasi SSH dengan perangkat ZTE OLT
@@ -58,16 +61,16 @@ class SshService:
             Password dalam bentuk plain text
         """
         try:
-            key = os.getenv('ENCRYPTION_KEY', Fernet.generate_key())
+            key = os.getenv('ENCRYPTION_KEY', fernet.Fernet.generate_key())
             if isinstance(key, str):
                 key = key.encode()
-            f = Fernet(key)
+            f = fernet.Fernet(key)
             return f.decrypt(encrypted_password.encode()).decode()
         except:
             # Jika dekripsi gagal, asumsikan password masih plain text (untuk development)
             return encrypted_password
     
-    def _get_connection(self, olt: Olt) -> Optional[paramiko.SSHClient]:
+    def _get_connection(self, olt: Olt) -> Optional["paramiko.SSHClient"]:
         """
         Membuat koneksi SSH ke OLT
         
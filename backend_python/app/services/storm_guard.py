@@ -0,0 +1,238 @@
+"""
+File: services/storm_guard.py
+
+Proteksi alarm storm: token bucket per entity dan hold-down timer
+
+Fungsi utama:
+- Token bucket per entity (olt_id, pon_port, onu_id): setiap raise alarm memakai
+  satu token, bucket terisi ulang ALARM_BUCKET_REFILL token per detik sampai
+  ALARM_BUCKET_CAPACITY. Raise tanpa token dibuang
+- Hold-down onu_down: alarm baru di-raise setelah ONU offline selama
+  ALARM_RAISE_HOLD_DOWN detik, dan baru di-clear setelah ONU online selama
+  ALARM_CLEAR_HOLD_DOWN detik. ONU yang flapping di dalam window tidak
+  menghasilkan baris alarm sama sekali
+- Hold-down dihitung dari state di database (onus.last_status_change dan alarm
+  onu_down yang ada), bukan dari timer in-memory, sehingga tidak hilang saat
+  process restart atau leader poller berganti
+- Event yang ditekan dicatat sebagai counter in-memory per (alasan, type alarm),
+  bukan sebagai baris di database (lihat GET /api/alarms/storm)
+
+Alur kerja (dipanggil AlarmBatch.commit):
+1. release_due: untuk OLT batch tsb, ONU offline >= ALARM_RAISE_HOLD_DOWN detik
+   tanpa alarm onu_down di-raise, ONU online >= ALARM_CLEAR_HOLD_DOWN detik
+   dengan alarm onu_down terbuka di-clear
+2. Stage korelasi (alarm_correlator) berjalan
+3. filter: raise / clear dari transisi ONU baru dibuang dari batch (diputuskan
+   release_due setelah hold-down lewat), lalu setiap raise dicek ke token bucket
+4. Sisa batch ditulis oleh AlarmManager
+
+Environment variables:
+- ALARM_BUCKET_CAPACITY: Burst raise per entity (default 10)
+- ALARM_BUCKET_REFILL: Token per detik per entity (default 0.1 = 6 per menit)
+- ALARM_RAISE_HOLD_DOWN: Detik offline sebelum onu_down di-raise (default 30)
+- ALARM_CLEAR_HOLD_DOWN: Detik online sebelum onu_down di-clear (default 60)
+- STORM_GUARD_MAX_ENTITIES: Jumlah bucket maksimum yang disimpan (default 100000)
+
+Catatan:
+- Token bucket dan counter per process; poller berjalan di satu process (leader),
+  POST /api/alarms dibatasi per worker API
+- Hold-down dievaluasi setiap commit batch (setiap siklus poll), jadi resolusinya
+  sama dengan interval poll; ONU tanpa last_status_change (belum pernah berubah
+  status) tidak di-raise
+- Clear tidak pernah di-rate-limit, supaya alarm yang sudah recovery tetap tertutup
+"""
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import exists, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.models import Alarm, AlarmSeverity, AlarmStatus, Onu, OnuStatus
+from app.services.alarm_manager import ONU_DOWN, OPEN_STATUSES, AlarmBatch, AlarmKey
+
+ALARM_BUCKET_CAPACITY = float(os.getenv("ALARM_BUCKET_CAPACITY", "10"))
+ALARM_BUCKET_REFILL = float(os.getenv("ALARM_BUCKET_REFILL", "0.1"))
+ALARM_RAISE_HOLD_DOWN = float(os.getenv("ALARM_RAISE_HOLD_DOWN", "30"))
+ALARM_CLEAR_HOLD_DOWN = float(os.getenv("ALARM_CLEAR_HOLD_DOWN", "60"))
+STORM_GUARD_MAX_ENTITIES = int(os.getenv("STORM_GUARD_MAX_ENTITIES", "100000"))
+
+Entity = Tuple[Optional[int], Optional[int], Optional[int]]
+
+def entity_of(key: AlarmKey) -> Entity:
+    """(olt_id, pon_port, onu_id) of an alarm key"""
+    return key[1], key[2], key[3]
+
+def _has_onu_down(statuses):
+    """ONU has an onu_down alarm in one of statuses"""
+    return exists().where(
+        Alarm.type == ONU_DOWN,
+        Alarm.olt_id == Onu.olt_id,
+        Alarm.onu_id == Onu.id,
+        Alarm.status.in_(statuses),
+    )
+
+# Alarm onu_down yang ditekan (pon_los / olt_unreachable / onu_flapping) juga dihitung sudah ada
+RAISED_STATUSES = (*OPEN_STATUSES, AlarmStatus.SUPPRESSED)
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated_at = now
+
+    def take(self, capacity: float, refill: float, now: float) -> bool:
+        self.tokens = min(capacity, self.tokens + (now - self.updated_at) * refill)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+class StormGuard:
+    """Per-entity token buckets and hold-down timers in front of the alarm writer"""
+
+    def __init__(
+        self,
+        capacity: float = ALARM_BUCKET_CAPACITY,
+        refill: float = ALARM_BUCKET_REFILL,
+        raise_hold_down: float = ALARM_RAISE_HOLD_DOWN,
+        clear_hold_down: float = ALARM_CLEAR_HOLD_DOWN,
+        max_entities: int = STORM_GUARD_MAX_ENTITIES,
+    ):
+        self.capacity = capacity
+        self.refill = refill
+        self.raise_hold_down = raise_hold_down
+        self.clear_hold_down = clear_hold_down
+        self.max_entities = max_entities
+        self._buckets: "OrderedDict[Entity, TokenBucket]" = OrderedDict()
+        self._suppressed: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def allow(self, entity: Entity, now: Optional[float] = None) -> bool:
+        """Take one token from the bucket of entity, False if it is empty"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(entity)
+            if bucket is None:
+                bucket = self._buckets[entity] = TokenBucket(self.capacity, now)
+                if len(self._buckets) > self.max_entities:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(entity)
+            return bucket.take(self.capacity, self.refill, now)
+
+    def retry_after(self) -> int:
+        """Seconds until an empty bucket has a token again"""
+        return max(1, int(1 / self.refill)) if self.refill > 0 else 60
+
+    def record(self, reason: str, alarm_type: str, count: int = 1):
+        with self._lock:
+            self._suppressed[(reason, alarm_type)] += count
+
+    def _raise_condition(self, now: datetime):
+        """Offline ONUs whose raise hold-down has expired and that have no onu_down alarm"""
+        return (
+            Onu.status == OnuStatus.OFFLINE,
+            Onu.last_status_change <= now - timedelta(seconds=self.raise_hold_down),
+            ~_has_onu_down(RAISED_STATUSES),
+        )
+
+    def _clear_condition(self, now: datetime):
+        """Online ONUs whose clear hold-down has expired and that still have an open onu_down"""
+        return (
+            Onu.status == OnuStatus.ONLINE,
+            # Tanpa last_status_change (data lama): alarm tetap di-clear
+            or_(Onu.last_status_change.is_(None), Onu.last_status_change <= now - timedelta(seconds=self.clear_hold_down)),
+            _has_onu_down(OPEN_STATUSES),
+        )
+
+    def release_due(self, db: Session, batch: AlarmBatch, now: Optional[datetime] = None):
+        """Queue onu_down raises / clears of the batch OLT whose hold-down has expired"""
+        if batch.olt_id is None:
+            return
+        now = now or datetime.utcnow()
+        olt_id = batch.olt_id
+        # Status ONU dari batch ini ikut terhitung
+        db.flush()
+        # Key yang punya transisi baru di batch ini diputuskan oleh filter
+        actions = batch.pending()
+
+        for onu_id, serial_number, since in db.execute(
+            select(Onu.id, Onu.serial_number, Onu.last_status_change)
+            .where(Onu.olt_id == olt_id, *self._raise_condition(now))
+            .order_by(Onu.id)
+        ):
+            if (ONU_DOWN, olt_id, None, onu_id) not in actions:
+                batch.raise_alarm(
+                    ONU_DOWN, olt_id, onu_id, AlarmSeverity.MAJOR, f"ONU {serial_number} is offline", at=since
+                )
+
+        for onu_id in db.scalars(
+            select(Onu.id).where(Onu.olt_id == olt_id, *self._clear_condition(now)).order_by(Onu.id)
+        ):
+            if (ONU_DOWN, olt_id, None, onu_id) not in actions:
+                batch.clear(ONU_DOWN, olt_id, onu_id)
+
+    def filter(self, batch: AlarmBatch, now: Optional[float] = None) -> int:
+        """
+        Hold down new ONU transitions and rate limit raises in batch
+
+        Returns:
+            Jumlah raise yang dibuang karena token bucket habis
+        """
+        now = time.monotonic() if now is None else now
+        actions = batch.pending()
+        for transition in batch.onu_transitions:
+            key = (ONU_DOWN, transition.olt_id, None, transition.onu_id)
+            offline = transition.status == OnuStatus.OFFLINE
+            hold_down = self.raise_hold_down if offline else self.clear_hold_down
+            # Perubahan sebelumnya masih di dalam hold-down-nya: raise (atau clear) tsb tidak pernah ditulis
+            previous = self.clear_hold_down if offline else self.raise_hold_down
+            if transition.since is not None and (transition.at - transition.since).total_seconds() < previous:
+                self.record("flap", ONU_DOWN)
+            if hold_down > 0 and key in actions:
+                batch.discard(key)
+
+        limited = 0
+        for key, pending in list(actions.items()):
+            if pending is not None and not self.allow(entity_of(key), now):
+                batch.discard(key)
+                self.record("rate_limited", key[0], pending.count)
+                limited += 1
+        return limited
+
+    def stats(self, db: Session) -> dict:
+        now = datetime.utcnow()
+        # ONU yang masih di dalam hold-down: transisinya belum menjadi raise / clear
+        pending_raise = db.scalar(select(func.count(Onu.id)).where(
+            Onu.status == OnuStatus.OFFLINE,
+            Onu.last_status_change > now - timedelta(seconds=self.raise_hold_down),
+            ~_has_onu_down(RAISED_STATUSES),
+        ))
+        pending_clear = db.scalar(select(func.count(Onu.id)).where(
+            Onu.status == OnuStatus.ONLINE,
+            Onu.last_status_change > now - timedelta(seconds=self.clear_hold_down),
+            _has_onu_down(OPEN_STATUSES),
+        ))
+        with self._lock:
+            suppressed: Dict[str, Dict[str, int]] = {}
+            for (reason, alarm_type), count in self._suppressed.items():
+                suppressed.setdefault(reason, {})[alarm_type] = count
+            return {
+                "suppressed": suppressed,
+                "pending_raise": pending_raise,
+                "pending_clear": pending_clear,
+                "tracked_entities": len(self._buckets),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+            self._suppressed.clear()
+
+storm_guard = StormGuard()
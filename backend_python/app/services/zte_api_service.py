@@ -23,13 +23,16 @@ Endpoint default: http://<OLT_IP>:1661
 Endpoint dapat dikustomisasi per OLT melalui field api_endpoint di database
 """
 
-import requests
+from app.lazy import lazy_import
 from app.models import Olt
 from typing import Optional, Dict, List
 import json
-from cryptography.fernet import Fernet
 import os
-from requests.auth import HTTPBasicAuth
+
+# requests dan cryptography baru di-import saat request API pertama
+requests = lazy_import("requests")
+requests_auth = lazy_import("requests.auth")
+fernet = lazy_import("cryptography.fernet")
 
 class ZteApiService:
     """
@@ -51,16 +54,16 @@ class ZteApiService:
             Password dalam bentuk plain text
         """
         try:
-            key = os.getenv('ENCRYPTION_KEY', Fernet.generate_key())
+            key = os.getenv('ENCRYPTION_KEY', fernet.Fernet.generate_key())
             if isinstance(key, str):
                 key = key.encode()
-            f = Fernet(key)
+            f = fernet.Fernet(key)
             return f.decrypt(encrypted_password.encode()).decode()
         except:
             # Jika dekripsi gagal, asumsikan password masih plain text (untuk development)
             return encrypted_password
     
-    def _get_auth(self, olt: Olt) -> Optional[HTTPBasicAuth]:
+    def _get_auth(self, olt: Olt) -> Optional["requests_auth.HTTPBasicAuth"]:
         """
         Membuat object HTTPBasicAuth untuk autentikasi API
         
@@ -72,7 +75,7 @@ class ZteApiService:
         """
         if olt.api_username and olt.api_password:
             password = self._decrypt_password(olt.api_password)
-            return HTTPBasicAuth(olt.api_username, password)
+            return requests_auth.HTTPBasicAuth(olt.api_username, password)
         return None
     
     def _get_base_url(self, olt: Olt) -> str:
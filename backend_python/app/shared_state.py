@@ -0,0 +1,200 @@
+"""
+File: shared_state.py
+
+State bersama antar worker / instance API (cache dan rate limit)
+
+Fungsi utama:
+- LocalState: implementasi in-process (default, untuk development / 1 worker)
+- RedisState: implementasi Redis, dipakai bersama oleh semua worker gunicorn
+  dan semua instance backend di belakang load balancer
+- SharedCache: cache key-value dengan namespace dan TTL di atas shared state
+  (interface sama dengan TTLCache: get / set / invalidate)
+- RateLimiter: batas jumlah kejadian per key dalam satu window (fixed window)
+
+Environment variables:
+- REDIS_URL: URL Redis (mis. redis://redis:6379/0). Kosong = LocalState
+- SHARED_STATE_PREFIX: Prefix semua key di Redis (default nms)
+- SHARED_STATE_TIMEOUT: Timeout operasi Redis dalam detik (default 0.5)
+
+Catatan:
+- Nilai disimpan sebagai JSON (orjson), jadi harus berupa dict/list/str/angka
+- Jika Redis tidak bisa dihubungi, operasi dianggap cache miss / tidak dibatasi
+  dan error dicatat di log; API tetap berjalan tanpa state bersama
+- Dengan LocalState setiap process punya state sendiri, sama seperti sebelumnya
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import orjson
+
+from app.lazy import lazy_import
+
+logger = logging.getLogger(__name__)
+
+redis = lazy_import("redis")
+
+REDIS_URL = os.getenv("REDIS_URL", "")
+SHARED_STATE_PREFIX = os.getenv("SHARED_STATE_PREFIX", "nms")
+SHARED_STATE_TIMEOUT = float(os.getenv("SHARED_STATE_TIMEOUT", "0.5"))
+
+class LocalState:
+    """In-process shared state, per worker"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str, now: float) -> Optional[Tuple[float, Any]]:
+        entry = self._data.get(key)
+        if entry is not None and entry[0] < now:
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+            return None if entry is None else entry[1]
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def set_if_absent(self, key: str, value: Any, ttl: float) -> bool:
+        """Store value only if key does not exist, True if stored"""
+        with self._lock:
+            now = time.monotonic()
+            if self._live(key, now) is not None:
+                return False
+            self._data[key] = (now + ttl, value)
+            return True
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def incr(self, key: str, ttl: float) -> int:
+        """Increment a counter, the ttl starts with the first increment"""
+        with self._lock:
+            now = time.monotonic()
+            entry = self._live(key, now)
+            expires_at, count = entry if entry is not None else (now + ttl, 0)
+            self._data[key] = (expires_at, count + 1)
+            return count + 1
+
+    def ping(self) -> bool:
+        return True
+
+class RedisState:
+    """Shared state stored in Redis, common to every worker and instance"""
+
+    def __init__(self, url: str, prefix: str = SHARED_STATE_PREFIX):
+        self.url = url
+        self.prefix = prefix
+        self._client = None
+
+    @property
+    def client(self):
+        # Dibuat saat pertama dipakai, sehingga setiap worker (setelah fork) punya pool sendiri
+        if self._client is None:
+            self._client = redis.Redis.from_url(
+                self.url,
+                socket_timeout=SHARED_STATE_TIMEOUT,
+                socket_connect_timeout=SHARED_STATE_TIMEOUT,
+            )
+        return self._client
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self._key(key))
+        return None if raw is None else orjson.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float):
+        self.client.set(self._key(key), orjson.dumps(value), px=max(1, int(ttl * 1000)))
+
+    def set_if_absent(self, key: str, value: Any, ttl: float) -> bool:
+        return bool(self.client.set(self._key(key), orjson.dumps(value), px=max(1, int(ttl * 1000)), nx=True))
+
+    def delete(self, *keys: str):
+        if keys:
+            self.client.delete(*(self._key(key) for key in keys))
+
+    def incr(self, key: str, ttl: float) -> int:
+        full_key = self._key(key)
+        pipe = self.client.pipeline()
+        pipe.incr(full_key)
+        # NX: TTL hanya diset pada increment pertama (fixed window)
+        pipe.pexpire(full_key, max(1, int(ttl * 1000)), nx=True)
+        count, _ = pipe.execute()
+        return int(count)
+
+    def ping(self) -> bool:
+        return bool(self.client.ping())
+
+def create_shared_state(url: str = REDIS_URL):
+    return RedisState(url) if url else LocalState()
+
+shared_state = create_shared_state()
+
+class SharedCache:
+    """TTL cache in a namespace of the shared state, same interface as TTLCache"""
+
+    def __init__(self, namespace: str, ttl: float, state=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.state = state or shared_state
+        self._keys_key = f"cache:{namespace}:__keys__"
+
+    def _key(self, key: str) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            return self.state.get(self._key(key))
+        except Exception as e:
+            logger.warning(f"Shared cache get failed ({self.namespace}): {e}")
+            return None
+
+    def set(self, key: str, value: Any):
+        try:
+            self.state.set(self._key(key), value, self.ttl)
+            keys = set(self.state.get(self._keys_key) or [])
+            if key not in keys:
+                keys.add(key)
+                self.state.set(self._keys_key, sorted(keys), max(self.ttl, 3600))
+        except Exception as e:
+            logger.warning(f"Shared cache set failed ({self.namespace}): {e}")
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop one key, or every key of the namespace when key is None"""
+        try:
+            if key is not None:
+                self.state.delete(self._key(key))
+                return
+            keys: Iterable[str] = self.state.get(self._keys_key) or []
+            self.state.delete(*(self._key(name) for name in keys))
+        except Exception as e:
+            logger.warning(f"Shared cache invalidate failed ({self.namespace}): {e}")
+
+class RateLimiter:
+    """At most limit events per key within window seconds, shared by all workers"""
+
+    def __init__(self, name: str, limit: int, window: float, state=None):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.state = state or shared_state
+
+    def hit(self, key: Any) -> bool:
+        """Record one event, False if the limit for key is exceeded"""
+        try:
+            return self.state.incr(f"rate:{self.name}:{key}", self.window) <= self.limit
+        except Exception as e:
+            logger.warning(f"Rate limiter {self.name} unavailable: {e}")
+            return True
@@ -0,0 +1,113 @@
+"""
+File: streaming.py
+
+Streaming response (NDJSON / JSON array) untuk koleksi besar
+
+Fungsi utama:
+- StreamFormat: format streaming yang didukung (ndjson, json)
+- stream_query: menjalankan SELECT kolom dengan server-side cursor dan
+  mengirim hasilnya per chunk tanpa membangun list ORM / model Pydantic
+- stream_items: mengirim item yang sudah ada di memori (mis. geo index) per chunk
+- schema_columns: kolom tabel yang sesuai dengan field response schema
+
+Alur kerja:
+1. Endpoint membangun select() berisi kolom yang diperlukan saja
+2. Generator membuka session sendiri, mengeksekusi query dengan yield_per
+   sehingga driver memakai server-side cursor (SSCursor di MySQL)
+3. Setiap partisi (STREAM_CHUNK_SIZE baris) diserialisasi dengan orjson dan
+   dikirim sebagai satu chunk HTTP, lalu dibuang dari memori
+
+Environment variables:
+- STREAM_CHUNK_SIZE: Jumlah baris per chunk / fetch dari cursor (default 1000)
+
+Catatan:
+- Session dari get_db sudah ditutup sebelum body response selesai dikirim,
+  karena itu generator membuka SessionLocal sendiri
+- NDJSON: satu objek JSON per baris (application/x-ndjson)
+- json: satu array JSON yang dikirim bertahap, kompatibel dengan client biasa
+- Pemakaian memori puncak sebanding dengan STREAM_CHUNK_SIZE, bukan jumlah baris
+"""
+import os
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import orjson
+from fastapi.responses import StreamingResponse
+
+from app.database import SessionLocal
+
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "1000"))
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+class StreamFormat(str, Enum):
+    NDJSON = "ndjson"
+    JSON = "json"
+
+def _default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def schema_columns(model, schema) -> List[Any]:
+    """Table columns of model that are fields of the Pydantic schema, in schema order"""
+    table_columns = model.__table__.c
+    return [table_columns[name] for name in schema.model_fields if name in table_columns]
+
+def _encode(chunks: Iterable[List[Dict[str, Any]]], fmt: StreamFormat) -> Iterator[bytes]:
+    if fmt is StreamFormat.NDJSON:
+        for chunk in chunks:
+            if chunk:
+                yield b"".join(orjson.dumps(item, default=_default) + b"\n" for item in chunk)
+        return
+
+    yield b"["
+    first = True
+    for chunk in chunks:
+        if not chunk:
+            continue
+        body = b",".join(orjson.dumps(item, default=_default) for item in chunk)
+        yield body if first else b"," + body
+        first = False
+    yield b"]"
+
+def _chunked(items: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _query_chunks(statement, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    db = SessionLocal()
+    try:
+        result = db.execute(statement.execution_options(yield_per=chunk_size))
+        for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+    finally:
+        db.close()
+
+def _response(body: Iterator[bytes], fmt: StreamFormat, filename: Optional[str]) -> StreamingResponse:
+    media_type = NDJSON_MEDIA_TYPE if fmt is StreamFormat.NDJSON else "application/json"
+    headers = {}
+    if filename:
+        extension = "ndjson" if fmt is StreamFormat.NDJSON else "json"
+        headers["Content-Disposition"] = f'attachment; filename="{filename}.{extension}"'
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+def stream_query(statement, fmt: StreamFormat, filename: Optional[str] = None, chunk_size: int = STREAM_CHUNK_SIZE) -> StreamingResponse:
+    """
+    Stream the rows of a column select() as NDJSON or a JSON array
+
+    statement sebaiknya berisi kolom (bukan entity ORM) agar tidak ada hidrasi objek.
+    filename diisi untuk export, sehingga browser menyimpan response sebagai file.
+    """
+    return _response(_encode(_query_chunks(statement, chunk_size), fmt), fmt, filename)
+
+def stream_items(items: Iterable[Dict[str, Any]], fmt: StreamFormat, filename: Optional[str] = None, chunk_size: int = STREAM_CHUNK_SIZE) -> StreamingResponse:
+    """Stream already materialized dicts in chunks"""
+    return _response(_encode(_chunked(items, chunk_size), fmt), fmt, filename)
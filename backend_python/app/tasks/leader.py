@@ -0,0 +1,294 @@
+"""
+File: tasks/leader.py
+
+Leader election agar scheduler poller hanya berjalan di satu process
+
+Fungsi utama:
+- MySqlLockElector: advisory lock MySQL GET_LOCK pada koneksi khusus;
+  lock otomatis lepas saat koneksi / process leader mati
+- RedisLeaseElector: lease Redis (SET NX PX) yang diperpanjang berkala;
+  lease habis sendiri jika leader berhenti memperpanjang
+- FileLockElector: flock pada file lokal, untuk satu host / development
+- LeaderRunner: menjalankan job hanya selama process ini menjadi leader
+
+Alur kerja:
+1. Setiap kandidat mencoba acquire setiap LEADER_RETRY_INTERVAL detik
+2. Kandidat yang berhasil menjalankan job (mis. app.tasks.poller.main)
+3. Thread heartbeat memanggil renew setiap LEADER_RENEW_INTERVAL detik,
+   terpisah dari event loop job
+4. Jika renew gagal, job dibatalkan dan process kembali menjadi kandidat
+5. Job memanggil ensure_leadership() sebelum setiap penulisan (mis. per OLT
+   di poller): renew dicek sekali lagi, LeadershipLost jika sudah bukan leader.
+   Pembatalan task saja tidak cukup jika job sedang tertahan di panggilan
+   blocking (SNMP), karena lease Redis bisa habis dan leader baru mulai
+   menulis sebelum panggilan itu kembali
+5. Saat shutdown job dibatalkan dan lock dilepas, kandidat lain mengambil alih
+
+Environment variables:
+- LEADER_BACKEND: auto (default), mysql, redis atau file. auto memilih redis
+  jika REDIS_URL diisi, mysql jika DATABASE_URL MySQL, selain itu file
+- LEADER_LEASE_TTL: Masa berlaku lease Redis dalam detik (default 15)
+- LEADER_RENEW_INTERVAL: Interval heartbeat / renew dalam detik (default 5)
+- LEADER_RETRY_INTERVAL: Interval percobaan acquire kandidat (default 2)
+- LEADER_LOCK_DIR: Folder file lock untuk backend file (default temp dir)
+
+Catatan:
+- Waktu failover jika leader mati mendadak: mysql / file sekitar
+  LEADER_RETRY_INTERVAL, redis paling lama LEADER_LEASE_TTL + LEADER_RETRY_INTERVAL
+- Uji failover: python -m benchmarks.leader_failover
+- Masih ada jendela kecil antara ensure_leadership() dan penulisan; tanpa fencing
+  token di database, job harus menulis segera setelah pengecekan
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import tempfile
+import threading
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import text
+
+from app.shared_state import REDIS_URL, SHARED_STATE_PREFIX, redis
+
+logger = logging.getLogger(__name__)
+
+LEADER_BACKEND = os.getenv("LEADER_BACKEND", "auto").lower()
+LEADER_LEASE_TTL = float(os.getenv("LEADER_LEASE_TTL", "15"))
+LEADER_RENEW_INTERVAL = float(os.getenv("LEADER_RENEW_INTERVAL", "5"))
+LEADER_RETRY_INTERVAL = float(os.getenv("LEADER_RETRY_INTERVAL", "2"))
+LEADER_LOCK_DIR = os.getenv("LEADER_LOCK_DIR", tempfile.gettempdir())
+
+# Runner yang sedang menjalankan job di task ini (diwarisi task turunan job)
+_current_runner: contextvars.ContextVar = contextvars.ContextVar("leader_runner", default=None)
+
+class LeadershipLost(Exception):
+    """This process is no longer the leader, the job must not write"""
+
+async def ensure_leadership():
+    """Renew now and raise LeadershipLost if leadership is gone (no-op outside a LeaderRunner job)"""
+    runner = _current_runner.get()
+    if runner is None:
+        return
+    if not runner.is_leader or not await asyncio.to_thread(runner.renew):
+        raise LeadershipLost(f"{runner.name} lost leadership")
+
+class MySqlLockElector:
+    """Leadership = holding GET_LOCK(name) on a dedicated MySQL connection"""
+
+    def __init__(self, engine, name: str):
+        self.engine = engine
+        self.name = name
+        self._conn = None
+
+    def try_acquire(self) -> bool:
+        conn = self.engine.connect()
+        try:
+            acquired = conn.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": self.name}).scalar()
+        except Exception:
+            conn.close()
+            raise
+        if acquired != 1:
+            conn.close()
+            return False
+        self._conn = conn
+        return True
+
+    def renew(self) -> bool:
+        if self._conn is None:
+            return False
+        try:
+            return self._conn.execute(
+                text("SELECT IS_USED_LOCK(:name) = CONNECTION_ID()"), {"name": self.name}
+            ).scalar() == 1
+        except Exception as e:
+            logger.warning(f"Leader lock check failed: {e}")
+            return False
+
+    def release(self):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": self.name})
+        except Exception:
+            pass
+        finally:
+            conn.close()
+
+# Perpanjang / hapus lease hanya jika masih dimiliki token ini
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class RedisLeaseElector:
+    """Leadership = owning a Redis key with a TTL that the leader keeps renewing"""
+
+    def __init__(self, url: str, name: str, ttl: float = LEADER_LEASE_TTL):
+        self.client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+        self.key = f"{SHARED_STATE_PREFIX}:leader:{name}"
+        self.ttl_ms = int(ttl * 1000)
+        self.token = f"{os.getpid()}-{uuid.uuid4().hex}"
+
+    def try_acquire(self) -> bool:
+        return bool(self.client.set(self.key, self.token, nx=True, px=self.ttl_ms))
+
+    def renew(self) -> bool:
+        try:
+            return self.client.eval(RENEW_SCRIPT, 1, self.key, self.token, self.ttl_ms) == 1
+        except Exception as e:
+            logger.warning(f"Leader lease renew failed: {e}")
+            return False
+
+    def release(self):
+        try:
+            self.client.eval(RELEASE_SCRIPT, 1, self.key, self.token)
+        except Exception:
+            pass
+
+class FileLockElector:
+    """Leadership = exclusive lock on a local file, released by the OS if the process dies"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._handle = None
+
+    def try_acquire(self) -> bool:
+        handle = open(self.path, "a+")
+        try:
+            if os.name == "nt":
+                import msvcrt
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._handle = handle
+        return True
+
+    def renew(self) -> bool:
+        return self._handle is not None
+
+    def release(self):
+        handle, self._handle = self._handle, None
+        if handle is not None:
+            handle.close()
+
+def create_elector(name: str, backend: str = LEADER_BACKEND):
+    """Elector for the configured backend"""
+    from app.database import DATABASE_URL, engine
+
+    if backend == "auto":
+        if REDIS_URL:
+            backend = "redis"
+        elif DATABASE_URL.startswith("mysql"):
+            backend = "mysql"
+        else:
+            backend = "file"
+
+    if backend == "redis":
+        return RedisLeaseElector(REDIS_URL, name)
+    if backend == "mysql":
+        return MySqlLockElector(engine, f"nms:{name}")
+    if backend == "file":
+        return FileLockElector(os.path.join(LEADER_LOCK_DIR, f"nms-{name}.lock"))
+    raise ValueError(f"Unknown LEADER_BACKEND: {backend}")
+
+class LeaderRunner:
+    """Run an async job only while this process holds leadership"""
+
+    def __init__(self, elector, job: Callable[[], Awaitable], name: str = "poller"):
+        self.elector = elector
+        self.job = job
+        self.name = name
+        self.is_leader = False
+        self._stop = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        # Koneksi lock MySQL tidak thread-safe: heartbeat dan job renew bergantian
+        self._renew_lock = threading.Lock()
+
+    def renew(self) -> bool:
+        """Renew leadership (heartbeat thread or job), stop the job if it is lost"""
+        with self._renew_lock:
+            renewed = self.is_leader and self.elector.renew()
+        if not renewed:
+            self._lose()
+        return renewed
+
+    def _lose(self):
+        was_leader, self.is_leader = self.is_leader, False
+        task = self._task
+        if was_leader:
+            logger.warning(f"[{self.name}] Lost leadership, stopping job")
+        if task is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(task.cancel)
+
+    def _heartbeat(self, done: threading.Event):
+        while not done.wait(LEADER_RENEW_INTERVAL):
+            if not self.renew():
+                return
+
+    async def _lead(self):
+        self.is_leader = True
+        logger.info(f"[{self.name}] Became leader (pid {os.getpid()})")
+        token = _current_runner.set(self)
+        try:
+            self._task = asyncio.create_task(self.job())
+        finally:
+            _current_runner.reset(token)
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(done,), daemon=True)
+        heartbeat.start()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"[{self.name}] Job failed: {e}")
+        finally:
+            done.set()
+            self.is_leader = False
+            await asyncio.to_thread(heartbeat.join)
+            await asyncio.to_thread(self.elector.release)
+            self._task = None
+
+    async def run(self):
+        """Campaign for leadership until stop() is called"""
+        self._loop = asyncio.get_running_loop()
+        while not self._stop.is_set():
+            try:
+                acquired = await asyncio.to_thread(self.elector.try_acquire)
+            except Exception as e:
+                logger.warning(f"[{self.name}] Leader election unavailable: {e}")
+                acquired = False
+            if acquired:
+                await self._lead()
+            await asyncio.to_thread(self._stop.wait, LEADER_RETRY_INTERVAL)
+
+    def start_thread(self) -> threading.Thread:
+        """Run the campaign on a background thread with its own event loop"""
+        self._thread = threading.Thread(target=asyncio.run, args=(self.run(),), name=f"leader-{self.name}", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop campaigning, cancel the job if leading and release leadership"""
+        self._stop.set()
+        if self._loop is not None and self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -1,50 +1,123 @@
 """
 Background task for SNMP polling
-Can be run as a separate process or integrated with FastAPI BackgroundTasks
+Can be run as a separate process (python -m app.tasks.poller) or inside the
+API workers (RUN_POLLER_IN_API=1). In both cases the scheduler is guarded by
+leader election (app/tasks/leader.py), so exactly one process polls the OLTs
+however many poller processes or API workers are running.
 """
 import asyncio
+import os
+import signal
 import time
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.database import SessionLocal
-from app.models import Olt, Onu
-from app.services.snmp_service import SnmpService
+from app.cache import dashboard_cache
+from app.models import Olt, OltStatus, Onu
+from app.services.container import services
+from app.services.counter_service import CounterService
+from app.services.activity_rollup_service import ActivityRollupService
+from app.services.alarm_manager import AlarmBatch, alarm_manager
+from app.services.optical_engine import optical_engine
+from app.tasks.leader import LeaderRunner, LeadershipLost, create_elector, ensure_leadership
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Optional
 
-snmp_service = SnmpService()
+counter_service = CounterService()
+activity_rollup_service = ActivityRollupService()
 
-async def poll_olt_async(olt: Olt, db: Session):
-    """Poll single OLT asynchronously"""
-    try:
-        # Get system info
-        system_info = snmp_service.get_system_info(olt)
-        if system_info.get('sysUpTime'):
-            olt.status = "online"
-            olt.last_polled_at = datetime.now()
+# Interval rekonsiliasi tabel status_counters (detik)
+COUNTER_RECONCILE_INTERVAL = int(os.getenv("COUNTER_RECONCILE_INTERVAL", "300"))
+# Interval pengecekan rollup harian activity log (detik)
+ACTIVITY_ROLLUP_INTERVAL = int(os.getenv("ACTIVITY_ROLLUP_INTERVAL", "3600"))
+# Jumlah OLT yang di-poll bersamaan; setiap poll memakai satu koneksi saat menulis,
+# jadi harus di bawah ukuran pool SQLAlchemy (default 5, satu untuk reconcile / rollup)
+POLL_CONCURRENCY = int(os.getenv("POLL_CONCURRENCY", "4"))
+
+class OltCache:
+    """
+    Local OLT inventory cache for the poller
+
+    Instead of loading every OLT each cycle, only OLTs whose updated_at
+    moved past the last seen cursor are reloaded. Deleted OLTs are detected
+    by comparing the cached ids with the id set in the database (a count
+    comparison misses a delete + insert within one cycle); ids missing from
+    the cache trigger a full reload.
+    """
+
+    def __init__(self):
+        self.olts: Dict[int, Olt] = {}
+        self.cursor: Optional[datetime] = None
+
+    def refresh(self, db: Session) -> List[Olt]:
+        last_updated = db.query(func.max(Olt.updated_at)).scalar()
+        ids = {olt_id for (olt_id,) in db.query(Olt.id)}
+
+        if self.cursor is None or last_updated is None:
+            changed = db.query(Olt).all()
+            self.olts = {}
+        elif last_updated >= self.cursor:
+            # >= karena updated_at hanya presisi detik
+            changed = db.query(Olt).filter(Olt.updated_at >= self.cursor).all()
         else:
-            olt.status = "offline"
-        
+            changed = []
+
+        for olt in changed:
+            # Detach supaya object tidak di-expire (dan di-query ulang) setiap commit
+            db.expunge(olt)
+            self.olts[olt.id] = olt
+
+        for olt_id in self.olts.keys() - ids:
+            del self.olts[olt_id]
+
+        if ids - self.olts.keys():
+            self.cursor = None
+            return self.refresh(db)
+
+        self.cursor = last_updated
+        return list(self.olts.values())
+
+def update_olt_telemetry(db: Session, olt_id: int, values: dict):
+    """
+    Update OLT status fields without touching updated_at
+
+    updated_at dipakai sebagai cursor perubahan inventory OLT (GET /api/olts?since=),
+    jadi hasil polling tidak boleh menggeser cursor tersebut.
+    """
+    values = dict(values, updated_at=Olt.updated_at)
+    db.query(Olt).filter(Olt.id == olt_id).update(values, synchronize_session=False)
+
+def save_olt_status(olt_id: int, online: bool, alarms: Optional[AlarmBatch] = None):
+    """Write the reachability of one OLT in its own short transaction"""
+    with SessionLocal() as db:
+        old_status = db.query(Olt.status).filter(Olt.id == olt_id).scalar()
+        if online:
+            update_olt_telemetry(db, olt_id, {"status": "online", "last_polled_at": datetime.now()})
+        else:
+            update_olt_telemetry(db, olt_id, {"status": "offline"})
+        if alarms is not None:
+            alarms.olt_status_changed(olt_id, old_status, OltStatus.ONLINE if online else OltStatus.OFFLINE)
         db.commit()
-        
-        # Get ONU list
-        onu_list = snmp_service.get_onu_list(olt)
-        
-        # Sync ONUs
+
+def save_onus(olt_id: int, onu_list: List[dict], alarms: AlarmBatch):
+    """Write the ONU list of one OLT and its alarm batch in one short transaction"""
+    with SessionLocal() as db:
         for onu_data in onu_list:
             onu = db.query(Onu).filter(
-                Onu.olt_id == olt.id,
+                Onu.olt_id == olt_id,
                 Onu.pon_port == onu_data['pon_port'],
                 Onu.onu_id == onu_data['onu_id']
             ).first()
             
             if onu:
+                alarms.onu_status_changed(onu, onu.status, onu_data['status'])
                 onu.status = onu_data['status']
                 onu.rx_power = onu_data.get('rx_power')
                 onu.tx_power = onu_data.get('tx_power')
                 onu.last_seen_at = datetime.now()
             else:
                 onu = Onu(
-                    olt_id=olt.id,
+                    olt_id=olt_id,
                     serial_number=onu_data['serial_number'],
                     pon_port=onu_data['pon_port'],
                     onu_id=onu_data['onu_id'],
@@ -54,33 +127,115 @@ async def poll_olt_async(olt: Olt, db: Session):
                     last_seen_at=datetime.now()
                 )
                 db.add(onu)
+                # ONU yang sama bisa muncul dua kali di list (query berikutnya harus menemukannya)
+                db.flush()
         
-        db.commit()
+        optical_engine.evaluate(db, olt_id, alarms)
+        alarms.commit(db)
+
+async def poll_olt_async(olt: Olt):
+    """
+    Poll single OLT asynchronously
+
+    SNMP dan penulisan database (blocking) dijalankan di thread pool. Setiap
+    penulisan memakai session sendiri yang di-commit dan ditutup di thread
+    tsb, sehingga tidak ada transaksi / koneksi yang terbuka melewati await;
+    leadership dicek ulang tepat sebelum setiap penulisan (ensure_leadership).
+    """
+    # Alarm (onu_down, pon_los, olt_unreachable, optik) ditulis sekaligus bersama ONU
+    alarms = alarm_manager.batch(olt.id)
+    try:
+        # Get system info
+        system_info = await asyncio.to_thread(services.snmp.get_system_info, olt)
+        await ensure_leadership()
+        await asyncio.to_thread(save_olt_status, olt.id, bool(system_info.get('sysUpTime')), alarms)
+        
+        # Get ONU list
+        onu_list = await asyncio.to_thread(services.snmp.get_onu_list, olt)
+        await ensure_leadership()
+        await asyncio.to_thread(save_onus, olt.id, onu_list, alarms)
         print(f"[INFO] Polled OLT {olt.name} - {len(onu_list)} ONUs found")
         
+    except LeadershipLost:
+        raise
     except Exception as e:
         print(f"[ERROR] Failed to poll OLT {olt.name}: {e}")
-        olt.status = "offline"
-        db.commit()
+        await ensure_leadership()
+        await asyncio.to_thread(save_olt_status, olt.id, False)
 
 async def poll_all_olts():
-    """Poll all OLTs continuously"""
-    db = SessionLocal()
+    """Poll all OLTs continuously, at most POLL_CONCURRENCY at a time"""
+    olt_cache = OltCache()
+    semaphore = asyncio.Semaphore(POLL_CONCURRENCY)
+
+    async def poll_bounded(olt: Olt):
+        async with semaphore:
+            await poll_olt_async(olt)
+
     try:
         while True:
-            olts = db.query(Olt).all()
+            with SessionLocal() as db:
+                olts = olt_cache.refresh(db)
             if olts:
-                tasks = [poll_olt_async(olt, db) for olt in olts]
-                await asyncio.gather(*tasks, return_exceptions=True)
+                await asyncio.gather(*(poll_bounded(olt) for olt in olts), return_exceptions=True)
+                dashboard_cache.invalidate()
             else:
                 print("[WARNING] No OLTs found")
             
             await asyncio.sleep(30)  # Poll every 30 seconds
     except KeyboardInterrupt:
         print("[INFO] Polling stopped")
-    finally:
-        db.close()
+
+async def reconcile_counters():
+    """Periodically correct drift between status_counters and the onus/alarms tables"""
+    while True:
+        await ensure_leadership()
+        db = SessionLocal()
+        try:
+            drifted = counter_service.reconcile(db)
+            if drifted:
+                print(f"[WARNING] Reconciled {drifted} drifted status counter rows")
+                dashboard_cache.invalidate()
+        except Exception as e:
+            print(f"[ERROR] Failed to reconcile status counters: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+        await asyncio.sleep(COUNTER_RECONCILE_INTERVAL)
+
+async def rollup_activity_logs():
+    """Periodically roll up complete days of activity logs into activity_log_daily"""
+    while True:
+        await ensure_leadership()
+        db = SessionLocal()
+        try:
+            days = activity_rollup_service.refresh(db)
+            if days:
+                print(f"[INFO] Rolled up {days} days of activity logs")
+        except Exception as e:
+            print(f"[ERROR] Failed to roll up activity logs: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+        await asyncio.sleep(ACTIVITY_ROLLUP_INTERVAL)
+
+async def main():
+    await asyncio.gather(poll_all_olts(), reconcile_counters(), rollup_activity_logs())
+
+def create_runner() -> LeaderRunner:
+    """Poll scheduler that only runs while this process is the elected leader"""
+    return LeaderRunner(create_elector("poller"), main, name="poller")
+
+async def run_with_leader_election():
+    runner = create_runner()
+    loop = asyncio.get_running_loop()
+    if hasattr(signal, "SIGTERM") and os.name != "nt":
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, runner.stop)
+    await runner.run()
 
 if __name__ == "__main__":
-    asyncio.run(poll_all_olts())
+    asyncio.run(run_with_leader_election())
 
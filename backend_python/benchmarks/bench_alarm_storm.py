@@ -0,0 +1,93 @@
+"""
+File: benchmarks/bench_alarm_storm.py
+
+Simulasi alarm storm: jumlah penulisan alarm dengan dan tanpa storm guard
+
+Skenario:
+- Satu OLT, setiap ONU di PON sendiri; 1 dari 10 ONU flapping (offline /
+  online bergantian setiap dua siklus poll), cukup sedikit sehingga tidak
+  dikorelasikan menjadi pon_los / olt_unreachable
+- Setiap siklus memanggil OltService.sync_onus dengan SNMP tiruan
+- tanpa guard: hold-down 0 dan bucket tanpa batas (perilaku sebelum storm guard)
+- dengan guard: hold-down dan token bucket default, waktu poll disimulasikan
+  dengan menggeser jam monotonic storm guard (token bucket) dan memundurkan
+  onus.last_status_change (hold-down) sebesar interval poll per siklus
+
+Usage (dari folder backend_python, tabel dibuat dengan create_all di SQLite sementara):
+    python -m benchmarks.bench_alarm_storm [jumlah_onu] [jumlah_siklus] [interval_poll]
+"""
+
+import os
+import sys
+import tempfile
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+DB_FILE = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_FILE}")
+
+from sqlalchemy import func, select
+
+from app.database import Base, SessionLocal, engine
+from app.models import Alarm, Olt, OltStatus, Onu, OnuStatus
+from app.services import storm_guard as storm_guard_module
+from app.services.alarm_correlator import alarm_correlator
+from app.services.olt_service import OltService
+
+def seed(onus: int):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        olt = Olt(name="bench", ip_address="10.0.0.1", snmp_community="public", status=OltStatus.ONLINE)
+        db.add(olt)
+        db.flush()
+        for i in range(onus):
+            db.add(Onu(olt_id=olt.id, serial_number=f"SN{i:06d}", pon_port=i, onu_id=1, status=OnuStatus.ONLINE))
+        db.commit()
+        return olt.id
+
+def run(onus: int, cycles: int, interval: float, guard) -> dict:
+    olt_id = seed(onus)
+    alarm_correlator.reset()
+    storm_guard_module.storm_guard = guard
+    clock = [1000.0]
+    real_monotonic = storm_guard_module.time.monotonic
+    storm_guard_module.time.monotonic = lambda: clock[0]
+
+    service = OltService(snmp=MagicMock(), ssh=MagicMock(), zte_api=MagicMock())
+    writes = 0
+    try:
+        with SessionLocal() as db:
+            olt = db.get(Olt, olt_id)
+            serials = [onu.serial_number for onu in db.query(Onu).order_by(Onu.id)]
+            for cycle in range(cycles):
+                flap = "offline" if (cycle // 2) % 2 == 0 else "online"
+                service.snmp.get_onu_list.return_value = [
+                    {"serial_number": serial, "status": flap if i % 10 == 0 else "online"}
+                    for i, serial in enumerate(serials)
+                ]
+                service.sync_onus(olt, db)
+                clock[0] += interval
+                for onu in db.scalars(select(Onu).where(Onu.last_status_change.isnot(None))):
+                    onu.last_status_change -= timedelta(seconds=interval)
+                db.commit()
+            writes = db.scalar(select(func.sum(Alarm.occurrence_count))) or 0
+            rows = db.scalar(select(func.count(Alarm.id)))
+            stats = guard.stats(db)
+    finally:
+        storm_guard_module.time.monotonic = real_monotonic
+    return {"rows": rows, "raises": writes, "stats": stats}
+
+if __name__ == "__main__":
+    onus = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    cycles = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    interval = float(sys.argv[3]) if len(sys.argv) > 3 else 15
+
+    StormGuard = storm_guard_module.StormGuard
+    unguarded = run(onus, cycles, interval, StormGuard(capacity=1e9, refill=1e9, raise_hold_down=0, clear_hold_down=0))
+    guarded = run(onus, cycles, interval, StormGuard())
+
+    print(f"{onus // 10} of {onus} ONUs flapping, {cycles} poll cycles every {interval:.0f} s")
+    print(f"without guard: {unguarded['rows']:6d} alarm rows, {unguarded['raises']:6d} raises")
+    print(f"with guard:    {guarded['rows']:6d} alarm rows, {guarded['raises']:6d} raises")
+    print(f"suppressed:    {guarded['stats']['suppressed']}")
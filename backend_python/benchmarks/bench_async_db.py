@@ -0,0 +1,118 @@
+"""
+File: benchmarks/bench_async_db.py
+
+Benchmark latency route async def dengan session sync vs session async
+di bawah beban paralel
+
+Skenario:
+- Tabel onus diisi N baris (SQLite file sementara)
+- /sync-stats: async def + Session sync (query memblokir event loop)
+- /async-stats: async def + AsyncSession (query dijalankan tanpa memblokir loop)
+- Event loop lag: selisih waktu tidur 5 ms yang diminta dengan yang terjadi,
+  diukur terus-menerus selama beban berjalan. Lag ini adalah tambahan latency
+  yang dialami setiap request lain (mis. /api/health) pada worker yang sama
+
+Usage (dari folder backend_python):
+    pip install aiosqlite httpx
+    python -m benchmarks.bench_async_db [jumlah_onu] [concurrency]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+DB_FILE = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_FILE}")
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database import Base, engine, get_async_db, get_db
+from app.models import Olt, Onu, OnuStatus
+
+app = FastAPI()
+
+def stats_query():
+    return select(Onu.status, func.count(Onu.id), func.avg(Onu.rx_power)).group_by(Onu.status)
+
+@app.get("/sync-stats")
+async def sync_stats(db: Session = Depends(get_db)):
+    return [list(row) for row in db.execute(stats_query()).all()]
+
+@app.get("/async-stats")
+async def async_stats(db: AsyncSession = Depends(get_async_db)):
+    return [list(row) for row in (await db.execute(stats_query())).all()]
+
+def seed(onu_count: int):
+    """Create schema and insert onu_count ONUs"""
+    Base.metadata.create_all(bind=engine)
+    statuses = [OnuStatus.ONLINE, OnuStatus.OFFLINE, OnuStatus.UNKNOWN]
+    with engine.begin() as conn:
+        conn.execute(insert(Olt).values(id=1, name="bench", ip_address="10.0.0.1"))
+        conn.execute(insert(Onu), [
+            {
+                "olt_id": 1,
+                "serial_number": f"ZTEG{i:08d}",
+                "pon_port": i // 128,
+                "onu_id": i % 128,
+                "status": statuses[i % 3],
+                "rx_power": -20.0 - (i % 10),
+            }
+            for i in range(onu_count)
+        ])
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+async def timed_get(client: httpx.AsyncClient, url: str, samples: list):
+    start = time.perf_counter()
+    response = await client.get(url)
+    response.raise_for_status()
+    samples.append((time.perf_counter() - start) * 1000)
+
+async def measure_loop_lag(samples: list, done: asyncio.Event, interval: float = 0.005):
+    while not done.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append((time.perf_counter() - start - interval) * 1000)
+
+async def run(path: str, concurrency: int, rounds: int):
+    """Fire concurrency parallel stats requests, rounds times, while measuring loop lag"""
+    stats_samples, lag_samples = [], []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        done = asyncio.Event()
+        monitor = asyncio.create_task(measure_loop_lag(lag_samples, done))
+        start = time.perf_counter()
+        for _ in range(rounds):
+            await asyncio.gather(*[timed_get(client, path, stats_samples) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+        done.set()
+        await monitor
+    return stats_samples, lag_samples, elapsed
+
+def report(label: str, stats_samples, lag_samples, elapsed):
+    print(
+        f"{label:<12} stats p50 {statistics.median(stats_samples):8.1f} ms"
+        f"  p99 {percentile(stats_samples, 99):8.1f} ms"
+        f" | loop lag p50 {statistics.median(lag_samples):7.1f} ms"
+        f"  p99 {percentile(lag_samples, 99):7.1f} ms  max {max(lag_samples):7.1f} ms"
+        f" | {len(stats_samples) / elapsed:6.1f} req/s"
+    )
+
+if __name__ == "__main__":
+    onu_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    rounds = 5
+
+    seed(onu_count)
+    print(f"{onu_count} ONUs, {concurrency} concurrent stats requests x {rounds} rounds")
+    report("sync Session", *asyncio.run(run("/sync-stats", concurrency, rounds)))
+    report("AsyncSession", *asyncio.run(run("/async-stats", concurrency, rounds)))
@@ -0,0 +1,64 @@
+"""
+File: benchmarks/bench_auth.py
+
+Benchmark overhead autentikasi per request (app.auth.get_current_user)
+
+Skenario:
+- Satu user di database SQLite file sementara, satu JWT valid
+- miss: principal cache dikosongkan sebelum setiap panggilan
+  (jwt.decode + SELECT user, perilaku tanpa cache)
+- hit: token sudah ada di principal cache (hash SHA-256 + lookup dict)
+- Setiap panggilan memakai AsyncSession baru, seperti dependency get_async_db
+
+Usage (dari folder backend_python):
+    pip install aiosqlite
+    python -m benchmarks.bench_auth [jumlah_panggilan]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+DB_FILE = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_FILE}")
+
+from app.auth import create_access_token, get_current_user, principal_cache
+from app.database import AsyncSessionLocal, Base, SessionLocal, engine
+from app.models import User, UserRole
+
+def seed() -> str:
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.add(User(name="bench", email="bench@example.com", password="x", role=UserRole.ADMIN))
+        db.commit()
+    return create_access_token({"sub": "bench@example.com", "role": UserRole.ADMIN.value})
+
+async def timed(token: str, calls: int, clear_cache: bool):
+    samples = []
+    for _ in range(calls):
+        if clear_cache:
+            principal_cache.invalidate()
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            await get_current_user(token, db)
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def report(label, samples):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{label:<12} p50 {statistics.median(samples):8.3f} ms  p99 {p99:8.3f} ms")
+
+async def main(calls: int):
+    token = seed()
+    miss = await timed(token, calls, clear_cache=True)
+    hit = await timed(token, calls, clear_cache=False)
+    print(f"{calls} calls each")
+    report("cache miss", miss)
+    report("cache hit", hit)
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,74 @@
+"""
+File: benchmarks/bench_geo_index.py
+
+Benchmark query radius dan k-nearest pada GridIndex (app/services/geo_index.py)
+
+Skenario:
+- N titik acak di sekitar satu kota (default 100.000 titik dalam ~110 x 110 km)
+- radius: semua titik dalam 500 m dari titik acak
+- nearest: 5 titik terdekat dari titik acak
+- Dibandingkan dengan brute force (hitung jarak ke semua titik)
+
+Usage (dari folder backend_python):
+    python -m benchmarks.bench_geo_index [jumlah_titik] [jumlah_query]
+"""
+
+import heapq
+import random
+import statistics
+import sys
+import time
+
+from app.services.geo_index import GridIndex, POINT_CELL_DEG, haversine_m
+
+CENTER = (-6.2, 106.8)
+SPREAD_DEG = 0.5
+
+def random_point(rng: random.Random):
+    return (
+        CENTER[0] + rng.uniform(-SPREAD_DEG, SPREAD_DEG),
+        CENTER[1] + rng.uniform(-SPREAD_DEG, SPREAD_DEG),
+    )
+
+def timed(fn, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(*query)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def report(label, samples):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{label:<20} p50 {statistics.median(samples):8.3f} ms  p99 {p99:8.3f} ms")
+
+if __name__ == "__main__":
+    point_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    query_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(42)
+
+    points = {key: random_point(rng) for key in range(point_count)}
+    start = time.perf_counter()
+    grid = GridIndex(POINT_CELL_DEG)
+    for key, (lat, lon) in points.items():
+        grid.add(key, lat, lon)
+    print(f"{point_count} points, build {time.perf_counter() - start:.2f} s, {query_count} queries each")
+
+    queries = [random_point(rng) for _ in range(query_count)]
+
+    def brute_radius(lat, lon, radius_m=500):
+        return [key for key, (plat, plon) in points.items() if haversine_m(lat, lon, plat, plon) <= radius_m]
+
+    def brute_nearest(lat, lon, k=5):
+        return heapq.nsmallest(k, ((haversine_m(lat, lon, plat, plon), key) for key, (plat, plon) in points.items()))
+
+    # Hasil harus sama dengan brute force
+    for lat, lon in queries[:20]:
+        assert sorted(key for _, key in grid.within(lat, lon, 500)) == sorted(brute_radius(lat, lon))
+        assert [key for _, key in grid.nearest(lat, lon, 5)] == [key for _, key in brute_nearest(lat, lon)]
+
+    report("grid radius 500 m", timed(lambda lat, lon: grid.within(lat, lon, 500), queries))
+    report("grid nearest k=5", timed(lambda lat, lon: grid.nearest(lat, lon, 5), queries))
+    report("brute radius 500 m", timed(brute_radius, queries[:10]))
+    report("brute nearest k=5", timed(brute_nearest, queries[:10]))
@@ -0,0 +1,109 @@
+"""
+File: benchmarks/bench_login.py
+
+Benchmark throughput login dan dampaknya ke event loop saat login serentak
+(mis. pergantian shift operator)
+
+Skenario:
+- N user di database SQLite file sementara, password di-hash dengan BCRYPT_ROUNDS
+- /login-blocking: verifikasi bcrypt langsung di event loop (perilaku lama)
+- /api/auth/login: route login asli, bcrypt di password_executor
+- Event loop lag diukur terus-menerus selama burst login berjalan; lag ini
+  adalah tambahan latency yang dialami request monitoring pada worker yang sama
+
+Usage (dari folder backend_python):
+    pip install aiosqlite httpx
+    BCRYPT_ROUNDS=12 python -m benchmarks.bench_login [jumlah_login] [concurrency]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+DB_FILE = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_FILE}")
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, get_password_hash, pwd_context
+from app.database import Base, engine, get_async_db
+from app.models import User, UserRole
+from app.routers import auth
+from app.routers.auth import LoginRequest
+
+PASSWORD = "shift-change"
+
+app = FastAPI()
+app.include_router(auth.router)
+
+@app.post("/login-blocking")
+async def login_blocking(login_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(User).where(User.email == login_data.email))
+    if user is None or not pwd_context.verify(login_data.password, user.password):
+        raise HTTPException(status_code=401)
+    return {"id": user.id}
+
+def seed(user_count: int):
+    Base.metadata.create_all(bind=engine)
+    hashed = get_password_hash(PASSWORD)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"name": f"op{i}", "email": f"op{i}@example.com", "password": hashed, "role": UserRole.OPERATOR}
+            for i in range(user_count)
+        ])
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+async def measure_loop_lag(samples: list, done: asyncio.Event, interval: float = 0.005):
+    while not done.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append((time.perf_counter() - start - interval) * 1000)
+
+async def run(path: str, logins: int, concurrency: int):
+    """Fire logins login requests, at most concurrency at a time, while measuring loop lag"""
+    latency_samples, lag_samples = [], []
+    limiter = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login(i: int):
+            async with limiter:
+                start = time.perf_counter()
+                response = await client.post(path, json={"email": f"op{i}@example.com", "password": PASSWORD})
+                response.raise_for_status()
+                latency_samples.append((time.perf_counter() - start) * 1000)
+
+        done = asyncio.Event()
+        monitor = asyncio.create_task(measure_loop_lag(lag_samples, done))
+        start = time.perf_counter()
+        await asyncio.gather(*[login(i) for i in range(logins)])
+        elapsed = time.perf_counter() - start
+        done.set()
+        await monitor
+    return latency_samples, lag_samples, elapsed
+
+def report(label: str, latency_samples, lag_samples, elapsed):
+    print(
+        f"{label:<10} login p50 {statistics.median(latency_samples):8.1f} ms"
+        f"  p99 {percentile(latency_samples, 99):8.1f} ms"
+        f" | loop lag p50 {statistics.median(lag_samples):7.1f} ms  max {max(lag_samples):7.1f} ms"
+        f" | {len(latency_samples) / elapsed:6.1f} logins/s"
+    )
+
+if __name__ == "__main__":
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    seed(logins)
+    print(f"{logins} logins, concurrency {concurrency}, bcrypt rounds {BCRYPT_ROUNDS}, {PASSWORD_HASH_WORKERS} hash workers")
+    report("blocking", *asyncio.run(run("/login-blocking", logins, concurrency)))
+    report("executor", *asyncio.run(run("/api/auth/login", logins, concurrency)))
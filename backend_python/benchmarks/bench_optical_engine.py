@@ -0,0 +1,82 @@
+"""
+File: benchmarks/bench_optical_engine.py
+
+Biaya evaluasi ambang optik per OLT: waktu dan jumlah query per siklus poll
+
+Skenario:
+- Satu OLT dengan N ONU, 3 model ONU, satu ambang per model dan satu per OLT
+- RX power acak di sekitar batas bawah sehingga sebagian ONU ber-alarm
+- Siklus pertama membuat alarm, siklus berikutnya hanya mengubah sebagian
+  nilai (alarm yang berubah level saja yang ditulis)
+
+Usage (dari folder backend_python, tabel dibuat dengan create_all di SQLite sementara):
+    python -m benchmarks.bench_optical_engine [jumlah_onu] [jumlah_siklus]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+DB_FILE = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_FILE}")
+
+from sqlalchemy import event, func, select
+
+from app.database import Base, SessionLocal, engine
+from app.models import Alarm, Olt, OltStatus, Onu, OnuStatus, OpticalMetric, OpticalThreshold
+from app.services.alarm_manager import alarm_manager
+from app.services.optical_engine import optical_engine
+
+MODELS = ["F660", "F670L", "F609"]
+
+def seed(onus: int) -> int:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        olt = Olt(name="bench", ip_address="10.0.0.1", snmp_community="public", status=OltStatus.ONLINE)
+        db.add(olt)
+        db.flush()
+        db.add(OpticalThreshold(olt_id=olt.id, metric=OpticalMetric.RX_POWER, major_low=-28, minor_low=-26))
+        db.add(OpticalThreshold(onu_model="F609", metric=OpticalMetric.RX_POWER, major_low=-26, minor_low=-24))
+        for i in range(onus):
+            db.add(Onu(
+                olt_id=olt.id, serial_number=f"SN{i:06d}", pon_port=i // 128, onu_id=i % 128,
+                model=MODELS[i % len(MODELS)], status=OnuStatus.ONLINE, rx_power=-20.0, tx_power=2.0,
+            ))
+        db.commit()
+        return olt.id
+
+def main(onus: int, cycles: int):
+    olt_id = seed(onus)
+    statements = [0]
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.__setitem__(0, statements[0] + 1))
+    rng = random.Random(1)
+
+    with SessionLocal() as db:
+        ids = db.scalars(select(Onu.id).where(Onu.olt_id == olt_id)).all()
+        for cycle in range(cycles):
+            changed = ids if cycle == 0 else rng.sample(ids, len(ids) // 20)
+            db.execute(
+                Onu.__table__.update().where(Onu.id.in_(changed))
+                .values(rx_power=func.round(-29 + 10 * func.abs(func.random() % 1000) / 1000.0, 2))
+            )
+            statements[0] = 0
+            batch = alarm_manager.batch()
+            started = time.perf_counter()
+            levels = optical_engine.evaluate(db, olt_id, batch)
+            evaluated = time.perf_counter() - started
+            queries = statements[0]
+            result = batch.commit(db)
+            print(
+                f"cycle {cycle}: evaluate {evaluated * 1000:7.1f} ms, {queries} queries, "
+                f"{levels:5d} level changes (created {result.created}, repeated {result.repeated}, cleared {result.cleared})"
+            )
+        open_alarms = db.scalar(select(func.count(Alarm.id)).where(Alarm.status == "ACTIVE"))
+    print(f"{onus} ONUs, {open_alarms} optical alarms open")
+
+if __name__ == "__main__":
+    onus = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+    cycles = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    main(onus, cycles)
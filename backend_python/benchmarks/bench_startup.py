@@ -0,0 +1,80 @@
+"""
+File: benchmarks/bench_startup.py
+
+Benchmark waktu cold start API: import main sampai /api/health bisa dijawab
+
+Skenario:
+- Setiap run adalah process Python baru (cold import, tanpa modul ter-cache)
+- import: waktu `import main` (semua router, model, schema)
+- health: import + lifespan startup + satu GET /api/health lewat TestClient
+- Modul termahal diambil dari python -X importtime pada run pertama
+- Dicek juga apakah library protokol berat ikut ter-import saat startup
+
+Usage (dari folder backend_python):
+    python -m benchmarks.bench_startup [jumlah_run]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HEAVY_MODULES = ("pysnmp", "paramiko", "requests", "cryptography.fernet")
+
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+import main
+print(time.perf_counter() - start)
+"""
+
+HEALTH_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import main
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    assert client.get("/api/health").status_code == 200
+print(time.perf_counter() - start)
+print(",".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+def run_python(code: str, env: dict, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        env=env, capture_output=True, text=True, check=True,
+    )
+
+def top_imports(stderr: str, count: int = 10):
+    """Parse -X importtime output into the modules with the highest cumulative time"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            rows.append((int(cumulative), name.strip()))
+        except ValueError:
+            continue
+    return sorted(rows, reverse=True)[:count]
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    db_file = os.path.join(tempfile.mkdtemp(), "bench.db")
+    env = dict(os.environ, DATABASE_URL=os.environ.get("DATABASE_URL", f"sqlite:///{db_file}"), PYTHONWARNINGS="ignore")
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], env=env, capture_output=True, check=True)
+
+    import_times = [float(run_python(IMPORT_SCRIPT, env).stdout.split()[0]) * 1000 for _ in range(runs)]
+    health_runs = [run_python(HEALTH_SCRIPT.format(heavy=HEAVY_MODULES), env).stdout.split("\n") for _ in range(runs)]
+    health_times = [float(output[0]) * 1000 for output in health_runs]
+    loaded = health_runs[0][1] if len(health_runs[0]) > 1 else ""
+
+    print(f"{runs} cold runs")
+    print(f"import main            p50 {statistics.median(import_times):8.1f} ms  max {max(import_times):8.1f} ms")
+    print(f"first /api/health      p50 {statistics.median(health_times):8.1f} ms  max {max(health_times):8.1f} ms")
+    print(f"heavy modules loaded:  {loaded or 'none'}")
+
+    print("slowest imports (cumulative):")
+    for cumulative, name in top_imports(run_python("import main", env, "-X", "importtime").stderr):
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
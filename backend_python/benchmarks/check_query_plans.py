@@ -0,0 +1,109 @@
+"""
+File: benchmarks/check_query_plans.py
+
+Cek regresi plan query: gagal (exit code 1) jika query hot path memakai full scan
+
+Query yang dicek (dibangun dengan kode yang sama seperti route / service):
+- Lookup ONU poller: onus (olt_id, pon_port, onu_id)
+- Lookup ONU sync_onus: onus (serial_number, olt_id)
+- GET /api/alarms?status=&severity=: alarms (status, severity)
+- GET /api/alarms?status=: alarms (status, occurred_at), terbaru dulu
+- GET /api/activity-logs?user_id=: activity_logs (user_id, created_at), terbaru dulu
+
+Aturan gagal per dialect:
+- SQLite (EXPLAIN QUERY PLAN): langkah SCAN pada tabel
+- MySQL (EXPLAIN): type=ALL
+- PostgreSQL (EXPLAIN): Seq Scan (dengan enable_seqscan=off, sehingga tabel
+  kecil di database uji tidak membuat planner memilih seq scan)
+
+Usage (dari folder backend_python):
+    python -m benchmarks.check_query_plans
+    DATABASE_URL=mysql+pymysql://... python -m benchmarks.check_query_plans
+
+Tanpa DATABASE_URL dibuat SQLite sementara dengan 'alembic upgrade head',
+sehingga index yang dicek adalah index dari migration (bukan create_all).
+Dengan DATABASE_URL, database tsb harus sudah di-upgrade ke head.
+"""
+
+import os
+import sys
+import tempfile
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'plans.db')}"
+    MIGRATE = True
+else:
+    MIGRATE = False
+
+from sqlalchemy import select, text
+
+from app.database import engine
+from app.models import ActivityLog, Alarm, AlarmSeverity, AlarmStatus, Onu
+from app.pagination import PageParams, keyset_page
+
+PAGE = PageParams(cursor=None, limit=50)
+
+def hot_queries():
+    return {
+        "poller ONU lookup (olt_id, pon_port, onu_id)": select(Onu).where(
+            Onu.olt_id == 1, Onu.pon_port == 1, Onu.onu_id == 1
+        ),
+        "sync_onus ONU lookup (serial_number, olt_id)": select(Onu).where(
+            Onu.serial_number == "ZTEG00000001", Onu.olt_id == 1
+        ),
+        "alarms by status and severity": keyset_page(
+            select(Alarm).where(Alarm.status == AlarmStatus.ACTIVE, Alarm.severity == AlarmSeverity.CRITICAL),
+            PAGE, Alarm.id, sort_column=Alarm.occurred_at, descending=True,
+        ),
+        "alarms by status, newest first": keyset_page(
+            select(Alarm).where(Alarm.status == AlarmStatus.ACTIVE),
+            PAGE, Alarm.id, sort_column=Alarm.occurred_at, descending=True,
+        ),
+        "activity logs by user, newest first": keyset_page(
+            select(ActivityLog).where(ActivityLog.user_id == 1),
+            PAGE, ActivityLog.id, sort_column=ActivityLog.created_at, descending=True,
+        ),
+    }
+
+def explain(conn, statement):
+    """Plan lines of statement and whether any of them is a full scan"""
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    dialect = engine.dialect.name
+    if dialect == "sqlite":
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        lines = [row[-1] for row in rows]
+        return lines, any(line.startswith("SCAN") for line in lines)
+    if dialect == "mysql":
+        rows = conn.execute(text(f"EXPLAIN {sql}")).mappings().all()
+        lines = [f"{row['table']}: type={row['type']} key={row['key']}" for row in rows]
+        return lines, any(row["type"] == "ALL" for row in rows)
+    if dialect == "postgresql":
+        conn.execute(text("SET enable_seqscan = off"))
+        lines = [row[0] for row in conn.execute(text(f"EXPLAIN {sql}"))]
+        return lines, any("Seq Scan" in line for line in lines)
+    raise SystemExit(f"Unsupported dialect: {dialect}")
+
+def main() -> int:
+    if MIGRATE:
+        from alembic import command
+        from alembic.config import Config
+        command.upgrade(Config("alembic.ini"), "head")
+
+    failed = []
+    with engine.connect() as conn:
+        for name, statement in hot_queries().items():
+            lines, full_scan = explain(conn, statement)
+            print(f"{'FAIL' if full_scan else 'ok  '} {name}")
+            for line in lines:
+                print(f"       {line}")
+            if full_scan:
+                failed.append(name)
+
+    if failed:
+        print(f"{len(failed)} hot queries fall back to a full scan: {', '.join(failed)}")
+        return 1
+    print("All hot queries use an index")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
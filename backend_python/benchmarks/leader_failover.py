@@ -0,0 +1,160 @@
+"""
+File: benchmarks/leader_failover.py
+
+Uji failover leader election (app/tasks/leader.py) dengan beberapa process
+
+Skenario:
+- N process kandidat menjalankan LeaderRunner dengan job dummy yang menulis
+  "pid timestamp" ke file log setiap 50 ms (pengganti scheduler poller)
+- Leader yang sedang aktif dibunuh dengan SIGKILL (tanpa release lock),
+  lalu diukur waktu sampai kandidat lain mulai menulis
+- Kandidat pengganti dijalankan lagi supaya jumlah process tetap N
+- Job meniru siklus poller: panggilan blocking di thread (pengganti SNMP),
+  lalu ensure_leadership() sebelum menulis
+- Mode stall: leader dihentikan sementara (SIGSTOP) selama 2x LEADER_LEASE_TTL
+  lalu dilanjutkan (SIGCONT), meniru leader yang tertahan di SNMP. Dengan lease
+  Redis kandidat lain mengambil alih; leader lama tidak boleh menulis lagi
+- Di akhir dicek tidak pernah ada dua leader yang menulis bersamaan
+
+Usage (dari folder backend_python):
+    python -m benchmarks.leader_failover [jumlah_process] [jumlah_kill] [kill|stall]
+    LEADER_BACKEND=redis REDIS_URL=redis://localhost:6379/0 python -m benchmarks.leader_failover
+    LEADER_BACKEND=mysql DATABASE_URL=mysql+pymysql://... python -m benchmarks.leader_failover
+"""
+
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+TICK = 0.05
+
+def child(log_path: str):
+    from app.tasks.leader import LeaderRunner, create_elector, ensure_leadership
+
+    async def job():
+        pid = os.getpid()
+        while True:
+            await asyncio.to_thread(time.sleep, TICK)
+            await ensure_leadership()
+            with open(log_path, "a") as log:
+                log.write(f"{pid} {time.time()}\n")
+            await asyncio.sleep(TICK)
+
+    asyncio.run(LeaderRunner(create_elector("failover-test"), job, name="failover-test").run())
+
+def read_log(log_path: str):
+    with open(log_path) as log:
+        entries = []
+        for line in log:
+            parts = line.split()
+            if len(parts) == 2:
+                entries.append((int(parts[0]), float(parts[1])))
+        return entries
+
+def spawn(log_path: str, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.leader_failover", "--child", log_path],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+def current_leader(log_path: str, since: float, timeout: float = 30):
+    """Pid writing to the log after since, waiting up to timeout seconds"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        for pid, stamp in reversed(read_log(log_path)):
+            if stamp > since:
+                return pid, stamp
+            break
+        time.sleep(TICK)
+    raise TimeoutError("no leader elected")
+
+# Leader yang masih aktif menulis setiap ~2 TICK; jeda lebih pendek dari ini
+# di antara dua tulisan pid yang sama berarti pid tsb tidak pernah berhenti
+INTERLEAVE_GAP = 1.0
+
+def check_overlap(entries) -> int:
+    """
+    Number of writes by another pid sandwiched inside a leader's continuous run (would mean two leaders)
+
+    Pid lama yang terpilih lagi setelah kehilangan leadership (mode stall) bukan
+    pelanggaran: jeda tulisannya jauh lebih panjang dari INTERLEAVE_GAP.
+    """
+    segments = []
+    for pid, stamp in entries:
+        if segments and segments[-1][0] == pid:
+            segments[-1][2] = stamp
+        else:
+            segments.append([pid, stamp, stamp])
+    violations = 0
+    for before, middle, after in zip(segments, segments[1:], segments[2:]):
+        if before[0] == after[0] != middle[0] and after[1] - before[2] < INTERLEAVE_GAP:
+            violations += 1
+    return violations
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        child(sys.argv[2])
+        sys.exit(0)
+
+    process_count = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    kills = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    mode = sys.argv[3] if len(sys.argv) > 3 else "kill"
+    workdir = tempfile.mkdtemp()
+    log_path = os.path.join(workdir, "leader.log")
+    open(log_path, "w").close()
+
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    env.setdefault("LEADER_LOCK_DIR", workdir)
+    env.setdefault("LEADER_RETRY_INTERVAL", "0.2")
+    env.setdefault("LEADER_RENEW_INTERVAL", "1")
+    env.setdefault("LEADER_LEASE_TTL", "3")
+
+    processes = {}
+    for _ in range(process_count):
+        proc = spawn(log_path, env)
+        processes[proc.pid] = proc
+
+    failovers = []
+    stall = float(env["LEADER_LEASE_TTL"]) * 2
+    try:
+        leader, _ = current_leader(log_path, since=0)
+        for _ in range(kills):
+            time.sleep(0.5)
+            if mode == "stall":
+                processes[leader].send_signal(signal.SIGSTOP)
+                time.sleep(stall)
+                processes[leader].send_signal(signal.SIGCONT)
+                time.sleep(1)
+                leader, _ = current_leader(log_path, since=time.time() - 0.5)
+                continue
+            killed_at = time.time()
+            processes.pop(leader).send_signal(signal.SIGKILL)
+            # Tunggu sampai pid lain yang menulis
+            while True:
+                new_leader, first_write = current_leader(log_path, since=killed_at)
+                if new_leader != leader:
+                    break
+                time.sleep(TICK)
+            failovers.append((first_write - killed_at) * 1000)
+            leader = new_leader
+            replacement = spawn(log_path, env)
+            processes[replacement.pid] = replacement
+    finally:
+        for proc in processes.values():
+            proc.send_signal(signal.SIGTERM)
+        for proc in processes.values():
+            proc.wait(timeout=10)
+
+    backend = env.get("LEADER_BACKEND", "auto")
+    print(f"backend {backend}, {process_count} candidates, {kills} leader {'stalls' if mode == 'stall' else 'kills'}")
+    if failovers:
+        print(f"failover p50 {statistics.median(failovers):8.1f} ms  max {max(failovers):8.1f} ms")
+    violations = check_overlap(read_log(log_path))
+    print(f"overlapping leaders: {violations}")
+    sys.exit(1 if violations else 0)
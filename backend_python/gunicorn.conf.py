@@ -0,0 +1,61 @@
+"""
+File: gunicorn.conf.py
+
+Profil server production: gunicorn sebagai process manager dengan worker uvicorn
+
+Usage:
+    alembic upgrade head
+    gunicorn main:app -c gunicorn.conf.py
+
+Fungsi utama:
+- Beberapa worker UvicornWorker (async) dalam satu container / host
+- preload_app: kode aplikasi di-import sekali di master lalu di-fork,
+  sehingga worker baru (restart / max_requests) siap lebih cepat dan
+  memori halaman kode dipakai bersama
+- Keep-alive lebih panjang dari idle timeout Nginx upstream, agar koneksi
+  tidak ditutup backend di tengah request dari proxy
+- Graceful shutdown: worker menyelesaikan request berjalan dan menjalankan
+  lifespan shutdown sebelum dimatikan
+
+Environment variables:
+- WEB_CONCURRENCY: Jumlah worker (default 2 x CPU + 1, maksimum 8)
+- BIND: Alamat listen (default 0.0.0.0:8000)
+- GUNICORN_KEEPALIVE: Keep-alive dalam detik (default 75)
+- GUNICORN_TIMEOUT: Worker yang tidak merespon selama ini di-restart (default 60)
+- GUNICORN_GRACEFUL_TIMEOUT: Waktu menyelesaikan request saat shutdown (default 30)
+- GUNICORN_MAX_REQUESTS: Restart worker setelah N request, 0 = tidak (default 10000)
+
+Catatan:
+- Cache dan rate limit dipakai bersama antar worker lewat Redis (REDIS_URL),
+  lihat app/shared_state.py
+- Koneksi database yang mungkin dibuka master saat preload dibuang setelah
+  fork, setiap worker membuat pool koneksinya sendiri
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(2 * multiprocessing.cpu_count() + 1, 8))))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+preload_app = True
+
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "75"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = max_requests // 10
+
+# Header X-Forwarded-* dipercaya dari reverse proxy (Nginx)
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "*")
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master process"""
+    from app.database import engine
+
+    engine.dispose(close=False)
@@ -8,9 +8,19 @@ Fungsi utama:
 - Membuat instance FastAPI application
 - Mengkonfigurasi CORS middleware untuk komunikasi dengan frontend
 - Mendaftarkan semua router (endpoint API)
-- Membuat tabel database jika belum ada
+- Lifespan: cek versi schema saat startup, menutup koneksi dan thread pool saat shutdown
 - Menyediakan endpoint health check
 
+Startup:
+- Schema database dibuat / di-upgrade oleh Alembic (alembic upgrade head)
+  sebelum server dijalankan, bukan oleh create_all saat import
+- Library protokol yang berat (pysnmp, paramiko, requests, cryptography)
+  di-import lazy saat pertama dipakai, dan instance service dibuat sekali
+  oleh container bersama (app/services/container.py)
+- Ukur waktu import dengan: python -m benchmarks.bench_startup
+- RUN_POLLER_IN_API=1: scheduler poller ikut berjalan di worker API, hanya
+  di worker yang terpilih sebagai leader (app/tasks/leader.py)
+
 Struktur routing:
 - /api/auth/* - Autentikasi (login, logout, register)
 - /api/dashboard/* - Statistik dashboard
@@ -22,28 +32,54 @@ Struktur routing:
 - /api/activity-logs/* - Log aktivitas
 - /api/locations/* - Manajemen lokasi
 - /api/maps/* - Data untuk maps
+- /api/optical-thresholds/* - Ambang RX/TX power ONU
 
 Server berjalan di port 8000 (default) dan dapat diakses dari frontend
 melalui reverse proxy (Nginx) dengan SSL/TLS.
 """
 
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
+from app.auth import password_executor
+from app.database import engine, async_engine
 from app.routers import (
     olts, onus, alarms, provisioning, locations, maps, 
-    client_api, auth, dashboard, monitoring, activity_logs
+    client_api, auth, dashboard, monitoring, activity_logs, optical_thresholds
 )
+from app.schema_check import check_schema
+from app.services.container import services
+# Mendaftarkan listener yang memelihara tabel status_counters
+from app.services import counter_service  # noqa: F401
+
+RUN_POLLER_IN_API = os.getenv("RUN_POLLER_IN_API", "0") == "1"
 
-# Membuat tabel database jika belum ada
-# Menggunakan SQLAlchemy untuk auto-create schema
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup: verify the schema revision. Shutdown: release pools and executors"""
+    await asyncio.to_thread(check_schema, engine)
+    poller_runner = None
+    if RUN_POLLER_IN_API:
+        from app.tasks import poller
+        # Thread sendiri: SNMP di poller bersifat blocking dan tidak boleh menahan event loop API
+        poller_runner = poller.create_runner()
+        poller_runner.start_thread()
+    yield
+    if poller_runner is not None:
+        await asyncio.to_thread(poller_runner.stop, 10)
+    services.reset()
+    password_executor.shutdown(wait=False, cancel_futures=True)
+    await async_engine.dispose()
+    engine.dispose()
 
 # Inisialisasi FastAPI application
 app = FastAPI(
     title="NMS ZTE OLT API",
     description="Network Management System for ZTE OLT - Backend API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Konfigurasi CORS middleware
@@ -54,6 +90,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Header pagination dan change feed harus bisa dibaca oleh frontend
+    expose_headers=["X-Next-Cursor", "X-Olt-Count", "X-Olt-Cursor", "X-Olt-Ids", "ETag"],
 )
 
 # Mendaftarkan semua router (endpoint API)
@@ -67,6 +105,7 @@ app.include_router(alarms.router, prefix="/api/alarms", tags=["Alarms"])  # Alar
 app.include_router(provisioning.router, prefix="/api/provisioning", tags=["Provisioning"])  # Provisioning: /api/provisioning/*
 app.include_router(locations.router, prefix="/api/locations", tags=["Locations"])  # Location management: /api/locations/*
 app.include_router(maps.router, prefix="/api/maps", tags=["Maps"])  # Maps data: /api/maps/*
+app.include_router(optical_thresholds.router, prefix="/api/optical-thresholds", tags=["Optical Thresholds"])  # Optical thresholds: /api/optical-thresholds/*
 app.include_router(client_api.router, tags=["Client API"])  # Client API: /api/client/*
 
 @app.get("/")
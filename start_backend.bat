@@ -24,6 +24,10 @@ if not exist ".env" (
     echo.
 )
 
+REM Create or upgrade the database schema
+echo Upgrading database schema...
+alembic upgrade head
+
 REM Run the application
 echo Starting FastAPI server...
 python run.py